@@ -0,0 +1,166 @@
+from benchmark.logs.bench_results import write_results  # For writing the results to JSON.
+from benchmark.logs.log_generator import HANDLE_PREFIXES, HANDLES_PER_PREFIX, write_days, write_robots_cache
+from contextlib import redirect_stdout  # For keeping the statistics printed by the pipeline.
+from datetime import date, timedelta  # For the range of generated days.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # For the stub Loki server.
+from pathlib import Path  # For handling the generated files.
+from src.logs import main as pipeline  # The logs pipeline being measured.
+from src.metadata.forwarder.mongodb_forwarder import MongoDbForwarder  # Replaced by the stub metadata store.
+import gzip  # For decoding the JSON pushes received by the stub Loki server.
+import io  # For capturing the output of the pipeline.
+import json  # For decoding the pushes and the printed statistics.
+import os  # For configuring the pipeline through environment variables.
+import re  # For finding the statistics printed by the pipeline.
+import sys  # For reading command-line arguments.
+import tempfile  # For the generated day files and robots list.
+import threading  # For serving the stub Loki server in the background.
+import time  # For measuring execution time and simulating latency.
+
+LOKI_LATENCY = 0.005  # Seconds the stub Loki server takes to answer a push.
+MONGO_LATENCY = 0.001  # Seconds the stub metadata store takes to answer a query.
+METADATA = {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}  # The metadata of every known resource.
+
+class StubLoki(BaseHTTPRequestHandler):
+    """
+    A stub Loki push endpoint that accepts every push and counts what it receives.
+
+    Attributes:
+        pushes (int): The number of pushes received.
+        entries (int | None): The number of entries received, or None once a push could not be decoded.
+        bytes_received (int): The compressed bytes received.
+        lock (threading.Lock): Guards the counters across the server threads.
+
+    Methods:
+        do_POST():
+            Receives a push and counts it.
+        log_message(format, *args):
+            Silences the request log of the server.
+    """
+
+    pushes = 0
+    entries = 0
+    bytes_received = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        """
+        Receives a push, counting its entries when it is JSON, and answers after `LOKI_LATENCY` seconds.
+        """
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        entries = None
+        if self.headers.get('Content-Type') == 'application/json':
+            streams = json.loads(gzip.decompress(body))['streams']
+            entries = sum(len(stream['values']) for stream in streams)
+        time.sleep(LOKI_LATENCY)
+        with StubLoki.lock:
+            StubLoki.pushes += 1
+            StubLoki.bytes_received += len(body)
+            StubLoki.entries = None if entries is None or StubLoki.entries is None else StubLoki.entries + entries
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """
+        Silences the request log of the server.
+        """
+
+def _is_known(resource_id: str) -> bool:
+    """
+    Tells whether the stub metadata store has a resource, which is the case for four out of five handles.
+
+    Args:
+        resource_id (str): The handle id, such as `2117/12345`.
+
+    Returns:
+        bool: True if the resource has metadata.
+    """
+    number = resource_id.rpartition('/')[2]
+    return number.isdigit() and int(number) % 5 != 0
+
+def install_stub_mongo():
+    """
+    Replaces the metadata queries of `MongoDbForwarder` with an in-memory store of the generated handles, which
+    answers each query after `MONGO_LATENCY` seconds, so that every `METADATA_ENRICHMENT` mode can be measured
+    without a MongoDB server.
+    """
+    def get_metadata_by_id(cls, resource_id):
+        time.sleep(MONGO_LATENCY)
+        return dict(METADATA) if _is_known(resource_id) else None
+
+    def get_metadata_by_ids(cls, resource_ids):
+        time.sleep(MONGO_LATENCY)
+        return {resource_id: dict(METADATA) for resource_id in resource_ids if _is_known(resource_id)}
+
+    def iter_metadata(cls, batch_size=10000):
+        time.sleep(MONGO_LATENCY)
+        for prefix in dict.fromkeys(HANDLE_PREFIXES):
+            for number in range(HANDLES_PER_PREFIX):
+                if _is_known(f'{prefix}/{number}'):
+                    yield f'{prefix}/{number}', dict(METADATA)
+
+    MongoDbForwarder.get_metadata_by_id = classmethod(get_metadata_by_id)
+    MongoDbForwarder.get_metadata_by_ids = classmethod(get_metadata_by_ids)
+    MongoDbForwarder.iter_metadata = classmethod(iter_metadata)
+
+def main():
+    """
+    Runs the whole logs pipeline on generated day files against a stub Loki server and metadata store.
+
+    The pipeline is configured as usual through environment variables, such as `LOGS_WORKERS`,
+    `METADATA_ENRICHMENT` or `LOKI_ENCODING`, which are recorded with the results.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/bench_pipeline.py [lines_per_day] [days] [seed] [results.json]
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    output = sys.argv[4] if len(sys.argv) > 4 else None
+    first_day = date(2023, 3, 1)
+    last_day = first_day + timedelta(days=days - 1)
+    if last_day.month != first_day.month:
+        raise ValueError(f"At most 31 days can be generated, not {days}")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubLoki)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    install_stub_mongo()
+
+    with tempfile.TemporaryDirectory() as folder:
+        start_time = time.perf_counter()
+        write_days(Path(folder) / 'logs', first_day, days, count, seed)
+        generate_seconds = time.perf_counter() - start_time
+        os.environ.update({
+            'LOKI_URL': f'http://127.0.0.1:{server.server_port}',
+            'LOGS_OUTPUT_PATH': str(Path(folder) / 'logs'),
+            'ROBOTS_LIST_PATH': str(write_robots_cache(Path(folder) / 'robots').parent),
+            'START_YEAR': str(first_day.year), 'END_YEAR': str(last_day.year),
+            'START_MONTH': str(first_day.month), 'END_MONTH': str(last_day.month),
+            'START_DAY': str(first_day.day), 'END_DAY': str(last_day.day)
+        })
+        os.environ.pop('ROBOTS_LIST_VERSION', None)
+
+        printed = io.StringIO()
+        start_time = time.perf_counter()
+        with redirect_stdout(printed):
+            pipeline.main()
+        seconds = time.perf_counter() - start_time
+    server.shutdown()
+
+    # The last statistics printed are those of the year.
+    statistics = json.loads(re.findall(r'^\{.*?^\}', printed.getvalue(), re.S | re.M)[-1])
+    results = {
+        'lines': count * days,
+        'days': days,
+        'seed': seed,
+        'generate_seconds': round(generate_seconds, 3),
+        'seconds': round(seconds, 3),
+        'lines_per_second': round(count * days / seconds),
+        'statistics': statistics,
+        'loki_stub': {'pushes': StubLoki.pushes, 'entries': StubLoki.entries, 'bytes_received': StubLoki.bytes_received}
+    }
+    print(f"Lines: {count * days} in {days} days, {seconds:.3f} s ({count * days / seconds:,.0f} lines/s)")
+    print(f"Loki pushes: {StubLoki.pushes}, entries: {StubLoki.entries}, bytes: {StubLoki.bytes_received}")
+    write_results('pipeline', results, output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone  # For recording when a benchmark ran.
+from pathlib import Path  # For handling the results paths.
+import json  # For writing the results.
+import os  # For reading the pipeline settings and the CPU count.
+import platform  # For recording the machine and Python version.
+import subprocess  # For recording the git commit being measured.
+
+RESULTS_PATH = Path('benchmark/results')  # Default directory of the results files.
+
+# Environment variables that change how the pipeline runs, recorded with the results.
+SETTINGS = [
+    'LOGS_WORKERS', 'LOGS_RANGE_BYTES', 'LOGS_COUNT_ONLY', 'LOGS_DECOMPRESSOR', 'METADATA_ENRICHMENT',
+    'METADATA_BATCH_SIZE', 'LOKI_ENCODING', 'LOKI_BATCH_SIZE', 'LOKI_BATCH_BYTES', 'LOKI_BATCH_LINGER',
+    'LOKI_ADAPTIVE_BATCH', 'LOKI_SENDERS', 'LOKI_QUEUE_SIZE'
+]
+
+def _commit() -> str | None:
+    """
+    Returns the git commit of the working tree.
+
+    Returns:
+        str | None: The commit hash, or None outside a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(name: str, results: dict, output: str | None = None) -> Path:
+    """
+    Writes the results of a benchmark to a JSON file, with the commit, machine and settings they were measured on,
+    so that runs can be compared over time.
+
+    Args:
+        name (str): The name of the benchmark.
+        results (dict): The measurements.
+        output (str | None): The path of the results file, or None for a timestamped file in `RESULTS_PATH`.
+
+    Returns:
+        Path: The path of the results file.
+    """
+    started_at = datetime.now(timezone.utc)
+    path = Path(output) if output else RESULTS_PATH / f"{name}-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        'benchmark': name,
+        'started_at': started_at.isoformat(),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'settings': {setting: os.environ[setting] for setting in SETTINGS if os.environ.get(setting)},
+        'results': results
+    }
+    path.write_text(json.dumps(document, indent=4), encoding='utf-8')
+    print(f"Results written to {path}")
+    return path
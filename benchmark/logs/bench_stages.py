@@ -0,0 +1,218 @@
+from benchmark.logs.bench_results import write_results  # For writing the results to JSON.
+from benchmark.logs.log_generator import generate_lines, write_robots_cache  # For the synthetic day logs.
+from datetime import date  # For the day of the generated logs.
+from pathlib import Path  # For the offline COUNTER Robots cache.
+from src.logs.counter.double_click import DoubleClick  # Stage: double-click filtering.
+from src.logs.counter.robots_crawlers import RobotsCrawlers  # Stage: robot detection.
+from src.logs.counter.status_code import StatusCode  # Stage: status code filtering.
+from src.logs.filter.with_ipv6address import WithIPv6Address  # Stage: address normalization.
+from src.logs.filter.without_ipaddress import WithoutIpAddress  # Stage: address normalization.
+from src.logs.forwarder.loki_forwarder import LokiForwarder  # Stage: building and encoding Loki pushes.
+from src.logs.main import process_batch  # The stages together, without metadata.
+from src.logs.transformer.add_default_ipaddress import AddDefaultIpAddress  # Stage: address normalization.
+from src.logs.transformer.remove_ipv6address import RemoveIPv6Address  # Stage: address normalization.
+from src.logs.transformer.to_json import ToJSON  # Stage: parsing.
+from src.logs.utils import date_converter  # Stage: access time conversion.
+from src.logs.utils.resource_classifier import ResourceClassifier  # Stage: resource classification.
+import os  # For pointing the robots list to the offline cache.
+import sys  # For reading command-line arguments.
+import tempfile  # For the offline COUNTER Robots cache.
+import time  # For measuring execution time.
+
+def normalize(lines: list[str]) -> list[str]:
+    """
+    Fills in missing addresses and removes IPv6 addresses, as `process_batch` does.
+
+    Args:
+        lines (list[str]): The raw log lines.
+
+    Returns:
+        list[str]: The normalized lines.
+    """
+    return [
+        AddDefaultIpAddress.transform(line) if WithoutIpAddress.filter(line) else
+        RemoveIPv6Address.transform(line) if WithIPv6Address.filter(line) else line
+        for line in lines
+    ]
+
+def parse(lines: list[str]) -> list[dict]:
+    """
+    Parses the lines, leaving out the ones that cannot be parsed.
+
+    Args:
+        lines (list[str]): The normalized log lines.
+
+    Returns:
+        list[dict]: The structured logs.
+    """
+    logs = []
+    for line in lines:
+        try:
+            logs.append(ToJSON.transform(line)[0])
+        except Exception:
+            pass
+    return logs
+
+def count_status(logs: list[dict]) -> int:
+    """
+    Counts the logs filtered out by their status code.
+
+    Args:
+        logs (list[dict]): The structured logs.
+
+    Returns:
+        int: The number of filtered logs.
+    """
+    return sum(StatusCode.filter(int(log['request']['status_code'])) for log in logs)
+
+def convert_times(logs: list[dict]) -> list[int]:
+    """
+    Converts the access times to UNIX timestamps, starting with an empty cache.
+
+    Args:
+        logs (list[dict]): The structured logs.
+
+    Returns:
+        list[int]: The timestamps.
+    """
+    date_converter._start_of_day.cache_clear()
+    return [date_converter.to_timestamp(log['date'], log['time']) for log in logs]
+
+def count_double_clicks(logs: list[dict]) -> int:
+    """
+    Counts the double clicks, starting with an empty window.
+
+    Args:
+        logs (list[dict]): The structured logs, with their `timestamp`.
+
+    Returns:
+        int: The number of double clicks.
+    """
+    DoubleClick.reset()
+    return sum(
+        DoubleClick.filter_timestamp(log['ip_address'], log['timestamp'], log['request']['resource'], log['user_agent'])
+        for log in logs
+    )
+
+def count_robots(logs: list[dict]) -> int:
+    """
+    Counts the requests made by robots, starting with an empty cache.
+
+    Args:
+        logs (list[dict]): The structured logs.
+
+    Returns:
+        int: The number of requests made by robots.
+    """
+    RobotsCrawlers.filter.cache_clear()
+    return sum(bool(RobotsCrawlers.filter(log['user_agent'])) for log in logs)
+
+def classify(logs: list[dict]) -> list[tuple]:
+    """
+    Classifies the requested resources, starting with an empty cache.
+
+    Args:
+        logs (list[dict]): The structured logs.
+
+    Returns:
+        list[tuple]: The type and handle id of each resource.
+    """
+    ResourceClassifier.classify.cache_clear()
+    return [ResourceClassifier.classify(log['request']['resource']) for log in logs]
+
+def encode(records: list[tuple]) -> int:
+    """
+    Builds and encodes the Loki pushes of the logs, in batches of `LokiForwarder.BATCH_SIZE`.
+
+    Args:
+        records (list[tuple]): The structured logs and their raw lines.
+
+    Returns:
+        int: The total payload size in bytes.
+    """
+    LokiForwarder.reset()
+    encoding = LokiForwarder._get_encoding()
+    return sum(
+        len(LokiForwarder._encode(LokiForwarder._build_streams(records[start:start + LokiForwarder.BATCH_SIZE]), encoding))
+        for start in range(0, len(records), LokiForwarder.BATCH_SIZE)
+    )
+
+def pipeline(lines: list[str]) -> list[tuple]:
+    """
+    Runs every stage with `process_batch`, without metadata, starting with an empty double-click window.
+
+    Args:
+        lines (list[str]): The raw log lines.
+
+    Returns:
+        list[tuple]: The logs to forward.
+    """
+    DoubleClick.reset()
+    return process_batch(lines, enrich=False)[0]
+
+def measure(stage, data) -> float:
+    """
+    Runs a stage three times and keeps the fastest run.
+
+    Args:
+        stage (Callable): The stage.
+        data (list): The input of the stage.
+
+    Returns:
+        float: The seconds of the fastest run.
+    """
+    best = float('inf')
+    for _ in range(3):
+        start_time = time.perf_counter()
+        stage(data)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+def main():
+    """
+    Measures each stage of the logs pipeline on generated logs, feeding each stage the output of the previous ones.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/bench_stages.py [lines] [seed] [results.json]
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    output = sys.argv[3] if len(sys.argv) > 3 else None
+
+    with tempfile.TemporaryDirectory() as robots_path:
+        os.environ['ROBOTS_LIST_PATH'] = str(write_robots_cache(Path(robots_path)).parent)
+        os.environ.pop('ROBOTS_LIST_VERSION', None)
+        RobotsCrawlers.load()
+
+    lines = generate_lines(date(2023, 3, 1), count, seed)
+    normalized = normalize(lines)
+    logs = parse(normalized)
+    for log, timestamp in zip(logs, convert_times(logs)):
+        log['timestamp'] = timestamp
+    records = pipeline(lines)
+
+    stages = [
+        ('normalize', normalize, lines),
+        ('parse', parse, normalized),
+        ('status_code', count_status, logs),
+        ('timestamp', convert_times, logs),
+        ('double_click', count_double_clicks, logs),
+        ('robots', count_robots, logs),
+        ('classify', classify, logs),
+        ('loki_encode', encode, records),
+        ('process_batch', pipeline, lines),
+    ]
+    results = {'lines': count, 'seed': seed, 'stages': {}}
+    print(f"Lines: {count}")
+    for name, stage, data in stages:
+        seconds = measure(stage, data)
+        results['stages'][name] = {
+            'items': len(data),
+            'seconds': round(seconds, 6),
+            'us_per_item': round(seconds / len(data) * 1e6, 3) if data else None
+        }
+        print(f"{name:<14} {len(data):>8} items {seconds:8.3f} s ({seconds / max(len(data), 1) * 1e6:6.2f} us/item)")
+    write_results('stages', results, output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from src.logs.forwarder.loki_forwarder import LokiForwarder  # Import the Loki forwarder whose encodings are compared.
+from src.logs.transformer.to_json import ToJSON  # Import the parser used to build the log entries.
+from src.logs.utils.constants import LABEL_CONTENT, LABEL_CONTENT_OK, LABEL_CONTENT_ERROR, LABEL_TYPE, LABEL_VALUE
+import gzip  # For reading compressed log files.
+import sys  # For reading command-line arguments.
+import time  # For measuring CPU time.
+
+# Representative sample lines used when no day file is given.
+SAMPLE_LOGS = [
+    '147.83.2.10 - - [01/Mar/2023:10:15:32 +0100] "GET /handle/2117/345678 HTTP/1.1" 200 23456 '
+    '"https://www.google.com/" "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/110.0.0.0 Safari/537.36"\n',
+    '83.45.120.7 - - [01/Mar/2023:10:15:33 +0100] "GET /bitstream/handle/2099.1/12345/thesis.pdf?sequence=1 HTTP/1.1" '
+    '200 1048576 "https://upcommons.upc.edu/handle/2099.1/12345" "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) '
+    'Gecko/20100101 Firefox/110.0"\n',
+    '0.0.0.0 - - [01/Mar/2023:10:15:35 +0100] "GET /discover?query=energia HTTP/1.1" 200 512 '
+    '"https://upcommons.upc.edu/" "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_2) Safari/605.1.15"\n',
+]
+
+def load_batch(path: str | None, limit: int) -> list[tuple[dict, str]]:
+    """
+    Loads the log entries to encode, parsed and labelled as the pipeline would forward them.
+
+    Args:
+        path (str | None): Path to a compressed day log file, or None to use the built-in sample.
+        limit (int): The maximum number of lines to load.
+
+    Returns:
+        list[tuple[dict, str]]: The structured logs and their raw lines.
+    """
+    if path is None:
+        lines = (SAMPLE_LOGS * (limit // len(SAMPLE_LOGS) + 1))[:limit]
+    else:
+        lines = []
+        with gzip.open(path, mode='rt', encoding='utf-8', errors='ignore') as file:
+            for line in file:
+                lines.append(line)
+                if len(lines) >= limit:
+                    break
+
+    batch = []
+    for line in lines:
+        try:
+            log, _ = ToJSON.transform(line)
+            log[LABEL_CONTENT] = LABEL_CONTENT_OK
+            log[LABEL_TYPE] = 'recurs' if '/handle/' in log['request']['resource'] else 'altres'
+        except Exception:
+            log = {LABEL_VALUE: line, LABEL_CONTENT: LABEL_CONTENT_ERROR, 'date': '01/Mar/2023', 'time': '00:00:00 +0100'}
+        batch.append((log, line))
+    return batch
+
+def build_streams(batch: list[tuple[dict, str]]) -> list[list]:
+    """
+    Groups the log entries into the streams of each push, in batches of `LokiForwarder.BATCH_SIZE`.
+
+    Args:
+        batch (list[tuple[dict, str]]): The structured logs and their raw lines.
+
+    Returns:
+        list[list]: The Loki streams of each push.
+    """
+    LokiForwarder.reset()
+    return [
+        LokiForwarder._build_streams(batch[index:index + LokiForwarder.BATCH_SIZE])
+        for index in range(0, len(batch), LokiForwarder.BATCH_SIZE)
+    ]
+
+def measure(pushes: list[list], encoding: str) -> tuple[float, int]:
+    """
+    Serializes and compresses the streams of each push with the given encoding.
+
+    Args:
+        pushes (list[list]): The Loki streams of each push.
+        encoding (str): The push encoding, `json` or `protobuf`.
+
+    Returns:
+        tuple[float, int]: The CPU seconds spent and the total payload size in bytes.
+    """
+    size = 0
+    start_time = time.process_time()
+    for streams in pushes:
+        size += len(LokiForwarder._encode(streams, encoding))
+    return time.process_time() - start_time, size
+
+def main():
+    """
+    Compares the client CPU time and payload size of the JSON and protobuf push encodings.
+
+    The streams are built once beforehand, since grouping and timestamping are shared by both encodings.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/forwarder/bench_loki_encoding.py [day_file.txt.gz] [lines]
+    """
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    batch = load_batch(path, limit)
+    pushes = build_streams(batch)
+
+    print(f"Lines: {len(batch)}, pushes: {len(pushes)}")
+    results = {encoding: measure(pushes, encoding) for encoding in ('json', 'protobuf')}
+    for encoding, (cpu_time, size) in results.items():
+        print(f"{encoding:<9} CPU: {cpu_time:.3f} s ({len(batch) / cpu_time:,.0f} lines/s), payload: {size:,} bytes")
+    print(f"CPU speedup: {results['json'][0] / results['protobuf'][0]:.2f}x")
+
+if __name__ == "__main__":
+    main()
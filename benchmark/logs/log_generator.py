@@ -0,0 +1,234 @@
+from datetime import date, timedelta  # For naming the day files and formatting access dates.
+from pathlib import Path  # For handling the output paths.
+from src.logs.counter.robots_crawlers import RobotsCrawlers  # For writing a COUNTER Robots cache file offline.
+import gzip  # For writing compressed day files.
+import json  # For writing the COUNTER Robots cache file.
+import random  # For generating reproducible log mixes.
+import sys  # For reading command-line arguments.
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Weights of each kind of request in the generated mix, close to the proportions of a UPCommons day.
+REQUEST_MIX = {
+    'handle': 30,
+    'bitstream_handle': 15,
+    'bitstream_id': 5,
+    'web': 25,
+    'search': 10,
+    'other': 8,
+    'malformed': 2,
+}
+
+# Weights of each kind of client address.
+ADDRESS_MIX = {'ipv4': 90, 'missing': 4, 'ipv6': 6}
+
+# Weights of the response status codes.
+STATUS_MIX = {'200': 80, '206': 3, '304': 10, '404': 5, '500': 2}
+
+HANDLE_PREFIXES = ['2117', '2117', '2117', '2099.1', '2099']  # Handle prefixes, weighted by repetition.
+HANDLES_PER_PREFIX = 50000  # The number of distinct handles of each prefix.
+SEARCH_PATHS = ['/discover?query={0}', '/simple-search?query={0}', '/browse?type=author&value={0}', '/search?q={0}']
+SEARCH_TERMS = ['energia', 'robotica', 'aigua', 'arquitectura', 'xarxes', 'materials', 'tesi', 'bim']
+WEB_PATHS = [
+    '/static/css/style.css', '/static/js/main.js', '/themes/UPC/images/logo.png', '/favicon.ico',
+    '/static/fonts/roboto.woff2', '/themes/UPC/images/banner.jpg'
+]
+OTHER_PATHS = ['/', '/about', '/community-list', '/login', '/feedback', '/statistics', '/handle/2117/']
+MALFORMED_REQUESTS = [
+    '"GET /handle/2117/{0} and more HTTP/1.1"', '"\\x16\\x03\\x01\\x02"', '"-"',
+    '"GET /cerca café/{0} HTTP/1.1"', '"GET /handle/2117/{0}%00 HTTP/1.1"'
+]
+REFERERS = ['-', 'https://www.google.com/', 'https://upcommons.upc.edu/', 'https://scholar.google.es/', 'https://duckduckgo.com/']
+
+HUMAN_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36',
+]
+BOT_USER_AGENTS = [
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+    'Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)',
+    'Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)',
+    'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; ClaudeBot/1.0)',
+    'python-requests/2.31.0',
+    'curl/8.4.0',
+]
+BOT_SHARE = 0.25  # The share of requests made by bots.
+DOUBLE_CLICK_SHARE = 0.03  # The share of requests repeating a recent request of the same client.
+TRUNCATED_SHARE = 0.002  # The share of lines cut short after the access time.
+
+# COUNTER Robots identifiers written to the offline cache file, matching some of the bot user agents.
+ROBOTS_LIST = ['Googlebot', 'YandexBot', 'python-requests', 'curl', 'Baiduspider', 'spider', 'crawler']
+
+def _pick(rng: random.Random, weights: dict) -> str:
+    """
+    Picks a key of a weights mapping.
+
+    Args:
+        rng (random.Random): The random number generator.
+        weights (dict): The weight of each key.
+
+    Returns:
+        str: The picked key.
+    """
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def _handle(rng: random.Random) -> str:
+    """
+    Picks a handle id, with a long-tailed popularity, so that a few resources are requested many times.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The handle id, such as `2117/12345`.
+    """
+    return f'{rng.choice(HANDLE_PREFIXES)}/{int(rng.paretovariate(0.6)) % HANDLES_PER_PREFIX}'
+
+def _address(rng: random.Random) -> str:
+    """
+    Generates the client address field, which may be missing or an IPv6 forwarding chain.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The address field of the log line.
+    """
+    kind = _pick(rng, ADDRESS_MIX)
+    if kind == 'missing':
+        return '-'
+    ipv4 = f'{rng.choice([147, 83, 88, 193, 212])}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+    if kind == 'ipv6':
+        return f'2001:db8:{rng.randrange(65536):x}::{rng.randrange(65536):x}, {ipv4}'
+    return ipv4
+
+def _request(rng: random.Random) -> str:
+    """
+    Generates the quoted request field.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The request field of the log line, including its quotes.
+    """
+    kind = _pick(rng, REQUEST_MIX)
+    if kind == 'malformed':
+        return rng.choice(MALFORMED_REQUESTS).format(rng.randrange(100000))
+    if kind == 'handle':
+        resource = f'/handle/{_handle(rng)}' + rng.choice(['', '', '?mode=full', '/statistics'])
+    elif kind == 'bitstream_handle':
+        resource = f'/bitstream/handle/{_handle(rng)}/{rng.choice(["thesis", "article", "annex"])}.pdf?sequence=1'
+    elif kind == 'bitstream_id':
+        resource = f'/bitstream/id/{rng.randrange(1, 500000)}/file.pdf'
+    elif kind == 'web':
+        resource = rng.choice(WEB_PATHS)
+    elif kind == 'search':
+        resource = rng.choice(SEARCH_PATHS).format(rng.choice(SEARCH_TERMS))
+    else:
+        resource = rng.choice(OTHER_PATHS)
+    return f'"{rng.choice(["GET", "GET", "GET", "HEAD"])} {resource} HTTP/1.1"'
+
+def generate_lines(day: date, count: int, seed: int = 0) -> list[str]:
+    """
+    Generates the access log lines of a day, in time order.
+
+    The same day, count and seed always produce the same lines. Besides a long-tailed mix of handles,
+    bitstreams, searches and web assets, the lines include bots, missing and IPv6 addresses, repeated
+    requests within the double-click window, error statuses, malformed requests and truncated lines.
+
+    Args:
+        day (date): The day of the access times.
+        count (int): The number of lines to generate.
+        seed (int): The seed of the random number generator.
+
+    Returns:
+        list[str]: The log lines, each ending with `\\n`.
+    """
+    rng = random.Random(f'{seed}-{day.isoformat()}')
+    access_date = f'{day.day:02}/{MONTHS[day.month - 1]}/{day.year}'
+    recent = []  # Recent (address, request, user agent) triples, repeated to produce double clicks.
+    lines = []
+    for number in range(count):
+        seconds = number * 86400 // count
+        if recent and rng.random() < DOUBLE_CLICK_SHARE:
+            address, request, user_agent = rng.choice(recent)
+        else:
+            address, request = _address(rng), _request(rng)
+            user_agent = rng.choice(BOT_USER_AGENTS if rng.random() < BOT_SHARE else HUMAN_USER_AGENTS)
+            recent = (recent + [(address, request, user_agent)])[-20:]
+        access_time = f'{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02} +0100'
+        line = (
+            f'{address} - - [{access_date}:{access_time}] {request} {_pick(rng, STATUS_MIX)} '
+            f'{rng.randrange(100, 2000000)} "{rng.choice(REFERERS)}" "{user_agent}"'
+        )
+        if rng.random() < TRUNCATED_SHARE:
+            line = line[:rng.randrange(line.index(']') + 1, len(line))]
+        lines.append(line + '\n')
+    return lines
+
+def write_days(folder: Path, first_day: date, days: int, count: int, seed: int = 0) -> list[Path]:
+    """
+    Writes generated day files named like the UPCommons access logs, such as `anon_upc_access_log.2023-03-01.txt.gz`.
+
+    Args:
+        folder (Path): The directory of the day files, created if necessary.
+        first_day (date): The first day to generate.
+        days (int): The number of consecutive days to generate.
+        count (int): The number of lines of each day.
+        seed (int): The seed of the random number generator.
+
+    Returns:
+        list[Path]: The paths of the day files.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        path = folder / f'anon_upc_access_log.{day.isoformat()}.txt.gz'
+        with gzip.open(path, mode='wt', encoding='utf-8', compresslevel=6) as file:
+            file.writelines(generate_lines(day, count, seed))
+        paths.append(path)
+    return paths
+
+def write_robots_cache(folder: Path) -> Path:
+    """
+    Writes a COUNTER Robots cache file of the default version with `ROBOTS_LIST`, so that no download is needed.
+
+    Args:
+        folder (Path): The directory of the cache file, to be set in `ROBOTS_LIST_PATH`.
+
+    Returns:
+        Path: The path of the cache file.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    cache_file = folder / f'COUNTER_Robots_list.{RobotsCrawlers.DEFAULT_VERSION}.json'
+    cache = {
+        'version': RobotsCrawlers.DEFAULT_VERSION,
+        'source': 'benchmark',
+        'sha256': RobotsCrawlers._checksum(ROBOTS_LIST),
+        'robots': ROBOTS_LIST
+    }
+    cache_file.write_text(json.dumps(cache, indent=4), encoding='utf-8')
+    return cache_file
+
+def main():
+    """
+    Writes generated day files.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/log_generator.py <folder> [lines] [days] [seed]
+    """
+    folder = Path(sys.argv[1])
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    for path in write_days(folder, date(2023, 3, 1), days, count, seed):
+        print(f"Wrote {count} lines to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from src.logs.transformer.to_json import ToJSON  # Import the ToJSON transformer to benchmark.
+import gzip  # For reading compressed log files.
+import sys  # For reading command-line arguments.
+import time  # For measuring execution time.
+
+# Representative sample lines used when no day file is given.
+SAMPLE_LOGS = [
+    '147.83.2.10 - - [01/Mar/2023:10:15:32 +0100] "GET /handle/2117/345678 HTTP/1.1" 200 23456 '
+    '"https://www.google.com/" "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/110.0.0.0 Safari/537.36"\n',
+    '83.45.120.7 - - [01/Mar/2023:10:15:33 +0100] "GET /bitstream/handle/2099.1/12345/thesis.pdf?sequence=1 HTTP/1.1" '
+    '200 1048576 "https://upcommons.upc.edu/handle/2099.1/12345" "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) '
+    'Gecko/20100101 Firefox/110.0"\n',
+    '66.249.66.1 - - [01/Mar/2023:10:15:34 +0100] "GET /discover?query=energia HTTP/1.1" 304 - "-" '
+    '"Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"\n',
+    '0.0.0.0 - - [01/Mar/2023:10:15:35 +0100] "GET /static/css/style.css HTTP/1.1" 200 512 '
+    '"https://upcommons.upc.edu/" "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_2) Safari/605.1.15"\n',
+    '10.1.2.3 - - [01/Mar/2023:10:15:36 +0100] "GET /handle/2117/1 and more HTTP/1.1" 404 209 "-" "curl/7.68.0"\n',
+]
+
+def load_logs(path: str | None, limit: int) -> list[str]:
+    """
+    Loads the log lines to benchmark.
+
+    Args:
+        path (str | None): Path to a compressed day log file, or None to use the built-in sample.
+        limit (int): The maximum number of lines to load.
+
+    Returns:
+        list[str]: The log lines.
+    """
+    if path is None:
+        return (SAMPLE_LOGS * (limit // len(SAMPLE_LOGS) + 1))[:limit]
+    logs = []
+    with gzip.open(path, mode='rt', encoding='utf-8', errors='ignore') as file:
+        for log in file:
+            logs.append(log)
+            if len(logs) >= limit:
+                break
+    return logs
+
+def measure(parse, logs: list[str]) -> float:
+    """
+    Measures the throughput of a parser over a list of log lines.
+
+    Args:
+        parse (Callable[[str], tuple]): The parser to benchmark.
+        logs (list[str]): The log lines to parse.
+
+    Returns:
+        float: The number of lines parsed per second.
+    """
+    start_time = time.perf_counter()
+    for log in logs:
+        try:
+            parse(log)
+        except Exception:
+            pass  # Unparseable lines cost the same as in the pipeline, where they end up as error logs.
+    return len(logs) / (time.perf_counter() - start_time)
+
+def main():
+    """
+    Compares the multi-regex cascade with the single-pass parser and prints lines per second.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/transformer/bench_to_json.py [day_file.txt.gz] [lines]
+    """
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    logs = load_logs(path, limit)
+
+    before = measure(ToJSON._transform_fallback, logs)
+    after = measure(ToJSON.transform, logs)
+    print(f"Lines: {len(logs)}")
+    print(f"Multi-regex cascade: {before:,.0f} lines/s")
+    print(f"Single-pass parser:  {after:,.0f} lines/s")
+    print(f"Speedup: {after / before:.2f}x")
+
+if __name__ == "__main__":
+    main()
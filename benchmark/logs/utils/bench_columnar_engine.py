@@ -0,0 +1,91 @@
+from src.logs.counter.double_click import DoubleClick  # For resetting the double-click window between runs.
+from src.logs.main import new_counters, process_batch  # Import the batch engine to compare with.
+from src.logs.utils.columnar_engine import ColumnarEngine  # Import the columnar engine being measured.
+from src.logs.utils.log_reader import LogReader  # For reading the lines of a day file.
+import sys  # For reading command-line arguments.
+import time  # For measuring execution time.
+
+# Representative sample lines, given a different address for each repetition, used when no day file is given.
+SAMPLE_LOGS = [
+    '147.83.{0}.10 - - [01/Mar/2023:10:15:32 +0100] "GET /handle/2117/345678 HTTP/1.1" 200 23456 '
+    '"https://www.google.com/" "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/110.0.0.0 Safari/537.36"\n',
+    '83.45.{0}.7 - - [01/Mar/2023:10:15:33 +0100] "GET /bitstream/handle/2099.1/12345/thesis.pdf?sequence=1 HTTP/1.1" '
+    '200 1048576 "https://upcommons.upc.edu/handle/2099.1/12345" "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) '
+    'Gecko/20100101 Firefox/110.0"\n',
+    '66.249.{0}.1 - - [01/Mar/2023:10:15:34 +0100] "GET /discover?query=energia HTTP/1.1" 304 - "-" '
+    '"Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"\n',
+    '- - - [01/Mar/2023:10:15:35 +0100] "GET /static/css/style.css HTTP/1.1" 200 512 '
+    '"https://upcommons.upc.edu/" "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_2) Safari/605.1.15"\n',
+    '10.1.{0}.3 - - [01/Mar/2023:10:15:36 +0100] "GET /handle/2117/1 and more HTTP/1.1" 404 209 "-" "curl/7.68.0"\n',
+]
+
+def load_logs(path: str | None, limit: int) -> list[str]:
+    """
+    Loads the log lines to benchmark.
+
+    Args:
+        path (str | None): Path to a compressed day log file, or None to use the built-in sample.
+        limit (int): The maximum number of lines to load.
+
+    Returns:
+        list[str]: The log lines.
+    """
+    if path is None:
+        return [SAMPLE_LOGS[number % len(SAMPLE_LOGS)].format(number // len(SAMPLE_LOGS) % 256) for number in range(limit)]
+    logs = []
+    for log in LogReader.lines(path):
+        logs.append(log)
+        if len(logs) >= limit:
+            break
+    return logs
+
+def run(engine, logs: list[str]) -> tuple[float, dict]:
+    """
+    Counts the logs with an engine, in chunks of `ColumnarEngine.CHUNK_LINES` lines.
+
+    Args:
+        engine (Callable): Counts a chunk of lines into the counters.
+        logs (list[str]): The log lines.
+
+    Returns:
+        tuple[float, dict]: The seconds spent and the counters.
+    """
+    DoubleClick.reset()
+    counters = new_counters()
+    start_time = time.perf_counter()
+    for start in range(0, len(logs), ColumnarEngine.CHUNK_LINES):
+        engine(logs[start:start + ColumnarEngine.CHUNK_LINES], counters)
+    return time.perf_counter() - start_time, counters
+
+def count_batch(lines: list[str], counters: dict) -> None:
+    """
+    Counts a chunk of lines with `process_batch`, without adding metadata or forwarding them.
+
+    Args:
+        lines (list[str]): The log lines.
+        counters (dict): The counters to update.
+    """
+    process_batch(lines, counters, enrich=False)
+
+def main():
+    """
+    Compares counting logs with `process_batch` and with the columnar engine, and checks that both agree.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/utils/bench_columnar_engine.py [day_file.txt.gz] [lines]
+    """
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+    logs = load_logs(path, limit)
+
+    batch_seconds, batch_counters = min((run(count_batch, logs) for _ in range(3)), key=lambda result: result[0])
+    columnar_seconds, columnar_counters = min((run(ColumnarEngine.process_lines, logs) for _ in range(3)), key=lambda result: result[0])
+    assert columnar_counters == batch_counters, (batch_counters, columnar_counters)
+
+    print(f"Lines: {len(logs)}")
+    print(f"{'batch':<10} {batch_seconds:.3f} s ({len(logs) / batch_seconds:,.0f} lines/s)")
+    print(f"{'columnar':<10} {columnar_seconds:.3f} s ({len(logs) / columnar_seconds:,.0f} lines/s), speedup: {batch_seconds / columnar_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
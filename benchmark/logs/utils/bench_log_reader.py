@@ -0,0 +1,106 @@
+from src.logs.utils.log_reader import LogReader  # Import the batched reader being measured.
+import gzip  # For reading compressed log files line by line and writing the sample file.
+import os  # For selecting the decompressor.
+import shutil  # For checking which external decompressors are installed.
+import sys  # For reading command-line arguments.
+import tempfile  # For storing the generated sample file.
+import time  # For measuring wall-clock time.
+
+# Representative sample line repeated to build a day file when none is given.
+SAMPLE_LOG = (
+    '147.83.2.10 - - [01/Mar/2023:10:15:32 +0100] "GET /handle/2117/345678 HTTP/1.1" 200 23456 '
+    '"https://www.google.com/" "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/110.0.0.0 Safari/537.36"\n'
+)
+
+def write_sample(lines: int) -> str:
+    """
+    Writes a compressed day file made of the sample line.
+
+    Args:
+        lines (int): The number of lines of the file.
+
+    Returns:
+        str: The path of the sample file.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'sample.txt.gz')
+    with gzip.open(path, mode='wt', encoding='utf-8') as file:
+        for number in range(lines):
+            file.write(SAMPLE_LOG.replace('345678', str(number)))
+    return path
+
+def read_text_mode(path: str) -> tuple[float, int]:
+    """
+    Reads a day file line by line through a gzip text wrapper, as the pipeline used to.
+
+    Args:
+        path (str): The path of the compressed day file.
+
+    Returns:
+        tuple[float, int]: The seconds spent and the number of lines read.
+    """
+    count = 0
+    start_time = time.perf_counter()
+    with gzip.open(path, mode='rt', encoding='utf-8', errors='ignore') as file:
+        for _ in file:
+            count += 1
+    return time.perf_counter() - start_time, count
+
+def read_batches(path: str, decompressor: str) -> tuple[float, int]:
+    """
+    Reads a day file in batches with `LogReader`.
+
+    Args:
+        path (str): The path of the compressed day file.
+        decompressor (str): The value of `LOGS_DECOMPRESSOR`.
+
+    Returns:
+        tuple[float, int]: The seconds spent and the number of lines read.
+    """
+    os.environ['LOGS_DECOMPRESSOR'] = decompressor
+    count = 0
+    start_time = time.perf_counter()
+    for batch in LogReader.batches(path):
+        for _ in batch:
+            count += 1
+    return time.perf_counter() - start_time, count
+
+def best_of(runs: int, read, *args) -> tuple[float, int]:
+    """
+    Repeats a read and keeps the fastest run, to reduce the noise of other processes.
+
+    Args:
+        runs (int): The number of runs.
+        read (Callable): The read function.
+        *args: The arguments of the read function.
+
+    Returns:
+        tuple[float, int]: The seconds spent by the fastest run and the number of lines read.
+    """
+    return min(read(*args) for _ in range(runs))
+
+def main():
+    """
+    Compares reading a day file through the gzip text wrapper with the batched reader and each decompressor.
+
+    With a single CPU, the batched reader decompresses inline, so only its lower per-line overhead shows.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/logs/utils/bench_log_reader.py [day_file.txt.gz] [lines]
+    """
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 2000000
+    path = sys.argv[1] if len(sys.argv) > 1 else write_sample(lines)
+
+    baseline, count = best_of(3, read_text_mode, path)
+    print(f"Lines: {count}, CPUs: {os.cpu_count()}")
+    print(f"{'gzip text':<12} {baseline:.3f} s ({count / baseline:,.0f} lines/s)")
+    for decompressor in ('zlib', 'pigz', 'gzip'):
+        if decompressor != 'zlib' and not shutil.which(decompressor):
+            print(f"{decompressor:<12} not installed")
+            continue
+        seconds, batch_count = best_of(3, read_batches, path, decompressor)
+        assert batch_count == count
+        print(f"{decompressor:<12} {seconds:.3f} s ({count / seconds:,.0f} lines/s), speedup: {baseline / seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+from lxml import etree  # For parsing the responses, as Sickle does.
+from pathlib import Path  # For reading saved responses.
+from sickle.models import Record  # The records Sickle used to build, converted by the previous parser path.
+from src.metadata.filter.record_deleted import RecordDeleted  # For skipping deleted records.
+from src.metadata.parser.dim_parser import DimParser  # The parser whose paths are compared.
+from src.metadata.utils.constants import OAI_NAMESPACE  # For finding the records and their headers.
+import random  # For generating reproducible records.
+import sys  # For reading command-line arguments.
+import time  # For measuring CPU time.
+import tracemalloc  # For measuring the peak memory allocated by Python.
+import xmltodict  # For the previous parser path.
+
+RECORDS_PER_RESPONSE = 100  # The records of each generated response, as in a UPCommons `ListRecords` page.
+DELETED_SHARE = 0.02  # The share of generated records flagged as deleted.
+
+# Fields of a generated record, with the number of times each one is repeated.
+FIELDS = [
+    ('dc', 'contributor', 'author', None, 4), ('dc', 'contributor', 'advisor', None, 1),
+    ('dc', 'date', 'accessioned', None, 1), ('dc', 'date', 'available', None, 1), ('dc', 'date', 'issued', None, 1),
+    ('dc', 'identifier', 'uri', None, 1), ('dc', 'identifier', 'doi', None, 1), ('dc', 'description', 'abstract', 'en', 1),
+    ('dc', 'description', 'abstract', 'ca', 1), ('dc', 'format', 'extent', None, 1), ('dc', 'language', 'iso', None, 1),
+    ('dc', 'publisher', None, None, 1), ('dc', 'rights', 'uri', None, 1), ('dc', 'rights', 'accessRights', None, 1),
+    ('dc', 'subject', None, 'en', 5), ('dc', 'subject', 'lcsh', 'en', 2), ('dc', 'title', None, 'ca', 1),
+    ('dc', 'type', None, None, 1), ('local', 'citation', 'author', None, 2), ('local', 'identifier', 'drac', None, 1),
+]
+WORDS = ['energia', 'aigua', 'xarxes', 'robòtica', 'materials', 'arquitectura', 'càlcul', 'estructures', 'model', 'anàlisi']
+
+def generate_response(number: int, seed: int = 0) -> bytes:
+    """
+    Generates a `ListRecords` response of DSpace METS records with their DIM metadata.
+
+    Args:
+        number (int): The number of the response, which makes its records differ from those of other responses.
+        seed (int): The seed of the random number generator.
+
+    Returns:
+        bytes: The response document.
+    """
+    rng = random.Random(f'{seed}-{number}')
+    records = []
+    for index in range(RECORDS_PER_RESPONSE):
+        handle = f'2117/{number * RECORDS_PER_RESPONSE + index}'
+        sets = ''.join(f'<setSpec>col_2117_{collection}</setSpec>' for collection in rng.sample(range(1, 400), rng.choice([1, 1, 2])))
+        if rng.random() < DELETED_SHARE:
+            records.append(
+                f'<record><header status="deleted"><identifier>oai:upcommons.upc.edu:{handle}</identifier>'
+                f'<datestamp>2023-03-01T10:00:00Z</datestamp>{sets}</header></record>'
+            )
+            continue
+        fields = []
+        for schema, element, qualifier, lang, repeat in FIELDS:
+            attributes = f'mdschema="{schema}" element="{element}"'
+            attributes += f' qualifier="{qualifier}"' if qualifier else ''
+            attributes += f' lang="{lang}"' if lang else ''
+            length = 60 if qualifier == 'abstract' else 4
+            for _ in range(repeat):
+                fields.append(f'<dim:field {attributes}>{" ".join(rng.choices(WORDS, k=length))}</dim:field>')
+        records.append(
+            f'<record><header><identifier>oai:upcommons.upc.edu:{handle}</identifier>'
+            f'<datestamp>2023-03-01T10:00:00Z</datestamp>{sets}</header>'
+            '<metadata><mets xmlns="http://www.loc.gov/METS/"><dmdSec ID="DMD_1"><mdWrap MDTYPE="OTHER"><xmlData>'
+            f'<dim:dim xmlns:dim="http://www.dspace.org/xmlns/dspace/dim">{"".join(fields)}</dim:dim>'
+            '</xmlData></mdWrap></dmdSec></mets></metadata></record>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+        '<responseDate>2023-03-01T10:00:00Z</responseDate><request verb="ListRecords">https://upcommons.upc.edu/oai/request</request>'
+        f'<ListRecords>{"".join(records)}<resumptionToken>mets////{(number + 1) * RECORDS_PER_RESPONSE}</resumptionToken>'
+        '</ListRecords></OAI-PMH>'
+    ).encode('utf-8')
+
+def parse_xmltodict(response) -> list[dict]:
+    """
+    Parses the records of a response as the harvester used to, mapping them to Sickle records and converting
+    each of them back to a string and into nested dictionaries.
+
+    Args:
+        response (etree._Element): The parsed response.
+
+    Returns:
+        list[dict]: The metadata of the records that are not deleted.
+    """
+    metadata_list = []
+    for element in response.iterfind(f'.//{OAI_NAMESPACE}record'):
+        data = xmltodict.parse(str(Record(element)))['record']
+        if RecordDeleted.filter(data):
+            continue
+        fields = data['metadata']['mets']['dmdSec']['mdWrap']['xmlData']['dim:dim']['dim:field']
+        metadata_list.append({
+            'identifier': data['header']['identifier'], 'setSpec': data['header']['setSpec'],
+            'metadata': DimParser.parse(fields)[0]
+        })
+    return metadata_list
+
+def parse_lxml(response) -> list[dict]:
+    """
+    Parses the records of a response as the harvester does, reading the header and `dim:field` elements directly.
+
+    Args:
+        response (etree._Element): The parsed response.
+
+    Returns:
+        list[dict]: The metadata of the records that are not deleted.
+    """
+    metadata_list = []
+    for element in response.iterfind(f'.//{OAI_NAMESPACE}record'):
+        header = element.find(f'{OAI_NAMESPACE}header')
+        if RecordDeleted.filter_header(header):
+            continue
+        set_specs = [set_spec.text for set_spec in header.iterfind(f'{OAI_NAMESPACE}setSpec')]
+        metadata_list.append({
+            'identifier': header.findtext(f'{OAI_NAMESPACE}identifier'),
+            'setSpec': set_specs[0] if len(set_specs) == 1 else set_specs,
+            'metadata': DimParser.parse_element(element)[0]
+        })
+    return metadata_list
+
+def measure(responses: list[bytes], parse) -> tuple[float, int, int]:
+    """
+    Parses every response and its records, keeping the records of one response at a time, as a harvest batch does.
+
+    Runs three times and keeps the fastest run; the peak memory is measured on a separate run, since tracing
+    allocations slows it down.
+
+    Args:
+        responses (list[bytes]): The response documents.
+        parse (Callable): The parser path.
+
+    Returns:
+        tuple[float, int, int]: The CPU seconds of the fastest run, the number of records parsed and the peak
+            memory allocated by Python while parsing a response, in bytes.
+    """
+    best = float('inf')
+    for _ in range(3):
+        records = 0
+        start_time = time.process_time()
+        for response in responses:
+            records += len(parse(etree.XML(response)))
+        best = min(best, time.process_time() - start_time)
+
+    peak = 0
+    for response in responses:
+        tree = etree.XML(response)
+        tracemalloc.start()
+        parse(tree)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, records, peak
+
+def main():
+    """
+    Compares the CPU time and memory of parsing harvested records through xmltodict and directly from lxml.
+
+    The responses are read from the `*.xml` files of a folder, such as saved `ListRecords` pages, or generated.
+    Both paths parse each response with lxml first, as Sickle does. The peak memory only includes Python
+    objects, not the lxml tree shared by both paths.
+
+    Usage:
+        env PYTHONPATH=.:src python benchmark/metadata/parser/bench_dim_parser.py [responses_folder | responses] [seed]
+    """
+    source = sys.argv[1] if len(sys.argv) > 1 else '50'
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    if Path(source).is_dir():
+        responses = [path.read_bytes() for path in sorted(Path(source).glob('*.xml'))]
+    else:
+        responses = [generate_response(number, seed) for number in range(int(source))]
+
+    print(f"Responses: {len(responses)}, bytes: {sum(map(len, responses)):,}")
+    assert parse_xmltodict(etree.XML(responses[0])) == parse_lxml(etree.XML(responses[0])), "The parser paths differ"
+    results = {name: measure(responses, parse) for name, parse in (('xmltodict', parse_xmltodict), ('lxml', parse_lxml))}
+    for name, (cpu_time, records, peak) in results.items():
+        print(f"{name:<10} CPU: {cpu_time:.3f} s ({records / cpu_time:,.0f} records/s), peak memory per response: {peak / 1024:,.0f} KiB")
+    print(f"CPU speedup: {results['xmltodict'][0] / results['lxml'][0]:.2f}x, "
+          f"memory reduction: {results['xmltodict'][2] / results['lxml'][2]:.2f}x")
+
+if __name__ == "__main__":
+    main()
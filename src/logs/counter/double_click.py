@@ -1,29 +1,39 @@
-from collections import defaultdict  # Import defaultdict for handling default values in dictionaries.
-from datetime import datetime, timedelta  # Import datetime and timedelta for time-based operations.
 from src.logs.filter.filter_interface import IFilter  # Import the IFilter interface from the filter module.
 from src.logs.utils.date_converter import to_timestamp  # Import the utility function to convert dates to timestamps.
+from src.logs.utils.sliding_window import SlidingWindow  # Import the sliding window that tracks recent accesses.
 
 class DoubleClick(IFilter):
     """
     A class to filter out double clicks or repeated accesses within a short time frame.
 
     Attributes:
-        recent_accesses (defaultdict): Tracks recent access times for each unique key (IP, user agent, resource).
+        WINDOW_SECONDS (int): The length of the double-click window in seconds.
+        window (SlidingWindow): Tracks the last access time for each unique key (IP, user agent, resource).
 
     Methods:
         filter(ip_address, date, time, resource, user_agent):
             Determines if the current access should be filtered as a double click.
-        _clean_old_entries(current_time):
-            Removes outdated entries from the recent accesses dictionary.
+        filter_timestamp(ip_address, timestamp, resource, user_agent):
+            Determines if an access at a UNIX timestamp should be filtered as a double click.
+        reset():
+            Forgets all recent accesses.
+        stats() -> dict:
+            Returns occupancy and memory statistics of the double-click window.
+        newest() -> int | None:
+            Returns the newest access time recorded in the double-click window.
     """
-    
-    recent_accesses = defaultdict(list)  # Tracks access times for unique keys.
+
+    WINDOW_SECONDS = 30  # COUNTER double-click window.
+    window = SlidingWindow(WINDOW_SECONDS)  # Tracks access times for unique keys.
 
     @classmethod
     def filter(cls, ip_address, date, time, resource, user_agent) -> bool:
         """
         Filters out repeated accesses (double clicks) within a 30-second window.
 
+        An access is a double click when the same IP, user agent and resource were seen less than
+        30 seconds before. Every access, double click or not, restarts the window for its key.
+
         Args:
             ip_address (str): The IP address of the user.
             date (str): The date of access in a specific format.
@@ -34,51 +44,48 @@ class DoubleClick(IFilter):
         Returns:
             bool: True if the access is considered a double click, False otherwise.
         """
-        # Convert the date and time into a timestamp.
-        timestamp = datetime.fromtimestamp(to_timestamp(date, time))
-        
-        # Create a unique key based on IP, user agent, and resource.
-        key = (ip_address, user_agent, resource)
-        
-        # Remove outdated entries from the recent accesses dictionary.
-        cls._clean_old_entries(timestamp)
-        
-        # Check if the key exists in recent accesses.
-        if key in cls.recent_accesses:
-            last_access_time = cls.recent_accesses[key][-1]  # Get the last access time for this key.
-            
-            # If the time difference is within 30 seconds, update the timestamp and return True.
-            if timestamp - last_access_time <= timedelta(seconds=30):
-                cls.recent_accesses[key][-1] = timestamp
-                return True
-        
-        # Otherwise, add the timestamp for this key and return False.
-        cls.recent_accesses[key].append(timestamp)
-        return False
+        # Record the access for the key based on IP, user agent, and resource.
+        return cls.window.hit((ip_address, user_agent, resource), to_timestamp(date, time))
 
     @classmethod
-    def _clean_old_entries(cls, current_time):
+    def filter_timestamp(cls, ip_address, timestamp, resource, user_agent) -> bool:
         """
-        Removes entries older than 30 seconds from the recent accesses dictionary.
+        Filters out repeated accesses (double clicks) like `filter`, for an access time already converted.
 
         Args:
-            current_time (datetime): The current time used as a reference to clean old entries.
+            ip_address (str): The IP address of the user.
+            timestamp (int): The access time as a UNIX timestamp.
+            resource (str): The resource being accessed.
+            user_agent (str): The user agent string of the client.
+
+        Returns:
+            bool: True if the access is considered a double click, False otherwise.
+        """
+        return cls.window.hit((ip_address, user_agent, resource), timestamp)
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Forgets all recent accesses, so that the next log starts with an empty double-click window.
+        """
+        cls.window.clear()
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns occupancy and memory statistics of the double-click window.
+
+        Returns:
+            dict: The statistics returned by `SlidingWindow.stats`.
+        """
+        return cls.window.stats()
+
+    @classmethod
+    def newest(cls) -> int | None:
+        """
+        Returns the newest access time recorded in the double-click window since the last reset.
+
+        Returns:
+            int | None: The newest access time in seconds since the epoch, or None if there was no access.
         """
-        # Calculate the threshold time for keeping entries.
-        threshold_time = current_time - timedelta(seconds=30)
-        
-        # List to track keys that need to be deleted.
-        keys_to_delete = []
-        
-        # Iterate over recent accesses and filter timestamps based on the threshold time.
-        for key, timestamps in cls.recent_accesses.items():
-            cls.recent_accesses[key] = [
-                ts for ts in timestamps if ts > threshold_time
-            ]
-            # If no timestamps remain for the key, mark it for deletion.
-            if not cls.recent_accesses[key]:
-                keys_to_delete.append(key)
-        
-        # Remove all keys marked for deletion.
-        for key in keys_to_delete:
-            del cls.recent_accesses[key]
+        return cls.window.newest()
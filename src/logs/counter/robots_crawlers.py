@@ -1,5 +1,13 @@
+from datetime import datetime, timezone  # Import datetime to record when the COUNTER Robots list was downloaded.
+from functools import lru_cache  # Import lru_cache to cache the result for repeated user agents.
+from pathlib import Path  # Import Path for handling the cache file paths.
 from src.logs.filter.filter_interface import IFilter  # Import the IFilter interface for consistency with the filtering framework.
+from src.logs.utils.aho_corasick import AhoCorasick  # Import the multi-pattern matcher used to detect bot identifiers.
+import hashlib  # Import hashlib to compute the checksum of the COUNTER Robots list.
+import json  # Import json to read and write the cache file.
+import os  # Import os for accessing environment variables.
 import requests  # Import the requests library for making HTTP requests.
+import sys  # Import sys to read command-line arguments.
 
 class RobotsCrawlers(IFilter):
     """
@@ -8,10 +16,28 @@ class RobotsCrawlers(IFilter):
     Attributes:
         custom_robots_list (list): A predefined list of known bot identifiers to check against.
         counter_robots_list (list): A dynamically downloaded list of bots from an external source.
+        robots_names (list): All bot identifiers in matching priority order.
+        matcher (AhoCorasick | None): The automaton matching all bot identifiers, built when the lists are loaded.
+        COUNTER_ROBOTS_URL (str): The URL of the COUNTER Robots list, parametrized by version (a git branch, tag or commit).
+        DEFAULT_VERSION (str): The version used when `ROBOTS_LIST_VERSION` is not set, a floating branch.
+        counter_robots_version (str | None): The version of the loaded COUNTER Robots list.
+        counter_robots_mtime (float | None): The modification time of the loaded cache file.
 
     Methods:
-        _download_robots_list():
-            Downloads the COUNTER Robots list from an external source and updates the counter_robots_list attribute.
+        load():
+            Loads the COUNTER Robots list from the local cache file and builds the matcher.
+        reload():
+            Loads the cache file again if it has changed since it was loaded.
+        refresh(version: str | None) -> Path:
+            Downloads a version of the COUNTER Robots list and stores it in the local cache.
+        _get_version() -> str:
+            Returns the COUNTER Robots list version to use.
+        _get_cache_file(version: str) -> Path:
+            Returns the path of the cache file of a version.
+        _checksum(robots: list) -> str:
+            Computes the checksum of a COUNTER Robots list.
+        _build_matcher():
+            Builds the automaton matching the custom and COUNTER bot identifiers.
         filter(user_agent: str) -> str:
             Checks if the given user agent matches any known bot identifiers and returns the matched bot name.
     """
@@ -28,46 +54,175 @@ class RobotsCrawlers(IFilter):
         "ClaudeBot", "anthropic-ai", "Claude-Web"
     ]
 
-    # An empty list to store dynamically fetched robot identifiers.
+    # COUNTER Robots list source, and the version and cache file state of the loaded list.
+    COUNTER_ROBOTS_URL = 'https://raw.githubusercontent.com/atmire/COUNTER-Robots/{version}/generated/COUNTER_Robots_list.txt'
+    DEFAULT_VERSION = 'master'
+    counter_robots_version: str | None = None
+    counter_robots_mtime: float | None = None
+
+    # An empty list to store robot identifiers loaded from the COUNTER Robots list.
     counter_robots_list = []
 
+    # Bot identifiers in priority order and the automaton matching them, built once the lists are loaded.
+    robots_names = []
+    matcher: AhoCorasick | None = None
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the COUNTER Robots list from the local cache file and builds the matcher.
+
+        The version is taken from `ROBOTS_LIST_VERSION`, or defaults to `DEFAULT_VERSION`. No network access is
+        needed when the cache file exists. If the default version has never been downloaded, it is downloaded
+        once; a pinned version must have been downloaded beforehand with `refresh`.
+
+        The default version is a branch, so it floats: two machines that download it at different times may
+        classify the same logs differently. Pin a tag or commit in `ROBOTS_LIST_VERSION` for reproducible runs.
+
+        Raises:
+            FileNotFoundError: If the cache file of a pinned version does not exist.
+            ValueError: If the cache file does not match its checksum or its version.
+        """
+        version = cls._get_version()
+        cache_file = cls._get_cache_file(version)
+        if not cache_file.exists():
+            if os.environ.get('ROBOTS_LIST_VERSION'):
+                raise FileNotFoundError(
+                    f"COUNTER Robots list {version} is not cached in {cache_file}; download it with refresh first"
+                )
+            print(f"COUNTER Robots list {version} is not pinned; set ROBOTS_LIST_VERSION for reproducible runs")
+            cls.refresh(version)
+
+        cache = json.loads(cache_file.read_text(encoding='utf-8'))
+        if cache['version'] != version:
+            raise ValueError(f"{cache_file} contains version {cache['version']} instead of {version}")
+        if cls._checksum(cache['robots']) != cache['sha256']:
+            raise ValueError(f"Checksum mismatch in {cache_file}")
+
+        cls.counter_robots_list = cache['robots']
+        cls.counter_robots_version = version
+        cls.counter_robots_mtime = cache_file.stat().st_mtime
+        cls._build_matcher()
+        print(f"Loaded COUNTER Robots list {version} ({len(cls.counter_robots_list)} robots, sha256 {cache['sha256']})")
+
+    @classmethod
+    def reload(cls):
+        """
+        Loads the cache file again if it has changed since it was loaded, so that a refreshed list is picked up
+        by a running process.
+        """
+        cache_file = cls._get_cache_file(cls._get_version())
+        if cls.matcher is None or not cache_file.exists() or cache_file.stat().st_mtime != cls.counter_robots_mtime:
+            cls.load()
+
+    @classmethod
+    def refresh(cls, version: str | None = None) -> Path:
+        """
+        Downloads a version of the COUNTER Robots list and stores it in the local cache.
+
+        Args:
+            version (str | None): The git branch, tag or commit of the list. Defaults to the configured version.
+
+        Returns:
+            Path: The path of the cache file.
+
+        Raises:
+            requests.exceptions.RequestException: If the list cannot be downloaded.
+        """
+        version = version or cls._get_version()
+        url = cls.COUNTER_ROBOTS_URL.format(version=version)
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        robots = response.text.splitlines()
+
+        cache_file = cls._get_cache_file(version)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache = {
+            'version': version,
+            'source': url,
+            'downloaded_at': datetime.now(timezone.utc).isoformat(),
+            'sha256': cls._checksum(robots),
+            'robots': robots
+        }
+        # Write to a temporary file first so that readers never see a partial cache file.
+        temporary_file = cache_file.with_suffix('.tmp')
+        temporary_file.write_text(json.dumps(cache, ensure_ascii=False, indent=4), encoding='utf-8')
+        temporary_file.replace(cache_file)
+        print(f"Downloaded COUNTER Robots list {version} ({len(robots)} robots) to {cache_file}")
+        return cache_file
+
+    @classmethod
+    def _get_version(cls) -> str:
+        """
+        Returns the COUNTER Robots list version to use.
+
+        Returns:
+            str: The version pinned in `ROBOTS_LIST_VERSION`, or `DEFAULT_VERSION`.
+        """
+        return os.environ.get('ROBOTS_LIST_VERSION') or cls.DEFAULT_VERSION
+
+    @staticmethod
+    def _get_cache_file(version: str) -> Path:
+        """
+        Returns the path of the cache file of a version.
+
+        Args:
+            version (str): The version of the COUNTER Robots list.
+
+        Returns:
+            Path: The cache file, in the directory given by `ROBOTS_LIST_PATH` (`config/robots` by default).
+        """
+        folder = Path(os.environ.get('ROBOTS_LIST_PATH') or 'config/robots')
+        return folder / f"COUNTER_Robots_list.{version.replace('/', '_')}.json"
+
+    @staticmethod
+    def _checksum(robots: list) -> str:
+        """
+        Computes the checksum of a COUNTER Robots list.
+
+        Args:
+            robots (list): The robot identifiers.
+
+        Returns:
+            str: The SHA-256 hex digest of the identifiers joined by newlines.
+        """
+        return hashlib.sha256('\n'.join(robots).encode('utf-8')).hexdigest()
+
     @classmethod
-    def _download_robots_list(cls):
+    def _build_matcher(cls):
         """
-        Downloads the COUNTER Robots list from a remote source and updates the `counter_robots_list` attribute.
-        
-        This method fetches a text file containing a list of known bot user agents and splits it into a list of strings.
+        Builds the automaton matching the custom and COUNTER bot identifiers.
+
+        Custom identifiers come first, in list order, followed by the COUNTER identifiers in reverse order,
+        so that the first identifier found in that order wins. Matching is case-insensitive.
         """
-        # Check if the list is empty to avoid redundant downloads.
-        if not cls.counter_robots_list:
-            response = requests.get(
-                'https://raw.githubusercontent.com/atmire/COUNTER-Robots/refs/heads/master/generated/COUNTER_Robots_list.txt'
-            )
-            # Populate the list with the downloaded data, splitting it by lines.
-            cls.counter_robots_list = response.text.splitlines()
+        cls.robots_names = cls.custom_robots_list + list(reversed(cls.counter_robots_list))
+        cls.matcher = AhoCorasick([bot_word.lower() for bot_word in cls.robots_names])
+        cls.filter.cache_clear()  # Results cached with previous lists are no longer valid.
 
     @classmethod
+    @lru_cache(maxsize=65536)
     def filter(cls, user_agent: str) -> str:
         """
         Filters the user agent string to determine if it belongs to a known bot or crawler.
 
+        The custom robots list has priority over the COUNTER Robots list, which is checked in reverse order.
+        The user agent is scanned once against all identifiers, and results are cached per user agent.
+
         Args:
             user_agent (str): The user agent string of the HTTP request.
 
         Returns:
             str: The name of the bot if identified; an empty string otherwise.
         """
-        # Check against the predefined custom robots list.
-        for bot_word in cls.custom_robots_list:
-            if bot_word.lower() in user_agent.lower():  # Perform case-insensitive matching.
-                return bot_word  # Return the matching bot name.
-
-        # Download the COUNTER Robots list if not already done.
-        cls._download_robots_list()
+        # Load the COUNTER Robots list and build the matcher the first time.
+        if cls.matcher is None:
+            cls.load()
 
-        # Check against the dynamically fetched robots list in reverse order.
-        for bot_word in reversed(cls.counter_robots_list):
-            if bot_word.lower() in user_agent.lower():  # Perform case-insensitive matching.
-                return bot_word  # Return the matching bot name.
+        # Find the highest-priority bot identifier in the lowercased user agent.
+        priority = cls.matcher.search(user_agent.lower())
+        return cls.robots_names[priority] if priority >= 0 else ""
 
-        return ""  # Return an empty string if no bot is identified.
+if __name__ == "__main__":
+    # Refresh the local cache of the COUNTER Robots list: python src/logs/counter/robots_crawlers.py [version]
+    RobotsCrawlers.refresh(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,11 +1,17 @@
 from requests.adapters import HTTPAdapter  # For managing retries and mounting HTTP requests.
 from src.logs.forwarder.forwarder_interface import IForwarder  # Import the abstract forwarder interface.
+from src.logs.forwarder.loki_protobuf import LokiProtobuf  # Encoder of the protobuf push format.
+from src.logs.forwarder.loki_spool import LokiSpool  # On-disk queue of payloads that could not be sent.
 from src.logs.utils.date_converter import to_nanoseconds  # Utility function to convert date and time to nanoseconds.
+from queue import Queue  # Bounded queue of payloads waiting to be shipped.
 from typing import List, Tuple, Dict  # Type hints for list, tuple, and dictionary.
 from urllib3.util.retry import Retry  # Retry mechanism for HTTP requests.
+import gzip  # For compressing push payloads.
 import json  # JSON handling for encoding logs.
 import os  # For accessing environment variables.
 import requests  # For sending HTTP requests.
+import threading  # For shipping payloads in background threads.
+import time  # For measuring batch linger and push latency.
 
 class LokiForwarder(IForwarder):
     """
@@ -14,35 +20,136 @@ class LokiForwarder(IForwarder):
     Attributes:
         loki_url (str | None): The base URL of the Loki service.
         batch (List[Tuple[Dict, str]]): A batch of logs to be forwarded.
-        BATCH_SIZE (int): The maximum number of logs in a batch before sending.
+        BATCH_SIZE (int): The default maximum number of logs in a batch before sending.
+        BATCH_BYTES (int): The default byte budget of a batch, counted on the raw log lines.
+        BATCH_LINGER (float): The default maximum number of seconds a batch waits before sending.
+        MIN_BATCH_BYTES (int): The smallest byte target the adaptive batching may shrink to.
+        MAX_BATCH_BYTES (int): The largest byte target the adaptive batching may grow to.
+        TARGET_LATENCY (float): The push latency in seconds above which the adaptive batching shrinks batches.
+        SPOOL_RETRY_INTERVAL (float): The seconds to wait after a failure before replaying the spool again.
+        max_logs (int): The configured maximum number of logs in a batch.
+        max_linger (float): The configured maximum number of seconds a batch waits before sending.
+        adaptive (bool): Whether the byte target adapts to push latency and throttling.
+        target_bytes (int | None): The current byte target of a batch, None until batching is configured.
+        batch_bytes (int): The size of the raw log lines in the current batch.
+        batch_started (float): The monotonic time at which the first log of the current batch was added.
         previous_timestamp (int): Tracks the last used timestamp in nanoseconds.
         previous_date (Tuple[str, str]): Tracks the last processed date and time.
+        skipped_runs (int): The number of runs of identical dates and times among the logs skipped since the last reset.
+        GZIP_LEVEL (int): The compression level of JSON push payloads.
+        HEADERS (Dict[str, Dict[str, str]]): The HTTP headers of the push payloads of each encoding.
+        sessions (threading.local): The pooled HTTP session of each thread, reused for every push.
+        queue (Queue | None): The bounded queue of payloads waiting for a sender thread.
+        senders (List[threading.Thread]): The background threads shipping payloads to Loki.
+        counters_lock (threading.Lock): Protects the push counters updated by the sender threads.
+        pushes (int): The number of successful pushes.
+        entries_sent (int): The number of log entries sent.
+        streams_sent (int): The number of streams sent.
+        bytes_sent (int): The number of compressed payload bytes sent.
+        failed_pushes (int): The number of payloads that could not be sent.
+        failed_entries (int): The number of log entries in payloads that could not be sent.
+        spooled_pushes (int): The number of payloads spilled to the on-disk spool.
+        spooled_entries (int): The number of log entries in payloads spilled to the spool.
+        replayed_pushes (int): The number of spooled payloads replayed to Loki.
+        replayed_entries (int): The number of spooled log entries replayed to Loki.
+        spool_retry_at (float): The monotonic time before which payloads are spilled without contacting Loki.
 
     Methods:
         forward(log: dict, raw_log: str) -> int:
             Adds a log entry to the batch and forwards it if the batch is full.
+        forward_many(records: List[Tuple[Dict, str]]) -> int:
+            Adds many log entries to the batch, forwarding it whenever it is full.
         forward_batch() -> int:
-            Processes and sends the current batch of logs to Loki.
+            Processes the current batch of logs and sends it to Loki, or hands it to the sender threads.
         close() -> None:
-            Forwards any remaining logs in the batch.
+            Forwards any remaining logs in the batch and waits until the sender threads have shipped every payload.
+        configure_batching() -> None:
+            Reads the batch limits from the environment.
+        reset(timestamps: bool) -> None:
+            Forgets the previously used timestamp and the push counters.
+        skip(log: dict) -> None:
+            Advances the timestamps as if a log had been forwarded, without sending it.
+        stats() -> dict:
+            Returns the push counters.
+        _build_streams(batch: List[Tuple[Dict, str]]) -> list:
+            Groups the log entries of a batch into streams with identical tags.
+        _get_encoding() -> str:
+            Returns the push encoding configured in `LOKI_ENCODING`.
+        _encode(streams: list, encoding: str) -> bytes:
+            Serializes and compresses the streams with the given encoding.
+        _push(payload: bytes, encoding: str, entries: int, streams: int) -> int:
+            Sends a compressed payload to Loki, or spills it to the spool, and updates the push counters.
+        _send(payload: bytes, encoding: str) -> int:
+            Posts a compressed payload to Loki.
+        _replay_spool() -> None:
+            Replays the spooled payloads and updates the replay counters.
+        _adapt_batch(latency: float, throttled: bool) -> None:
+            Adjusts the byte target from the outcome of a push.
+        _was_throttled(response: requests.Response) -> bool:
+            Tells whether Loki throttled or failed a push, including retried attempts.
+        _start_senders() -> None:
+            Starts the sender threads and their queue.
+        _get_senders() -> int:
+            Returns the number of sender threads.
+        _send_queued() -> None:
+            Sends the payloads of the queue until it receives a stop marker.
+        _get_session() -> requests.Session:
+            Returns the pooled HTTP session of the current thread, creating it if necessary.
         _set_log_tags(log: dict) -> dict:
             Generates a dictionary of tags for a log entry.
         _ensure_loki_url() -> None:
             Ensures the Loki URL is set, raising an error if not.
-        _set_timestamp(date: str, time: str) -> int:
+        _set_timestamp(date: str, time: str, timestamp: int | None = None) -> int:
             Converts a date and time to nanoseconds, ensuring unique timestamps.
     """
 
     loki_url: str | None = None  # Loki instance URL, set dynamically or from the environment.
     batch: List[Tuple[Dict, str]] = []  # A list to hold log entries and their raw strings.
     BATCH_SIZE = 500  # Maximum number of logs in a batch.
+    BATCH_BYTES = 1048576  # Byte budget of a batch, 1 MiB of raw log lines.
+    BATCH_LINGER = 5.0  # Maximum seconds a batch waits before being sent.
+    MIN_BATCH_BYTES = 65536  # Floor of the adaptive byte target, also its additive step.
+    MAX_BATCH_BYTES = 4194304  # Ceiling of the adaptive byte target, well below Loki's message size limits.
+    TARGET_LATENCY = 1.0  # Pushes slower than this shrink the adaptive byte target.
+    SPOOL_RETRY_INTERVAL = 30.0  # Seconds to wait after a failure before contacting Loki again.
+    max_logs: int = BATCH_SIZE  # Configured maximum number of logs in a batch.
+    max_linger: float = BATCH_LINGER  # Configured maximum seconds a batch waits.
+    adaptive: bool = False  # Whether the byte target adapts to push latency and throttling.
+    target_bytes: int | None = None  # Current byte target, None until the batching is configured.
+    batch_bytes: int = 0  # Size of the raw log lines in the current batch.
+    batch_started: float = 0.0  # Monotonic time at which the current batch started.
     previous_timestamp: int = 0  # Tracks the previous log's timestamp in nanoseconds.
     previous_date: Tuple[str, str] = ('', '')  # Tracks the previous log's date and time.
+    skipped_runs: int = 0  # Runs of identical dates and times among the logs skipped since the last reset.
+    GZIP_LEVEL = 1  # Fast compression; log lines compress well even at the lowest level.
+    HEADERS = {
+        'json': {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+        'protobuf': {'Content-Type': 'application/x-protobuf'}
+    }  # HTTP headers of each push encoding.
+    sessions = threading.local()  # HTTP session of each thread, kept for the whole lifetime of the forwarder.
+    queue: Queue | None = None  # Payloads waiting to be shipped, created with the sender threads.
+    senders: List[threading.Thread] = []  # Background threads shipping payloads.
+    counters_lock = threading.Lock()  # Protects the push counters.
+    pushes: int = 0  # Number of successful pushes.
+    entries_sent: int = 0  # Number of log entries sent.
+    streams_sent: int = 0  # Number of streams sent.
+    bytes_sent: int = 0  # Number of compressed payload bytes sent.
+    failed_pushes: int = 0  # Number of payloads that could not be sent.
+    failed_entries: int = 0  # Number of log entries that could not be sent.
+    spooled_pushes: int = 0  # Number of payloads spilled to disk.
+    spooled_entries: int = 0  # Number of log entries spilled to disk.
+    replayed_pushes: int = 0  # Number of spooled payloads replayed.
+    replayed_entries: int = 0  # Number of spooled log entries replayed.
+    spool_retry_at: float = 0.0  # Payloads are spilled directly until this monotonic time.
 
     @classmethod
     def forward(cls, log: dict, raw_log: str) -> int:
         """
-        Adds a log entry to the batch and sends the batch if it reaches the defined size.
+        Adds a log entry to the batch and sends the batch when it reaches the maximum number of logs,
+        the byte target, or the maximum linger time.
+
+        The linger time is checked when logs are added; a batch left behind at the end of a file is sent
+        by `close`.
 
         Args:
             log (dict): A dictionary containing structured log data.
@@ -51,66 +158,441 @@ class LokiForwarder(IForwarder):
         Returns:
             int: 0 if the batch is not full, 1 if there was an error during forwarding.
         """
+        if cls.target_bytes is None:
+            cls.configure_batching()
+        if not cls.batch:
+            cls.batch_started = time.monotonic()
+
         cls.batch.append((log, raw_log))  # Add the log entry to the batch.
-        return cls.forward_batch() if len(cls.batch) >= cls.BATCH_SIZE else 0
+        cls.batch_bytes += len(raw_log)
+        if len(cls.batch) >= cls.max_logs or cls.batch_bytes >= cls.target_bytes or \
+                time.monotonic() - cls.batch_started >= cls.max_linger:
+            return cls.forward_batch()
+        return 0
+
+    @classmethod
+    def forward_many(cls, records: List[Tuple[Dict, str]]) -> int:
+        """
+        Adds many log entries to the batch, in order, and sends the batch whenever it reaches the maximum
+        number of logs or the byte target, as `forward` does for each entry.
+
+        The linger time is checked once, after the entries are added, rather than for every entry.
+
+        Args:
+            records (List[Tuple[Dict, str]]): The structured log data and raw log string of each entry.
+
+        Returns:
+            int: 0 if every full batch was forwarded, 1 if there was an error during forwarding.
+        """
+        if not records:
+            return 0
+        if cls.target_bytes is None:
+            cls.configure_batching()
+        if not cls.batch:
+            cls.batch_started = time.monotonic()
+
+        status = 0
+        batch = cls.batch
+        max_logs, target_bytes = cls.max_logs, cls.target_bytes
+        for record in records:
+            batch.append(record)
+            cls.batch_bytes += len(record[1])
+            if len(batch) >= max_logs or cls.batch_bytes >= target_bytes:
+                status = cls.forward_batch() or status
+                batch = cls.batch
+                if not batch:
+                    cls.batch_started = time.monotonic()
+                max_logs, target_bytes = cls.max_logs, cls.target_bytes  # Adapted by the last push.
+        if batch and time.monotonic() - cls.batch_started >= cls.max_linger:
+            status = cls.forward_batch() or status
+        return status
 
     @classmethod
     def forward_batch(cls) -> int:
         """
-        Processes and sends the current batch of logs to Loki.
+        Processes the current batch of logs and sends it to Loki.
+
+        Log entries with identical tags are grouped into a single stream. The payload is gzip-compressed JSON,
+        or snappy-compressed protobuf when `LOKI_ENCODING` is set to `protobuf`.
+        By default, the payload is sent synchronously and a failed batch is kept for a retry. When
+        `LOKI_SPOOL_PATH` is set, failed payloads are spilled to disk and replayed later instead, and the payload
+        is handed to `LOKI_SENDERS` background sender threads (2 by default, 0 to send synchronously) through
+        a queue of `LOKI_QUEUE_SIZE` payloads (8 by default), so that parsing continues while batches are
+        shipped. A full queue blocks the caller until a sender frees a slot. Without a spool, a sender thread
+        could not hand a failed payload back for a retry, so `LOKI_SENDERS` is ignored.
 
         Returns:
-            int: 0 if the batch was successfully forwarded, 1 otherwise.
+            int: 0 if the batch was successfully forwarded or queued, 1 otherwise.
         """
         cls._ensure_loki_url()  # Ensure the Loki URL is set.
+        encoding = cls._get_encoding()
 
         try:
             # Create log streams with associated tags and values.
-            streams = [
-                {
-                    'stream': cls._set_log_tags(log),
-                    'values': [[
-                        str(cls._set_timestamp(log['date'], log['time'])),
-                        json.dumps({
-                            "log": raw_log,
-                            **({"recurs": log.get("resource")} if log.get("type") in ["recurs", "recurs-bitstream"] else {})
-                        })
-                    ]]
-                }
-                for log, raw_log in cls.batch
-            ]
+            streams = cls._build_streams(cls.batch)
+            payload = cls._encode(streams, encoding)
         except Exception as e:
             print(f"Error processing batch: {e}")
             return 1
 
-        # Configure HTTP session with retries.
-        session = requests.Session()
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
+        if cls.queue is None and cls._get_senders() > 0:
+            cls._start_senders()
 
-        try:
-            # Send the batch to Loki.
-            response = session.post(f"{cls.loki_url}/loki/api/v1/push", json={'streams': streams})
-            if response.status_code != 204:
-                print(f"Status code: {response.status_code}, Response: {response.content.decode('utf-8')}")
-                return 1
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending logs to Loki: {e}")
+        if cls.queue is not None:
+            cls.queue.put((payload, encoding, len(cls.batch), len(streams)))  # Blocks while the queue is full.
+        elif cls._push(payload, encoding, len(cls.batch), len(streams)):
             return 1
 
         cls.batch.clear()  # Clear the batch after successful forwarding.
+        cls.batch_bytes = 0
         return 0
 
     @classmethod
     def close(cls) -> None:
         """
-        Forwards any remaining logs in the batch before shutting down.
+        Forwards any remaining logs in the batch and waits until the sender threads have shipped every
+        queued payload, then tries once more to replay the spool and reports the payloads that could not be sent.
         """
         if cls.batch:  # Check if there are logs left in the batch.
             cls.forward_batch()
 
+        if cls.queue is not None:
+            # Stop the sender threads once the queue is drained.
+            for _ in cls.senders:
+                cls.queue.put(None)
+            for sender in cls.senders:
+                sender.join()
+            cls.queue = None
+            cls.senders = []
+
+        if cls.failed_pushes:
+            print(f"{cls.failed_pushes} payloads ({cls.failed_entries} logs) could not be sent to Loki")
+
+        if LokiSpool.pending():
+            cls._replay_spool()
+            if remaining := len(LokiSpool.pending()):
+                print(f"{remaining} payloads remain in the Loki spool {LokiSpool._get_folder()}, "
+                      f"replay them with: python src/logs/forwarder/loki_spool.py")
+
+    @classmethod
+    def configure_batching(cls) -> None:
+        """
+        Reads the batch limits from the environment.
+
+        A batch is sent when it holds `LOKI_BATCH_SIZE` logs (500 by default), when its raw log lines add up
+        to `LOKI_BATCH_BYTES` bytes (1 MiB by default), or when its first log was added `LOKI_BATCH_LINGER`
+        seconds ago (5 by default). With `LOKI_ADAPTIVE_BATCH=1`, the byte target starts at `LOKI_BATCH_BYTES`
+        and adapts to Loki: it grows additively after fast pushes and halves after pushes slower than
+        `TARGET_LATENCY` or throttled with 429 and 5xx responses, within `MIN_BATCH_BYTES` and `MAX_BATCH_BYTES`.
+        """
+        cls.max_logs = int(os.environ.get('LOKI_BATCH_SIZE') or cls.BATCH_SIZE)
+        cls.max_linger = float(os.environ.get('LOKI_BATCH_LINGER') or cls.BATCH_LINGER)
+        cls.adaptive = os.environ.get('LOKI_ADAPTIVE_BATCH') == '1'
+        cls.target_bytes = int(os.environ.get('LOKI_BATCH_BYTES') or cls.BATCH_BYTES)
+
+    @classmethod
+    def reset(cls, timestamps: bool = True) -> None:
+        """
+        Forgets the previously used timestamp, so that timestamps no longer depend on earlier logs,
+        and resets the push counters.
+
+        Logs waiting in the batch are kept so that a failed batch can still be retried.
+
+        Args:
+            timestamps (bool): Whether to forget the previously used timestamp, or only reset the push counters.
+        """
+        if timestamps:
+            cls.previous_timestamp = 0
+            cls.previous_date = ('', '')
+            cls.skipped_runs = 0
+        cls.pushes = cls.entries_sent = cls.streams_sent = cls.bytes_sent = 0
+        cls.failed_pushes = cls.failed_entries = 0
+        cls.spooled_pushes = cls.spooled_entries = cls.replayed_pushes = cls.replayed_entries = 0
+
+    @classmethod
+    def skip(cls, log: dict) -> None:
+        """
+        Advances the timestamps as if a log had been forwarded, without sending it.
+
+        Replaying the logs that precede a line range this way gives the first logs of the range the same
+        timestamps as in a serial run, provided the last run of identical dates and times started among the
+        replayed logs, that is, when `skipped_runs` is at least 2.
+
+        Args:
+            log (dict): A dictionary containing structured log data.
+        """
+        if (log['date'], log['time']) != cls.previous_date:
+            cls.skipped_runs += 1
+        cls._set_timestamp(log['date'], log['time'], log.get('timestamp'))
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns the push counters.
+
+        Returns:
+            dict: The number of pushes, entries, streams and compressed bytes sent, the average number
+                of streams per push, the number of failed, spooled and replayed pushes and entries, and the
+                current byte target.
+        """
+        return {
+            'pushes': cls.pushes,
+            'entries': cls.entries_sent,
+            'streams': cls.streams_sent,
+            'bytes_sent': cls.bytes_sent,
+            'streams_per_push': round(cls.streams_sent / cls.pushes, 2) if cls.pushes else 0,
+            'failed_pushes': cls.failed_pushes,
+            'failed_entries': cls.failed_entries,
+            'spooled_pushes': cls.spooled_pushes,
+            'spooled_entries': cls.spooled_entries,
+            'replayed_pushes': cls.replayed_pushes,
+            'replayed_entries': cls.replayed_entries,
+            'target_bytes': cls.target_bytes
+        }
+
+    @classmethod
+    def _build_streams(cls, batch: List[Tuple[Dict, str]]) -> list:
+        """
+        Groups the log entries of a batch into streams with identical tags.
+
+        Entries keep their batch order inside each stream, and timestamps are assigned in batch order.
+
+        Args:
+            batch (List[Tuple[Dict, str]]): The log entries and their raw strings.
+
+        Returns:
+            list: The Loki streams, each with its tags and values.
+        """
+        streams = {}
+        for log, raw_log in batch:
+            tags = cls._set_log_tags(log)
+            key = tuple(tags.items())
+            try:
+                stream = streams.get(key)
+            except TypeError:
+                key = repr(key)  # Tags with unhashable values are grouped by their representation.
+                stream = streams.get(key)
+            if stream is None:
+                stream = streams[key] = {'stream': tags, 'values': []}
+            stream['values'].append([
+                str(cls._set_timestamp(log['date'], log['time'], log.get('timestamp'))),
+                json.dumps({
+                    "log": raw_log,
+                    **({"recurs": log.get("resource")} if log.get("type") in ["recurs", "recurs-bitstream"] else {})
+                })
+            ])
+        return list(streams.values())
+
+    @classmethod
+    def _get_encoding(cls) -> str:
+        """
+        Returns the push encoding configured in `LOKI_ENCODING`, `json` by default.
+
+        Returns:
+            str: `json` or `protobuf`.
+
+        Raises:
+            ValueError: If the encoding is not supported.
+            ImportError: If the protobuf encoding is selected and python-snappy is not installed.
+        """
+        encoding = os.environ.get('LOKI_ENCODING') or 'json'
+        if encoding not in cls.HEADERS:
+            raise ValueError(f"Unsupported LOKI_ENCODING '{encoding}', expected 'json' or 'protobuf'.")
+        if encoding == 'protobuf':
+            LokiProtobuf.ensure_available()
+        return encoding
+
+    @classmethod
+    def _encode(cls, streams: list, encoding: str) -> bytes:
+        """
+        Serializes and compresses the streams with the given encoding.
+
+        Args:
+            streams (list): The Loki streams, each with its tags and values.
+            encoding (str): `json` for a gzip-compressed JSON payload, `protobuf` for a snappy-compressed
+                `PushRequest` message.
+
+        Returns:
+            bytes: The push payload.
+        """
+        if encoding == 'protobuf':
+            return LokiProtobuf.encode(streams)
+        return gzip.compress(json.dumps({'streams': streams}).encode('utf-8'), compresslevel=cls.GZIP_LEVEL)
+
+    @classmethod
+    def _push(cls, payload: bytes, encoding: str, entries: int, streams: int) -> int:
+        """
+        Sends a compressed payload to Loki and updates the push counters.
+
+        When `LOKI_SPOOL_PATH` is set, spooled payloads are replayed before the new one, so that Loki
+        receives them in order. The payload is spilled to the spool instead of being sent while any spooled
+        payload has not reached Loki, including those another sender thread or process is replaying, and also
+        if sending it fails. After a failure, payloads are spilled without contacting
+        Loki for `SPOOL_RETRY_INTERVAL` seconds, so that an outage does not stall parsing on every batch.
+
+        Args:
+            payload (bytes): The compressed push request.
+            encoding (str): The encoding of the payload, which selects its HTTP headers.
+            entries (int): The number of log entries in the payload.
+            streams (int): The number of streams in the payload.
+
+        Returns:
+            int: 0 if the payload was accepted by Loki or spilled to the spool, 1 otherwise.
+        """
+        spool = LokiSpool.enabled()
+        if spool and LokiSpool.pending() and time.monotonic() >= cls.spool_retry_at:
+            cls._replay_spool()
+        status = 1 if spool and LokiSpool.pending(claimed=True) else cls._send(payload, encoding)
+        if status and spool:
+            LokiSpool.spill(payload, encoding, entries, streams)
+            cls.spool_retry_at = time.monotonic() + cls.SPOOL_RETRY_INTERVAL
+
+        # Update the push counters.
+        with cls.counters_lock:
+            if status and spool:
+                cls.spooled_pushes += 1
+                cls.spooled_entries += entries
+            elif status:
+                cls.failed_pushes += 1
+                cls.failed_entries += entries
+            else:
+                cls.pushes += 1
+                cls.entries_sent += entries
+                cls.streams_sent += streams
+                cls.bytes_sent += len(payload)
+        return 0 if spool else status
+
+    @classmethod
+    def _send(cls, payload: bytes, encoding: str) -> int:
+        """
+        Posts a compressed payload to Loki, adapting the batch target to the outcome when enabled.
+
+        Args:
+            payload (bytes): The compressed push request.
+            encoding (str): The encoding of the payload, which selects its HTTP headers.
+
+        Returns:
+            int: 0 if the payload was accepted by Loki, 1 otherwise.
+        """
+        start_time = time.monotonic()
+        try:
+            # Send the payload to Loki.
+            response = cls._get_session().post(
+                f"{cls.loki_url}/loki/api/v1/push",
+                data=payload,
+                headers=cls.HEADERS[encoding]
+            )
+            if response.status_code != 204:
+                print(f"Status code: {response.status_code}, Response: {response.content.decode('utf-8')}")
+                status = 1
+            else:
+                status = 0
+            throttled = cls._was_throttled(response)
+        except requests.exceptions.RequestException as e:
+            print(f"Error sending logs to Loki: {e}")
+            status = 1
+            throttled = True
+
+        if cls.adaptive:
+            cls._adapt_batch(time.monotonic() - start_time, throttled)
+        return status
+
+    @classmethod
+    def _replay_spool(cls) -> None:
+        """
+        Replays the spooled payloads in order and updates the replay counters.
+
+        If the replay stops early, the next one waits for `SPOOL_RETRY_INTERVAL` seconds.
+        """
+        payloads, entries = LokiSpool.replay(cls._send)
+        if LokiSpool.pending():
+            cls.spool_retry_at = time.monotonic() + cls.SPOOL_RETRY_INTERVAL
+        with cls.counters_lock:
+            cls.replayed_pushes += payloads
+            cls.replayed_entries += entries
+
+    @classmethod
+    def _adapt_batch(cls, latency: float, throttled: bool) -> None:
+        """
+        Adjusts the byte target from the outcome of a push (additive increase, multiplicative decrease).
+
+        Args:
+            latency (float): The push duration in seconds, including retries.
+            throttled (bool): Whether Loki throttled or failed the push.
+        """
+        with cls.counters_lock:
+            if throttled or latency > cls.TARGET_LATENCY:
+                cls.target_bytes = max(cls.MIN_BATCH_BYTES, cls.target_bytes // 2)
+            else:
+                cls.target_bytes = min(cls.MAX_BATCH_BYTES, cls.target_bytes + cls.MIN_BATCH_BYTES)
+
+    @staticmethod
+    def _was_throttled(response: requests.Response) -> bool:
+        """
+        Tells whether Loki throttled or failed a push, including attempts that were retried.
+
+        Args:
+            response (requests.Response): The final response of the push.
+
+        Returns:
+            bool: True if the push or one of its retried attempts got a 429 or 5xx response.
+        """
+        retries = getattr(response.raw, 'retries', None)
+        statuses = [attempt.status for attempt in retries.history] if retries else []
+        statuses.append(response.status_code)
+        return any(status and (status == 429 or status >= 500) for status in statuses)
+
+    @classmethod
+    def _start_senders(cls) -> None:
+        """
+        Starts the sender threads and the bounded queue feeding them.
+        """
+        cls.queue = Queue(maxsize=int(os.environ.get('LOKI_QUEUE_SIZE', 8)))
+        cls.senders = [
+            threading.Thread(target=cls._send_queued, name=f"loki-sender-{index}", daemon=True)
+            for index in range(cls._get_senders())
+        ]
+        for sender in cls.senders:
+            sender.start()
+
+    @staticmethod
+    def _get_senders() -> int:
+        """
+        Returns the number of sender threads, which are only used when failed payloads can be spooled.
+
+        Returns:
+            int: `LOKI_SENDERS` (2 by default) when `LOKI_SPOOL_PATH` is set, 0 otherwise.
+        """
+        return int(os.environ.get('LOKI_SENDERS') or 2) if LokiSpool.enabled() else 0
+
+    @classmethod
+    def _send_queued(cls) -> None:
+        """
+        Sends the payloads of the queue until it receives a stop marker.
+        """
+        queue = cls.queue
+        while (item := queue.get()) is not None:
+            cls._push(*item)
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """
+        Returns the pooled HTTP session of the current thread, creating it with retries if necessary.
+
+        Returns:
+            requests.Session: The HTTP session used for every push of the current thread.
+        """
+        session = getattr(cls.sessions, 'session', None)
+        if session is None:
+            # Configure HTTP session with retries.
+            session = cls.sessions.session = requests.Session()
+            retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                            allowed_methods=None)
+            adapter = HTTPAdapter(max_retries=retries)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
     @staticmethod
     def _set_log_tags(log: dict) -> dict:
         """
@@ -152,13 +634,14 @@ class LokiForwarder(IForwarder):
                 ValueError("LOKI_URL environment variable is not set")
 
     @classmethod
-    def _set_timestamp(cls, date: str, time: str) -> int:
+    def _set_timestamp(cls, date: str, time: str, timestamp: int | None = None) -> int:
         """
         Converts a date and time to nanoseconds, ensuring unique timestamps.
 
         Args:
             date (str): The date string.
             time (str): The time string.
+            timestamp (int | None): The date and time already converted to a UNIX timestamp in seconds, if any.
 
         Returns:
             int: A timestamp in nanoseconds.
@@ -166,6 +649,7 @@ class LokiForwarder(IForwarder):
         if (date, time) == cls.previous_date:
             cls.previous_timestamp += 1  # Increment the timestamp to ensure uniqueness.
         else:
-            cls.previous_timestamp = to_nanoseconds(date, time)  # Convert to nanoseconds.
+            # Convert to nanoseconds, unless the log already carries its timestamp.
+            cls.previous_timestamp = to_nanoseconds(date, time) if timestamp is None else timestamp * 1000000000
             cls.previous_date = (date, time)  # Update the previous date and time.
         return cls.previous_timestamp
@@ -0,0 +1,136 @@
+from functools import lru_cache  # Cache of the encoded varints, which repeat across entries.
+try:
+    import snappy  # Snappy block compression required by the Loki protobuf push format.
+except ImportError:
+    snappy = None
+
+class LokiProtobuf:
+    """
+    A class for encoding Loki streams in the native protobuf push format.
+
+    The payload is a `logproto.PushRequest` message, encoded by hand so that no generated protobuf code is
+    needed, and compressed with snappy block compression as expected by `/loki/api/v1/push` when the
+    content type is `application/x-protobuf`.
+
+    Methods:
+        ensure_available() -> None:
+            Ensures the snappy compression library is installed.
+        encode(streams: list) -> bytes:
+            Encodes and compresses the streams built by `LokiForwarder` as a push request.
+        _encode_stream(stream: dict) -> bytes:
+            Encodes a stream as a `StreamAdapter` message.
+        _encode_labels(tags: dict) -> str:
+            Formats the tags of a stream as a label selector.
+        _field(number: int, value: bytes) -> bytes:
+            Encodes a length-delimited field.
+        _varint(value: int) -> bytes:
+            Encodes an unsigned integer as a protobuf varint.
+    """
+
+    @staticmethod
+    def ensure_available() -> None:
+        """
+        Ensures the snappy compression library is installed.
+
+        Raises:
+            ImportError: If the python-snappy package is not installed.
+        """
+        if snappy is None:
+            raise ImportError("The python-snappy package is required to push logs to Loki with protobuf encoding.")
+
+    @classmethod
+    def encode(cls, streams: list) -> bytes:
+        """
+        Encodes and compresses the streams built by `LokiForwarder` as a `PushRequest` message.
+
+        Args:
+            streams (list): The Loki streams, each with its tags and values.
+
+        Returns:
+            bytes: The snappy-compressed protobuf payload.
+
+        Raises:
+            ImportError: If the python-snappy package is not installed.
+        """
+        cls.ensure_available()
+        message = b''.join(cls._field(1, cls._encode_stream(stream)) for stream in streams)
+        return snappy.compress(message)
+
+    @classmethod
+    def _encode_stream(cls, stream: dict) -> bytes:
+        """
+        Encodes a stream as a `StreamAdapter` message with its labels and entries.
+
+        Each entry is an `EntryAdapter` message holding a `google.protobuf.Timestamp` and the log line.
+
+        Args:
+            stream (dict): A Loki stream with its tags and values.
+
+        Returns:
+            bytes: The encoded stream.
+        """
+        varint = cls._varint
+        encoded = bytearray(cls._field(1, cls._encode_labels(stream['stream']).encode('utf-8')))
+        for timestamp, line in stream['values']:
+            seconds, nanos = divmod(int(timestamp), 1_000_000_000)
+            timestamp = b'\x08' + varint(seconds)
+            if nanos:
+                timestamp += b'\x10' + varint(nanos)
+            line = line.encode('utf-8')
+            # The encoded timestamp is at most 12 bytes long, so its length is a single byte.
+            entry = b'\x0a' + bytes((len(timestamp),)) + timestamp + b'\x12' + varint(len(line)) + line
+            encoded += b'\x12' + varint(len(entry))
+            encoded += entry
+        return bytes(encoded)
+
+    @staticmethod
+    def _encode_labels(tags: dict) -> str:
+        """
+        Formats the tags of a stream as a label selector, such as `{content="error", service_name="log"}`.
+
+        Args:
+            tags (dict): The tags of the stream.
+
+        Returns:
+            str: The label selector, with sorted names and escaped values.
+        """
+        labels = []
+        for name, value in sorted(tags.items()):
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            labels.append(f'{name}="{value}"')
+        return '{' + ', '.join(labels) + '}'
+
+    @classmethod
+    def _field(cls, number: int, value: bytes) -> bytes:
+        """
+        Encodes a length-delimited field (strings, bytes and embedded messages).
+
+        Args:
+            number (int): The field number.
+            value (bytes): The encoded value.
+
+        Returns:
+            bytes: The field key, the value length and the value.
+        """
+        return cls._varint(number << 3 | 2) + cls._varint(len(value)) + value
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _varint(value: int) -> bytes:
+        """
+        Encodes an unsigned integer as a protobuf varint.
+
+        Args:
+            value (int): The integer to encode.
+
+        Returns:
+            bytes: The varint, least significant group first.
+        """
+        if value < 0x80:
+            return bytes((value,))
+        encoded = bytearray()
+        while value >= 0x80:
+            encoded.append(value & 0x7F | 0x80)
+            value >>= 7
+        encoded.append(value)
+        return bytes(encoded)
@@ -0,0 +1,177 @@
+from pathlib import Path  # For handling filesystem paths.
+from typing import Callable, List, Tuple  # Type hints for callables, lists and tuples.
+import os  # For accessing environment variables and the process id.
+import sys  # For the exit status of the standalone replay.
+import threading  # For serializing replays within a process.
+import time  # For ordering spooled payloads by creation time.
+
+class LokiSpool:
+    """
+    A class for spilling Loki payloads that could not be sent to an on-disk queue and replaying them later.
+
+    Each payload is stored, already compressed, in its own file of the `LOKI_SPOOL_PATH` folder. File names
+    start with the creation time, so that sorting them gives the spill order, and also record the process id,
+    the number of entries and streams, and the payload encoding as the extension. Files are written through a
+    temporary name, and a replay claims each file by renaming it, so that several processes can share the
+    same folder.
+
+    Attributes:
+        replay_lock (threading.Lock): Ensures only one thread of the process replays the spool at a time.
+
+    Methods:
+        enabled() -> bool:
+            Tells whether a spool folder is configured.
+        spill(payload: bytes, encoding: str, entries: int, streams: int) -> Path:
+            Stores a payload at the end of the spool.
+        pending(claimed: bool = False) -> List[Path]:
+            Returns the spooled payloads in spill order.
+        replay(send: Callable[[bytes, str], int]) -> Tuple[int, int]:
+            Sends the spooled payloads in order until one fails.
+        recover() -> int:
+            Returns the payloads claimed by interrupted replays to the spool.
+        _get_folder() -> Path:
+            Returns the spool folder.
+        _parse_name(path: Path) -> Tuple[str, int, int]:
+            Extracts the encoding and the number of entries and streams from a spool file name.
+    """
+
+    replay_lock = threading.Lock()  # Held while a thread of this process replays the spool.
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        Tells whether a spool folder is configured in `LOKI_SPOOL_PATH`.
+
+        Returns:
+            bool: True if failed payloads are spilled to disk, False otherwise.
+        """
+        return bool(os.environ.get('LOKI_SPOOL_PATH'))
+
+    @classmethod
+    def spill(cls, payload: bytes, encoding: str, entries: int, streams: int) -> Path:
+        """
+        Stores a payload at the end of the spool.
+
+        Args:
+            payload (bytes): The compressed push request.
+            encoding (str): The encoding of the payload, `json` or `protobuf`.
+            entries (int): The number of log entries in the payload.
+            streams (int): The number of streams in the payload.
+
+        Returns:
+            Path: The path of the spool file.
+        """
+        folder = cls._get_folder()
+        folder.mkdir(parents=True, exist_ok=True)
+        spool_file = folder / f"{time.time_ns():020d}-{os.getpid()}-{entries}-{streams}.{encoding}"
+        # Write to a temporary file first so that a replay never reads a partial payload.
+        temporary_file = spool_file.with_name(spool_file.name + '.tmp')
+        temporary_file.write_bytes(payload)
+        temporary_file.replace(spool_file)
+        return spool_file
+
+    @classmethod
+    def pending(cls, claimed: bool = False) -> List[Path]:
+        """
+        Returns the spooled payloads in spill order.
+
+        Args:
+            claimed (bool): Whether to include the payloads claimed by a replay in progress, which have not
+                reached Loki yet either.
+
+        Returns:
+            List[Path]: The spool files waiting to be replayed, and those being replayed if `claimed` is set.
+        """
+        folder = cls._get_folder()
+        if not cls.enabled() or not folder.is_dir():
+            return []
+        suffixes = ('.json', '.protobuf', '.sending') if claimed else ('.json', '.protobuf')
+        return sorted(path for path in folder.iterdir() if path.suffix in suffixes)
+
+    @classmethod
+    def replay(cls, send: Callable[[bytes, str], int]) -> Tuple[int, int]:
+        """
+        Sends the spooled payloads in spill order, stopping at the first one that fails.
+
+        If another thread of the process is already replaying, the call returns immediately. A payload that
+        fails stays in the spool, so that it is replayed first the next time.
+
+        Args:
+            send (Callable[[bytes, str], int]): Sends a payload with its encoding, returning 0 on success.
+
+        Returns:
+            Tuple[int, int]: The number of payloads and log entries replayed.
+        """
+        if not cls.replay_lock.acquire(blocking=False):
+            return 0, 0
+        payloads = entries = 0
+        try:
+            for spool_file in cls.pending():
+                # Claim the file, so that other processes sharing the spool skip it.
+                claimed_file = spool_file.with_name(spool_file.name + '.sending')
+                try:
+                    spool_file.rename(claimed_file)
+                except FileNotFoundError:
+                    continue
+                encoding, file_entries, _ = cls._parse_name(spool_file)
+                if send(claimed_file.read_bytes(), encoding):
+                    claimed_file.rename(spool_file)  # Give the payload back for the next replay.
+                    break
+                claimed_file.unlink()
+                payloads += 1
+                entries += file_entries
+        finally:
+            cls.replay_lock.release()
+        return payloads, entries
+
+    @classmethod
+    def recover(cls) -> int:
+        """
+        Returns the payloads claimed by interrupted replays to the spool.
+
+        This must only be called when no other process is replaying the spool.
+
+        Returns:
+            int: The number of payloads recovered.
+        """
+        folder = cls._get_folder()
+        claimed_files = list(folder.glob('*.sending')) if cls.enabled() and folder.is_dir() else []
+        for claimed_file in claimed_files:
+            claimed_file.rename(claimed_file.with_suffix(''))
+        return len(claimed_files)
+
+    @staticmethod
+    def _get_folder() -> Path:
+        """
+        Returns the spool folder configured in `LOKI_SPOOL_PATH`.
+
+        Returns:
+            Path: The spool folder.
+        """
+        return Path(os.environ.get('LOKI_SPOOL_PATH', '').strip())
+
+    @staticmethod
+    def _parse_name(path: Path) -> Tuple[str, int, int]:
+        """
+        Extracts the encoding and the number of entries and streams from a spool file name.
+
+        Args:
+            path (Path): The spool file.
+
+        Returns:
+            Tuple[str, int, int]: The payload encoding and its number of entries and streams.
+        """
+        _, _, entries, streams = path.stem.split('-')
+        return path.suffix[1:], int(entries), int(streams)
+
+if __name__ == "__main__":
+    # Replay the spooled payloads once Loki is back: python src/logs/forwarder/loki_spool.py
+    from src.logs.forwarder.loki_forwarder import LokiForwarder
+    LokiForwarder._ensure_loki_url()
+    recovered = LokiSpool.recover()
+    if recovered:
+        print(f"Recovered {recovered} payloads from interrupted replays")
+    payloads, entries = LokiSpool.replay(LokiForwarder._send)
+    remaining = len(LokiSpool.pending())
+    print(f"Replayed {payloads} payloads ({entries} logs) to Loki, {remaining} payloads remain in the spool")
+    sys.exit(1 if remaining else 0)
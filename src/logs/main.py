@@ -2,138 +2,431 @@ from pathlib import Path  # For handling filesystem paths.
 from src.logs.counter.double_click import DoubleClick  # Import double-click counter logic.
 from src.logs.counter.robots_crawlers import RobotsCrawlers  # Import robot/crawler detection logic.
 from src.logs.counter.status_code import StatusCode  # Import HTTP status code counter logic.
-from src.logs.filter.access_bitstream import AccessBitstream  # Filter for bitstream-related logs.
-from src.logs.filter.access_resource import AccessResource  # Filter for general resource-related logs.
-from src.logs.filter.access_resource_bitstream import AccessResourceBitstream  # Filter for resource-bitstream logs.
-from src.logs.filter.search_resource import SearchResource  # Filter for search-related resources.
-from src.logs.filter.web_resource import WebResource  # Filter for web resources.
 from src.logs.filter.with_ipv6address import WithIPv6Address  # Filter for logs containing IPv6 addresses.
 from src.logs.filter.without_ipaddress import WithoutIpAddress  # Filter for logs without IP addresses.
 from src.logs.forwarder.loki_forwarder import LokiForwarder  # Log forwarder for Loki.
-from src.logs.transformer.add_bitstream_resource_id_label import AddBitstreamResourceIdLabel  # Adds bitstream resource labels.
 from src.logs.transformer.add_default_ipaddress import AddDefaultIpAddress  # Adds default IP addresses.
 from src.logs.transformer.add_label import AddLabel  # Generic label-adding logic.
 from src.logs.transformer.add_log_metadata import AddLogMetadata  # Adds metadata to logs.
-from src.logs.transformer.add_resource_id_label import AddResourceIdLabel  # Adds resource ID labels.
 from src.logs.transformer.add_timestamp import AddTimestamp  # Adds timestamps to logs.
 from src.logs.transformer.remove_ipv6address import RemoveIPv6Address  # Removes IPv6 addresses from logs.
 from src.logs.transformer.to_json import ToJSON  # Transforms raw logs into JSON format.
 from src.logs.utils.constants import LABEL_CONTENT, LABEL_CONTENT_OK, LABEL_CONTENT_ERROR, LABEL_CONTENT_DIFFERENT
 from src.logs.utils.constants import LABEL_TYPE, LABEL_TYPE_OTHERS, LABEL_TYPE_SEARCH, LABEL_TYPE_RESOURCE, LABEL_TYPE_RESOURCE_BITSTREAM, LABEL_TYPE_BITSTREAM, LABEL_TYPE_RESOURCE_WEB
+from src.logs.utils.columnar_engine import ColumnarEngine  # Counts logs with vectorized PyArrow kernels.
+from src.logs.utils.date_converter import to_timestamp  # Converts access times to UNIX timestamps.
 from src.logs.utils.constants import LABEL_VALUE
-from src.logs.utils.constants import LOG_COUNTER, LOG_COUNTER_STATUS_CODE, LOG_COUNTER_DOUBLE_CLICK, LOG_COUNTER_ROBOTS_CRAWLERS, LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN
-import gzip  # For reading compressed log files.
+from src.logs.utils.constants import LOG_COUNTER_STATUS_CODE, LOG_COUNTER_DOUBLE_CLICK, LOG_COUNTER_ROBOTS_CRAWLERS, LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN
+from src.logs.utils.log_index import LogIndex  # Splits large day files into line ranges.
+from src.logs.utils.log_reader import LogReader  # Streams the lines of compressed log files in batches.
+from src.logs.utils.resource_classifier import ResourceClassifier  # Classifies resources in a single scan.
+from collections import deque  # For keeping the last seconds of logs of a day.
+from concurrent.futures import ProcessPoolExecutor  # For processing day files in parallel worker processes.
+from datetime import date, timedelta  # For finding the day before a day file.
 import json  # For handling JSON serialization.
 import os  # For accessing environment variables.
 import time  # For measuring execution time.
 
-def process_log(line: str) -> dict:
+UNSENT_LOGS = 'unsent_logs'  # Key of the logs a worker process could not forward, in the statistics of a day.
+
+def new_counters() -> dict:
+    """
+    Creates the counters of a day, or of a line range of it, with the same keys as the monthly statistics.
+
+    Returns:
+        dict: The counters, all set to zero.
+    """
+    return {
+        LOG_COUNTER_STATUS_CODE: 0,
+        LOG_COUNTER_DOUBLE_CLICK: 0,
+        LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN: {},
+        LABEL_TYPE_RESOURCE: 0,
+        LABEL_TYPE_SEARCH: 0,
+        LABEL_TYPE_RESOURCE_WEB: 0,
+        LABEL_TYPE_RESOURCE_BITSTREAM: 0,
+        LABEL_TYPE_BITSTREAM: 0,
+        LABEL_TYPE_OTHERS: 0,
+        LABEL_CONTENT_ERROR: 0
+    }
+
+def process_batch(lines: list, counters: dict | None = None, enrich: bool = True) -> tuple:
     """
-    Processes a single log entry and extracts relevant information.
+    Processes a batch of raw log entries stage by stage and counts them.
+
+    The addresses of the whole batch are normalized first, then every line is parsed. The parsed logs then go
+    through the counters and `ResourceClassifier` in line order, since the double-click window depends on it.
+    Each line is counted once in `counters`, and the logs to forward are returned in line order, so that they
+    can be handed to the forwarder in bulk with `forward_records`.
 
     Args:
-        line (str): The raw log entry as a string.
+        lines (list[str]): The raw log entries.
+        counters (dict | None): The counters to update, as created by `new_counters`, or None for new ones.
+        enrich (bool): Whether to add resource metadata to the logs, which is skipped when replaying logs.
 
     Returns:
-        dict: A dictionary containing extracted log data or processing statistics.
+        tuple: The logs to forward, as (structured log, raw log entry) pairs, and the counters.
     """
-    stats = {}
+    if counters is None:
+        counters = new_counters()
+
     # Handle missing or IPv6 addresses.
-    if WithoutIpAddress.filter(line):
-        line = AddDefaultIpAddress.transform(line)
-    elif WithIPv6Address.filter(line):
-        line = RemoveIPv6Address.transform(line)
-    
-    try:
-        # Attempt to parse the log into JSON format.
-        log, status = ToJSON.transform(line)
-        ip_address = log['ip_address']
-        date = log['date']
-        time = log['time']
-        resource = log['request']['resource']
-        status_code = int(log['request']['status_code'])
-        user_agent = log['user_agent']
-    except Exception as e:
-        # Handle parsing errors.
-        log = {LABEL_VALUE: line, LABEL_CONTENT: LABEL_CONTENT_ERROR}
+    without_ip_address, add_default_ip_address = WithoutIpAddress.filter, AddDefaultIpAddress.transform
+    with_ipv6_address, remove_ipv6_address = WithIPv6Address.filter, RemoveIPv6Address.transform
+    lines = [
+        add_default_ip_address(line) if without_ip_address(line) else
+        remove_ipv6_address(line) if with_ipv6_address(line) else line
+        for line in lines
+    ]
+
+    # Parse the logs into JSON format; None marks a line that could not be parsed.
+    to_json = ToJSON.transform
+    parsed = []
+    for line in lines:
         try:
-            AddTimestamp.transform(log, line)
-            LokiForwarder.forward(log, line)
-        except Exception as inner_e:
-            print(f"Error forwarding log: {inner_e}")
-        stats[LABEL_CONTENT] = LABEL_CONTENT_ERROR
-        return stats
-    
-    # Process based on extracted log details.
-    if StatusCode.filter(status_code):
-        stats[LOG_COUNTER] = LOG_COUNTER_STATUS_CODE
-        return stats
-    if DoubleClick.filter(ip_address, date, time, resource, user_agent):
-        stats[LOG_COUNTER] = LOG_COUNTER_DOUBLE_CLICK
-        return stats
-    robot_name = RobotsCrawlers.filter(user_agent)
-    if robot_name:
-        stats[LOG_COUNTER] = LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN
-        stats['robot_name'] = robot_name
-        return stats
-
-    # Add labels and metadata based on resource type.
-    AddLabel.transform(log, LABEL_CONTENT, LABEL_CONTENT_OK if status == 0 else LABEL_CONTENT_DIFFERENT)
-    if AccessResource.filter(resource):
-        AddResourceIdLabel.transform(log, resource)
-        AddLabel.transform(log, LABEL_TYPE, LABEL_TYPE_RESOURCE)
-        AddLogMetadata.transform(log, log["resource"])
-        stats[LABEL_TYPE] = LABEL_TYPE_RESOURCE
-    elif AccessResourceBitstream.filter(resource):
-        AddBitstreamResourceIdLabel.transform(log, resource)
-        AddLabel.transform(log, LABEL_TYPE, LABEL_TYPE_RESOURCE_BITSTREAM)
-        AddLogMetadata.transform(log, log["resource"])
-        stats[LABEL_TYPE] = LABEL_TYPE_RESOURCE_BITSTREAM
-    elif AccessBitstream.filter(resource):
-        AddLabel.transform(log, LABEL_TYPE, LABEL_TYPE_BITSTREAM)
-        stats[LABEL_TYPE] = LABEL_TYPE_BITSTREAM
-    elif WebResource.filter(resource):
-        stats[LABEL_TYPE] = LABEL_TYPE_RESOURCE_WEB
-        return stats
-    elif SearchResource.filter(resource):
-        AddLabel.transform(log, LABEL_TYPE, LABEL_TYPE_SEARCH)
-        stats[LABEL_TYPE] = LABEL_TYPE_SEARCH
-    else:
-        AddLabel.transform(log, LABEL_TYPE, LABEL_TYPE_OTHERS)
-        stats[LABEL_TYPE] = LABEL_TYPE_OTHERS
-    
-    # Forward the processed log to Loki.
-    if LokiForwarder.forward(log, line) == -1:
-        stats[LABEL_CONTENT] = LABEL_CONTENT_ERROR
-    return stats
+            log, status = to_json(line)
+            request = log['request']
+            parsed.append((
+                log, status, log['ip_address'], log['date'], log['time'], request['resource'],
+                int(request['status_code']), log['user_agent']
+            ))
+        except Exception:
+            parsed.append(None)
+
+    # Count, filter and label the logs based on their details.
+    status_code_filter, double_click_filter, robots_filter = StatusCode.filter, DoubleClick.filter_timestamp, RobotsCrawlers.filter
+    classify = ResourceClassifier.classify
+    add_label, add_metadata = AddLabel.transform, AddLogMetadata.transform
+    robots = counters[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN]
+    records = []
+    for line, fields in zip(lines, parsed):
+        if fields is None:
+            log = {LABEL_VALUE: line, LABEL_CONTENT: LABEL_CONTENT_ERROR}
+            try:
+                AddTimestamp.transform(log, line)
+                records.append((log, line))
+            except Exception as e:
+                print(f"Error forwarding log: {e}")
+            counters[LABEL_CONTENT_ERROR] += 1
+            continue
+        log, status, ip_address, date, time, resource, status_code, user_agent = fields
+        if status_code_filter(status_code):
+            counters[LOG_COUNTER_STATUS_CODE] += 1
+            continue
+        # The access time is converted once and kept in the log for the forwarder.
+        log['timestamp'] = timestamp = to_timestamp(date, time)
+        if double_click_filter(ip_address, timestamp, resource, user_agent):
+            counters[LOG_COUNTER_DOUBLE_CLICK] += 1
+            continue
+        robot_name = robots_filter(user_agent)
+        if robot_name:
+            robots[robot_name] = robots.get(robot_name, 0) + 1
+            continue
+
+        # Add labels and metadata based on resource type.
+        label_type, resource_id = classify(resource)
+        if label_type == LABEL_TYPE_RESOURCE_WEB:
+            counters[LABEL_TYPE_RESOURCE_WEB] += 1
+            continue
+        add_label(log, LABEL_CONTENT, LABEL_CONTENT_OK if status == 0 else LABEL_CONTENT_DIFFERENT)
+        if resource_id is not None:
+            log['resource'] = resource_id
+        add_label(log, LABEL_TYPE, label_type)
+        if enrich and resource_id is not None:
+            add_metadata(log, resource_id)
+        counters[label_type] += 1
+        records.append((log, line))
+    return records, counters
+
+def forward_log(log: dict, line: str) -> int:
+    """
+    Forwards a log to Loki, unless it must wait for batched metadata lookups.
+
+    In batch enrichment mode, logs are held back while the metadata of some resources is pending, so that
+    every log reaches Loki enriched and in its original order.
+
+    Args:
+        log (dict): The structured log data.
+        line (str): The raw log entry.
+
+    Returns:
+        int: The status returned by `LokiForwarder.forward`, or 0 if the log was held back.
+    """
+    if not AddLogMetadata.hold(log, line):
+        return LokiForwarder.forward(log, line)
+    return forward_held_logs() if AddLogMetadata.should_flush() else 0
+
+def forward_records(records: list) -> int:
+    """
+    Forwards processed logs to Loki in bulk and in order.
+
+    In batch enrichment mode, every log goes through `forward_log`, so that logs are held back while the
+    metadata of some resources is pending.
+
+    Args:
+        records (list[tuple[dict, str]]): The structured logs and raw log entries, as returned by `process_batch`.
+
+    Returns:
+        int: 0 if the logs were forwarded, queued or held back, 1 if forwarding any batch failed.
+    """
+    if not AddLogMetadata.batching:
+        return LokiForwarder.forward_many(records)
+    status = 0
+    for log, line in records:
+        status = forward_log(log, line) or status
+    return status
+
+def forward_held_logs() -> int:
+    """
+    Resolves the pending metadata lookups and forwards the held logs to Loki in order.
+
+    Returns:
+        int: 0 if every held log was forwarded, 1 if forwarding any of them failed.
+    """
+    status = 0
+    for log, line in AddLogMetadata.flush():
+        status = LokiForwarder.forward(log, line) or status
+    return status
+
+def process_logs_for_day(log_file, monthly_stats, start=0, end=None):
+    """
+    Processes all logs in a single day's log file, or in a line range of it.
+
+    Args:
+        log_file (Path): Path to the compressed log file.
+        monthly_stats (dict): The counters to update, as created by `new_counters`.
+        start (int): The decompressed offset of the first line of the range.
+        end (int | None): The decompressed offset where the range ends, or None for the end of the file.
+    """
+    for batch in LogReader.batches(log_file, start, end):
+        records, _ = process_batch(batch, monthly_stats)
+        forward_records(records)
+
+def access_timestamp(line: str) -> int | None:
+    """
+    Reads the access time of a raw log entry, without parsing the rest of it.
+
+    Args:
+        line (str): The raw log entry.
 
-def process_logs_for_day(log_file, monthly_stats):
+    Returns:
+        int | None: The access time as a UNIX timestamp, or None if the entry has no valid access time.
+    """
+    start = line.find('[') + 1
+    end = line.find(']', start)
+    access_date, _, access_time = line[start:end].partition(':')
+    try:
+        return to_timestamp(access_date, access_time) if start and end > 0 else None
+    except ValueError:
+        return None
+
+def replay_day_end(log_file) -> int:
+    """
+    Replays the logs of the last `DoubleClick.WINDOW_SECONDS` seconds of a day file, so that the next day starts
+    with the double-click window a sequential run has at midnight.
+
+    When the file is indexed with `LogIndex`, reading starts at its last line checkpoint and moves back one
+    checkpoint at a time, as `warm_up` does, until the newest access is more than `DoubleClick.WINDOW_SECONDS`
+    newer than every log before the checkpoint. Otherwise the whole file is read, since it cannot be
+    decompressed from the middle. Only the access times are read to find the logs in the window, which are
+    then replayed without being counted or forwarded.
+
+    Args:
+        log_file (Path): Path to the compressed log file of the previous day.
+
+    Returns:
+        int: The number of replayed logs.
     """
-    Processes all logs in a single day's log file.
+    index = LogIndex.load(log_file)
+    points = LogIndex.warm_up_points(index, index['size']) if index is not None else [(0, 0)]
+    tail = deque()  # The logs that may still be in the window, with their access time.
+    newest = end = None
+    for offset, newest_before in points:
+        segment = deque()
+        for batch in LogReader.batches(log_file, offset, end):
+            for line in batch:
+                timestamp = access_timestamp(line)
+                if timestamp is None:
+                    continue
+                newest = timestamp if newest is None else max(newest, timestamp)
+                segment.append((timestamp, line))
+                while segment and segment[0][0] < newest - DoubleClick.WINDOW_SECONDS:
+                    segment.popleft()
+        tail = segment + tail
+        end = offset
+        if newest is not None and newest > newest_before + DoubleClick.WINDOW_SECONDS:
+            break
+    # Logs out of time order may have been kept behind newer ones.
+    lines = [line for timestamp, line in tail if timestamp >= newest - DoubleClick.WINDOW_SECONDS]
+    process_batch(lines, enrich=False)
+    return len(lines)
+
+def warm_up(log_file, start, previous_file=None) -> int:
+    """
+    Replays the logs preceding a line range, so that the range starts with the double-click window and the
+    Loki timestamps of a serial run.
+
+    The replay starts at the nearest line checkpoint of the file index and moves back one checkpoint at a time
+    until it is long enough: the newest replayed access must be at least `DoubleClick.WINDOW_SECONDS` newer
+    than every log before the replay, so that none of them is still in the window, and the run of identical
+    timestamps in progress must have started within the replay. A replay from the start of the file also
+    replays the end of the previous day with `replay_day_end`.
 
     Args:
         log_file (Path): Path to the compressed log file.
-        monthly_stats (dict): Dictionary to store monthly statistics.
-    """
-    with gzip.open(log_file, mode='rt', encoding='utf-8', errors='ignore') as file:
-        for log in file:
-            stats = process_log(log)
-            if not stats:
-                continue
-            # Update counters based on the log's classification.
-            if counter_type := stats.get(LOG_COUNTER):
-                if counter_type == LOG_COUNTER_STATUS_CODE:
-                    monthly_stats[LOG_COUNTER_STATUS_CODE] += 1
-                elif counter_type == LOG_COUNTER_DOUBLE_CLICK:
-                    monthly_stats[LOG_COUNTER_DOUBLE_CLICK] += 1
-                elif counter_type == LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN:
-                    robot_name = stats['robot_name']
-                    monthly_stats[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN][robot_name] = \
-                        monthly_stats[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN].get(robot_name, 0) + 1
-            elif stats.get(LABEL_CONTENT) == LABEL_CONTENT_ERROR:
-                monthly_stats[LABEL_CONTENT_ERROR] += 1
-            else:
-                monthly_stats[stats[LABEL_TYPE]] += 1
+        start (int): The decompressed offset of the first line of the range.
+        previous_file (Path | None): Path to the log file of the previous day, if it is processed too.
+
+    Returns:
+        int: The decompressed offset where the replay started.
+    """
+    for offset, newest_before in LogIndex.warm_up_points(LogIndex.load(log_file), start):
+        DoubleClick.reset()
+        LokiForwarder.reset()
+        if offset == 0 and previous_file is not None:
+            replay_day_end(previous_file)
+        for batch in LogReader.batches(log_file, offset, start):
+            records, _ = process_batch(batch, enrich=False)
+            for log, _ in records:
+                LokiForwarder.skip(log)
+        newest = DoubleClick.newest()
+        if offset == 0 or newest is not None and newest >= newest_before + DoubleClick.WINDOW_SECONDS \
+                and LokiForwarder.skipped_runs >= 2:
+            return offset
+    return 0
+
+def count_only() -> bool:
+    """
+    Returns whether the run only counts the logs, with `LOGS_COUNT_ONLY=1`.
+
+    A count-only run computes the statistics with `ColumnarEngine`, which is faster, but forwards nothing to Loki
+    and adds no metadata, so it only suits recomputing the statistics of logs that were already forwarded.
+
+    Returns:
+        bool: True if the logs are only counted, False if they are also forwarded to Loki.
+
+    Raises:
+        ValueError: If `LOKI_URL` is set too, since the logs would not be forwarded to it.
+    """
+    if os.environ.get('LOGS_COUNT_ONLY') != '1':
+        return False
+    if os.environ.get('LOKI_URL'):
+        raise ValueError("LOGS_COUNT_ONLY=1 does not forward logs to Loki; unset LOKI_URL to only count the logs.")
+    return True
+
+def process_day(log_file, start=0, end=None, previous_file=None, sequential=False) -> dict:
+    """
+    Processes a single day's log file, or a line range of it, and returns its partial statistics.
+
+    In a sequential run, the double-click window and the Loki timestamps carry over from the previous day, as
+    a single stream of logs. In a worker process, they are reset and rebuilt from the logs preceding the day:
+    the end of the previous day with `replay_day_end`, and, for a range that does not start the file, the
+    logs of the file preceding it with `warm_up`, so that days and ranges add up to the results of a
+    sequential run. Pending logs are forwarded when the day ends, and the logs a worker process could not
+    forward are returned in `UNSENT_LOGS`, so that the main process retries them instead of losing them when
+    the worker exits. A worker drops the logs the main process has not forwarded yet, which it inherits when
+    it is forked, so that they are not forwarded twice.
+    In a count-only run, see `count_only`, the logs are only counted, with `ColumnarEngine`.
+
+    Args:
+        log_file (Path): Path to the compressed log file.
+        start (int): The decompressed offset of the first line of the range.
+        end (int | None): The decompressed offset where the range ends, or None for the end of the file.
+        previous_file (Path | None): Path to the log file of the previous day, if it is processed too.
+        sequential (bool): Whether the days are processed one after another in the current process.
+
+    Returns:
+        dict: The statistics of the day, with the same counters as the monthly statistics.
+    """
+    day_stats = new_counters()
+    name = log_file.name if start == 0 and end is None else f"{log_file.name} [{start}:{end}]"
+    print(f"Processing: {name}")
+    RobotsCrawlers.reload()
+    if not count_only():
+        AddLogMetadata.load()
+        AddLogMetadata.reset()
+    if sequential:
+        LokiForwarder.reset(timestamps=False)
+    else:
+        DoubleClick.reset()
+        LokiForwarder.reset()
+        # A forked worker starts with a copy of the logs the main process could not forward yet, which it still owns.
+        LokiForwarder.batch.clear()
+        LokiForwarder.batch_bytes = 0
+        if start:
+            print(f"Replayed {start - warm_up(log_file, start, previous_file)} bytes of logs preceding {name}")
+        elif previous_file is not None:
+            print(f"Replayed {replay_day_end(previous_file)} logs of the end of {previous_file.name}")
+    if count_only():
+        ColumnarEngine.process(log_file, day_stats, start, end)
+        print(f"Double-click window of {name}: {json.dumps(DoubleClick.stats())}")
+        return day_stats
+    process_logs_for_day(log_file, day_stats, start, end)
+    forward_held_logs()
+    if AddLogMetadata.batching:
+        print(f"Metadata lookups of {name}: {json.dumps(AddLogMetadata.stats())}")
+    print(f"Double-click window of {name}: {json.dumps(DoubleClick.stats())}")
+    LokiForwarder.close()
+    print(f"Loki pushes of {name}: {json.dumps(LokiForwarder.stats())}")
+    if LokiForwarder.batch:
+        print(f"{len(LokiForwarder.batch)} logs of {name} could not be forwarded yet")
+        if not sequential:
+            day_stats[UNSENT_LOGS] = list(LokiForwarder.batch)
+            LokiForwarder.batch.clear()
+            LokiForwarder.batch_bytes = 0
+    return day_stats
+
+def split_days(log_files, executor) -> tuple:
+    """
+    Splits day files into line ranges of `LOGS_RANGE_BYTES` decompressed bytes, so that several workers can
+    process a single large day.
+
+    The files are indexed by the worker processes, and the indexes saved next to them are reused by later runs.
+    Without `LOGS_RANGE_BYTES`, or without the indexed_gzip package, every day is processed whole.
+
+    Args:
+        log_files (list[Path]): Paths to the compressed log files, in day order.
+        executor (ProcessPoolExecutor): The worker processes.
+
+    Returns:
+        tuple: The log file, start offset and end offset of each range, as three lists in day order.
+    """
+    range_bytes = int(os.environ.get('LOGS_RANGE_BYTES') or 0)
+    whole_days = (log_files, [0] * len(log_files), [None] * len(log_files))
+    if range_bytes <= 0:
+        return whole_days
+    try:
+        LogIndex.ensure_available()
+    except ImportError as e:
+        print(f"{e} Processing whole day files.")
+        return whole_days
+
+    files, starts, ends = [], [], []
+    for log_file, index in zip(log_files, executor.map(LogIndex.build, log_files)):
+        ranges = LogIndex.ranges(index, range_bytes)
+        for start, end in ranges if len(ranges) > 1 else [(0, None)]:
+            files.append(log_file)
+            starts.append(start)
+            ends.append(end)
+    return files, starts, ends
+
+def previous_files(log_files, previous_file=None) -> list:
+    """
+    Returns the log file of the day before each day file, when it is processed in the same run.
+
+    Args:
+        log_files (list[Path]): Paths to the compressed log files, in day order.
+        previous_file (Path | None): Path to the last log file processed before them, if any.
+
+    Returns:
+        list[Path | None]: The log file of the previous day of each file, or None.
+    """
+    previous = []
+    for log_file in log_files:
+        day = date.fromisoformat(log_file.name.split('.')[1])
+        previous_name = f'anon_upc_access_log.{(day - timedelta(days=1)).isoformat()}.txt.gz'
+        previous.append(previous_file if previous_file is not None and previous_file.name == previous_name else None)
+        previous_file = log_file
+    return previous
 
 def update_yearly_stats(yearly_stats, monthly_stats):
     """
@@ -157,7 +450,7 @@ def update_yearly_stats(yearly_stats, monthly_stats):
     yearly_stats['time'] += monthly_stats.get('time', 0)
     yearly_stats['total_logs'] += monthly_stats.get('total_logs', 0)
 
-def process_month(year, month, yearly_stats):
+def process_month(year, month, yearly_stats, previous_file=None):
     """
     Processes logs for an entire month.
 
@@ -165,6 +458,10 @@ def process_month(year, month, yearly_stats):
         year (int): The year of the logs being processed.
         month (int): The month of the logs being processed.
         yearly_stats (dict): Dictionary to store yearly statistics.
+        previous_file (Path | None): Path to the last log file processed before the month, if any.
+
+    Returns:
+        Path | None: Path to the last log file processed, the month's or `previous_file`.
     """
     # Initialize monthly statistics.
     monthly_stats = {
@@ -186,11 +483,25 @@ def process_month(year, month, yearly_stats):
     }
     start_time = time.time()
     folder = Path(os.environ.get('LOGS_OUTPUT_PATH', '').strip())
-    for day in range(int(os.environ.get('START_DAY')), int(os.environ.get('END_DAY')) + 1):
-        log_file = folder / f'anon_upc_access_log.{year}-{month:02}-{day:02}.txt.gz'
-        if log_file.exists():
-            print(f"Processing: {log_file.name}")
-            process_logs_for_day(log_file, monthly_stats)
+    log_files = [
+        log_file
+        for day in range(int(os.environ.get('START_DAY')), int(os.environ.get('END_DAY')) + 1)
+        if (log_file := folder / f'anon_upc_access_log.{year}-{month:02}-{day:02}.txt.gz').exists()
+    ]
+    workers = int(os.environ.get('LOGS_WORKERS', 1))
+    if workers > 1:
+        # Each worker process handles whole day files or line ranges of them; partial statistics are merged in order.
+        # Each day starts with the end of the previous day, so that double clicks across midnight are counted.
+        previous = dict(zip(log_files, previous_files(log_files, previous_file)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            files, starts, ends = split_days(log_files, executor)
+            for day_stats in executor.map(process_day, files, starts, ends, [previous[log_file] for log_file in files]):
+                # Retry the logs a worker could not forward, at the latest when the run ends.
+                LokiForwarder.forward_many(day_stats.pop(UNSENT_LOGS, []))
+                update_yearly_stats(monthly_stats, day_stats)
+    else:
+        for log_file in log_files:
+            update_yearly_stats(monthly_stats, process_day(log_file, sequential=True))
     monthly_stats[LOG_COUNTER_ROBOTS_CRAWLERS] = sum(monthly_stats[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN].values())
     keys_to_sum = [
         LOG_COUNTER_STATUS_CODE, LOG_COUNTER_DOUBLE_CLICK, LOG_COUNTER_ROBOTS_CRAWLERS,
@@ -201,11 +512,16 @@ def process_month(year, month, yearly_stats):
     monthly_stats['time'] = round((time.time() - start_time) / 60, 2)
     update_yearly_stats(yearly_stats, monthly_stats)
     print(json.dumps(monthly_stats, indent=4))
+    return log_files[-1] if log_files else previous_file
 
 def main():
     """
     Main function to process logs for the specified range of years and months.
     """
+    RobotsCrawlers.load()
+    if not count_only():
+        AddLogMetadata.load()
+    previous_file = None  # The last log file processed, whose last logs may be double clicked the next day.
     for year in range(int(os.environ.get('START_YEAR')), int(os.environ.get('END_YEAR')) + 1):
         yearly_stats = {
             'year': year,
@@ -224,7 +540,7 @@ def main():
             'time': 0.0
         }
         for month in range(int(os.environ.get('START_MONTH')), int(os.environ.get('END_MONTH')) + 1):
-            process_month(year, month, yearly_stats)
+            previous_file = process_month(year, month, yearly_stats, previous_file)
         yearly_stats[LOG_COUNTER_ROBOTS_CRAWLERS] = sum(
             yearly_stats[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN].values()
         )
@@ -1,25 +1,116 @@
+from collections import OrderedDict  # Import OrderedDict for the bounded caches of batched lookups.
 from functools import lru_cache  # Import lru_cache to cache results of metadata retrieval for efficiency.
+from pathlib import Path  # Import Path for handling the snapshot path.
 from src.logs.transformer.add_label import AddLabel  # Import AddLabel for adding labels to the log.
 from src.logs.transformer.transformer_interface import ITransformer  # Import the ITransformer interface for standardization.
+from src.logs.utils.metadata_index import MetadataIndex  # Import the in-memory index for preloaded metadata.
+from src.logs.utils.metadata_snapshot import MetadataSnapshot  # Import the memory-mapped metadata snapshot.
 from src.metadata.forwarder.mongodb_forwarder import MongoDbForwarder  # Import MongoDbForwarder to fetch metadata.
+import os  # Import os for accessing environment variables.
+import time  # Import time for measuring the preload time and the lookup latency.
 
 class AddLogMetadata(ITransformer):
     """
     A transformer class that enriches logs with metadata from an external database.
 
+    Attributes:
+        index (MetadataIndex | MetadataSnapshot | None): The preloaded or memory-mapped metadata of every
+            resource, None when metadata is queried per resource.
+        batching (bool): Whether metadata is resolved with batched queries.
+        batch_size (int): The number of pending resources that triggers a batched query.
+        MAX_HELD_LOGS (int): The number of held logs that triggers a batched query.
+        CACHE_SIZE (int): The number of resources kept in the cache of batched lookups.
+        NEGATIVE_CACHE_SIZE (int): The number of resources missing from the database that are remembered.
+        cache (OrderedDict): The metadata of recently resolved resources, in least recently used order.
+        negative_cache (OrderedDict): The recently resolved resources missing from the database.
+        pending (dict[str, list[dict]]): The logs waiting for the metadata of each pending resource.
+        held (list[tuple[dict, str]]): The logs held back, in order, until the pending resources are resolved.
+        counters (dict): The hit, miss, query and latency counters of batched lookups.
+
     Methods:
+        load() -> None:
+            Preloads or maps the metadata of every resource, depending on the enrichment mode.
+
         get_metadata(resource: str) -> dict:
-            Retrieves metadata for a given resource, using caching to improve performance.
+            Retrieves metadata for a given resource from the preloaded index or the database.
 
         transform(log: dict, resource: str) -> dict:
             Enriches a log dictionary with metadata by mapping metadata keys to specific log labels.
+
+        hold(log: dict, raw_log: str) -> bool:
+            Holds a log back while metadata lookups are pending.
+
+        should_flush() -> bool:
+            Tells whether the pending resources should be resolved.
+
+        flush() -> list:
+            Resolves the pending resources with a batched query and releases the held logs.
+
+        reset() -> None:
+            Resets the counters of batched lookups.
+
+        stats() -> dict:
+            Returns the counters of batched lookups.
+
+        _add_labels(log: dict, metadata: dict) -> None:
+            Adds the metadata values to the log.
+
+        _cached_metadata(resource: str) -> dict | None:
+            Returns the cached metadata of a resource, or None if it is not cached.
+
+        _query_metadata(resource: str) -> dict:
+            Retrieves metadata for a given resource from the database, using caching to improve performance.
     """
 
+    index: MetadataIndex | MetadataSnapshot | None = None  # Metadata set by `load` in preload and snapshot modes.
+    batching: bool = False  # Set by `load` in batch mode.
+    batch_size: int = 1000  # Pending resources per batched query.
+    MAX_HELD_LOGS = 50000  # Bounds the memory of held logs when few distinct resources are pending.
+    CACHE_SIZE = 100000  # Resources kept in the cache of batched lookups.
+    NEGATIVE_CACHE_SIZE = 100000  # Missing resources remembered by batched lookups.
+    cache: OrderedDict = OrderedDict()  # Recently resolved metadata.
+    negative_cache: OrderedDict = OrderedDict()  # Recently resolved resources missing from the database.
+    pending: dict = {}  # Logs waiting for each pending resource.
+    held: list = []  # Logs held back until the pending resources are resolved.
+    counters: dict = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'not_found': 0, 'queries': 0,
+                      'query_seconds': 0.0, 'max_query_seconds': 0.0}
+
+    @classmethod
+    def load(cls) -> None:
+        """
+        Preloads or maps the metadata of every resource, depending on `METADATA_ENRICHMENT`.
+
+        With `preload`, the projected fields of the whole collection are read with a single query into a
+        `MetadataIndex`, so that enriching a log becomes a local lookup. The load time and the memory of the
+        index are reported. With `snapshot`, the `METADATA_SNAPSHOT_PATH` file exported by
+        `src/logs/utils/metadata_snapshot.py` is memory-mapped instead, so that worker processes share one
+        page-cached copy and MongoDB is not contacted. With `batch`, resources missing from the cache are
+        collected and resolved with one query per `METADATA_BATCH_SIZE` resources (1000 by default), see
+        `hold` and `flush`. Does nothing if the metadata is already loaded or metadata is queried per resource.
+        """
+        mode = os.environ.get('METADATA_ENRICHMENT', 'lookup')
+        if mode == 'batch':
+            cls.batching = True
+            cls.batch_size = int(os.environ.get('METADATA_BATCH_SIZE') or cls.batch_size)
+            return
+        if cls.index is not None or mode not in ('preload', 'snapshot'):
+            return
+
+        if mode == 'snapshot':
+            cls.index = MetadataSnapshot(Path(os.environ.get('METADATA_SNAPSHOT_PATH', '').strip()))
+            print(f"Mapped metadata snapshot: {cls.index.stats()}")
+            return
+
+        start_time = time.time()
+        index = MetadataIndex()
+        records = index.load(MongoDbForwarder.iter_metadata())
+        cls.index = index
+        print(f"Preloaded metadata of {records} resources in {time.time() - start_time:.2f} s: {index.stats()}")
+
     @classmethod
-    @lru_cache(maxsize=1024)
     def get_metadata(cls, resource: str) -> dict:
         """
-        Retrieves metadata for a given resource from the MongoDB forwarder.
+        Retrieves metadata for a given resource, from the preloaded index or the snapshot if they are loaded.
 
         Args:
             resource (str): The identifier of the resource for which metadata is fetched.
@@ -27,8 +118,9 @@ class AddLogMetadata(ITransformer):
         Returns:
             dict: A dictionary containing metadata for the resource. Returns an empty dictionary if no metadata is found.
         """
-        # Fetch metadata using the MongoDbForwarder. If none is found, return an empty dictionary.
-        return MongoDbForwarder.get_metadata_by_id(resource) or {}
+        if cls.index is not None:
+            return cls.index.get(resource)
+        return cls._query_metadata(resource)
 
     @classmethod
     def transform(cls, log: dict, resource: str) -> dict:
@@ -37,6 +129,8 @@ class AddLogMetadata(ITransformer):
 
         Metadata keys are mapped to specific log labels using a predefined mapping. 
         If metadata for a key exists, it is added to the log using the `AddLabel` transformer.
+        In batch mode, a log whose resource is not cached is left unchanged and registered as pending. It is
+        enriched by `flush`, and must be passed to `hold` so that it is not forwarded before.
 
         Args:
             log (dict): The log dictionary to enrich with metadata.
@@ -45,9 +139,117 @@ class AddLogMetadata(ITransformer):
         Returns:
             dict: The enriched log dictionary.
         """
-        # Fetch metadata for the given resource.
-        metadata = cls.get_metadata(resource)
+        if cls.batching:
+            metadata = cls._cached_metadata(resource)
+            if metadata is None:
+                cls.pending.setdefault(resource, []).append(log)
+                return log
+        else:
+            # Fetch metadata for the given resource.
+            metadata = cls.get_metadata(resource)
 
+        cls._add_labels(log, metadata)
+        return log  # Return the enriched log.
+
+    @classmethod
+    def hold(cls, log: dict, raw_log: str) -> bool:
+        """
+        Holds a log back while metadata lookups are pending, so that logs are forwarded in their original order.
+
+        Args:
+            log (dict): The log dictionary ready to be forwarded.
+            raw_log (str): The raw log string.
+
+        Returns:
+            bool: True if the log was held and will be returned by `flush`, False if it can be forwarded now.
+        """
+        if not cls.pending:
+            return False
+        cls.held.append((log, raw_log))
+        return True
+
+    @classmethod
+    def should_flush(cls) -> bool:
+        """
+        Tells whether enough resources are pending, or enough logs are held, to resolve them.
+
+        Returns:
+            bool: True if `flush` should be called.
+        """
+        return len(cls.pending) >= cls.batch_size or len(cls.held) >= cls.MAX_HELD_LOGS
+
+    @classmethod
+    def flush(cls) -> list:
+        """
+        Resolves the pending resources with a single `$in` query, enriches the logs waiting for them and
+        releases the held logs.
+
+        Returns:
+            list: The held logs and their raw strings, in their original order, ready to be forwarded.
+        """
+        if cls.pending:
+            resources = list(cls.pending)
+            start_time = time.time()
+            found = MongoDbForwarder.get_metadata_by_ids(resources)
+            latency = time.time() - start_time
+
+            counters = cls.counters
+            counters['queries'] += 1
+            counters['query_seconds'] += latency
+            counters['max_query_seconds'] = max(counters['max_query_seconds'], latency)
+            counters['misses'] += len(resources)
+            counters['not_found'] += len(resources) - len(found)
+
+            for resource, logs in cls.pending.items():
+                metadata = found.get(resource)
+                if metadata is None:
+                    cls.negative_cache[resource] = True
+                    if len(cls.negative_cache) > cls.NEGATIVE_CACHE_SIZE:
+                        cls.negative_cache.popitem(last=False)
+                    continue
+                cls.cache[resource] = metadata
+                if len(cls.cache) > cls.CACHE_SIZE:
+                    cls.cache.popitem(last=False)
+                for log in logs:
+                    cls._add_labels(log, metadata)
+            cls.pending = {}
+
+        held, cls.held = cls.held, []
+        return held
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Resets the counters of batched lookups. The caches are kept, since the metadata does not change.
+        """
+        cls.counters = {key: type(value)() for key, value in cls.counters.items()}
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns the counters of batched lookups.
+
+        Returns:
+            dict: The cache hits, negative cache hits, resources queried (misses) and not found, the number of
+                queries with their total and maximum latency in seconds, and the sizes of both caches.
+        """
+        return {
+            **cls.counters,
+            'query_seconds': round(cls.counters['query_seconds'], 3),
+            'max_query_seconds': round(cls.counters['max_query_seconds'], 3),
+            'cache': len(cls.cache),
+            'negative_cache': len(cls.negative_cache)
+        }
+
+    @staticmethod
+    def _add_labels(log: dict, metadata: dict) -> None:
+        """
+        Adds the metadata values to the log, mapping metadata keys to log labels.
+
+        Args:
+            log (dict): The log dictionary to enrich with metadata.
+            metadata (dict): The metadata of the log's resource.
+        """
         # Define the mapping of metadata keys to log labels.
         label_mapping = {
             'language': 'language',
@@ -60,4 +262,39 @@ class AddLogMetadata(ITransformer):
             if meta_value := metadata.get(meta_key):  # Retrieve the metadata value if it exists.
                 AddLabel.transform(log, label, meta_value)  # Add the metadata value to the log using AddLabel.
 
-        return log  # Return the enriched log.
+    @classmethod
+    def _cached_metadata(cls, resource: str) -> dict | None:
+        """
+        Returns the metadata of a resource from the caches of batched lookups.
+
+        Args:
+            resource (str): The resource identifier.
+
+        Returns:
+            dict | None: The cached metadata, an empty dictionary if the resource is known to be missing from
+                the database, or None if the resource must be queried.
+        """
+        metadata = cls.cache.get(resource)
+        if metadata is not None:
+            cls.cache.move_to_end(resource)
+            cls.counters['hits'] += 1
+            return metadata
+        if resource in cls.negative_cache:
+            cls.counters['negative_hits'] += 1
+            return {}
+        return None
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def _query_metadata(cls, resource: str) -> dict:
+        """
+        Retrieves metadata for a given resource from the MongoDB forwarder.
+
+        Args:
+            resource (str): The identifier of the resource for which metadata is fetched.
+
+        Returns:
+            dict: A dictionary containing metadata for the resource. Returns an empty dictionary if no metadata is found.
+        """
+        # Fetch metadata using the MongoDbForwarder. If none is found, return an empty dictionary.
+        return MongoDbForwarder.get_metadata_by_id(resource) or {}
@@ -1,8 +1,27 @@
+from functools import lru_cache  # Import lru_cache to cache referer domain lookups.
 from src.logs.transformer.transformer_interface import ITransformer  # Import the ITransformer interface for consistent transformer behavior.
+from src.logs.utils.regex_patterns import COMBINED_LOG_FORMAT  # Import the single-pass combined log format regex.
 from typing import Any  # Import Any for type annotations of dynamic data.
 from urllib.parse import urlparse  # Import urlparse for parsing URLs.
 import re  # Import the re module for regular expression operations.
 
+# Pre-compiled single-pass parser for well-formed lines.
+COMBINED_LOG_REGEX = re.compile(COMBINED_LOG_FORMAT)
+
+# Pre-compiled regular expressions used by the fallback parser.
+IDENTIFICATION_REGEX = re.compile(r'(^\d.*]) \"')
+BODY_REGEX = re.compile(r'(\".*)')
+IP_REGEX = re.compile(r'([0-9]+\.){3}[0-9]+')
+DATE_REGEX = re.compile(r'\d{1,2}/\w{3}/\d{1,4}')
+TIME_REGEX = re.compile(r':(\d{2}:\d{2}:\d{2} [+-]\d{4})\]')
+QUOTED_REGEX = re.compile(r'"([^"]*)"')
+TOKEN_REGEX = re.compile(r'(\S+)')
+REQUEST_FALLBACK_REGEX = re.compile(r'"(.*HTTP\/\d.\d)"')
+REFERER_FALLBACK_REGEX = re.compile(r'\s(-|\d+) "(.*)" ')
+USER_AGENT_FALLBACK_REGEX = re.compile(r'"\s"(.*)(|")$')
+REQUEST_SPLIT_REGEX = re.compile(r'(^[A-Z]+)\s(.*)\s(HTTP\/\d.\d)$')
+STATUS_SIZE_REGEX = re.compile(r' (\d+) (-|\d+) ')
+
 class ToJSON(ITransformer):
     """
     A transformer class that converts a raw log string into a structured JSON-like dictionary.
@@ -10,6 +29,10 @@ class ToJSON(ITransformer):
     Methods:
         transform(log: str) -> tuple[dict[str, str | dict[str, str | Any]], int]:
             Transforms a raw log string into a structured dictionary and identifies parsing issues with a status code.
+        _transform_fallback(log: str) -> tuple[dict[str, str | dict[str, str | Any]], int]:
+            Parses a log string that the single-pass parser could not handle using the multi-regex cascade.
+        _referer_domain(referer: str) -> str:
+            Extracts the domain of a referer URL.
     """
 
     @classmethod
@@ -17,6 +40,45 @@ class ToJSON(ITransformer):
         """
         Converts a raw log string into a structured JSON-like dictionary and identifies parsing status.
 
+        Well-formed combined log lines are parsed with a single pre-compiled regex. Any other line
+        is delegated to the multi-regex fallback parser, which yields the same result as before.
+
+        Args:
+            log (str): The raw log string to transform.
+
+        Returns:
+            tuple: A tuple containing:
+                - dict: A structured dictionary with log details (e.g., IP address, date, request details).
+                - int: A status code (0 for success, -1 if parsing issues were encountered).
+        """
+        match = COMBINED_LOG_REGEX.match(log)
+        if not match:
+            return cls._transform_fallback(log)
+
+        ip, date, time, method, resource, version, status_code, response_size, referer, user_agent = match.groups()
+
+        # Construct the structured JSON-like dictionary.
+        log_json = {
+            'ip_address': ip,
+            'date': date,
+            'time': time,
+            'request': {
+                'method': method,
+                'resource': resource,
+                'version': version,
+                'status_code': status_code,
+                'response_size': response_size
+            },
+            'referer': cls._referer_domain(referer),
+            'user_agent': user_agent
+        }
+        return log_json, 0
+
+    @classmethod
+    def _transform_fallback(cls, log: str) -> tuple[dict[str, str | dict[str, str | Any]], int]:
+        """
+        Converts a raw log string using the multi-regex cascade.
+
         Args:
             log (str): The raw log string to transform.
 
@@ -28,51 +90,36 @@ class ToJSON(ITransformer):
         status = 0  # Default status code indicating successful parsing.
 
         # Extract identification section (IP, date, and time) from the log.
-        identification = re.compile(r'(^\d.*]) \"').findall(log)[0]
+        identification = IDENTIFICATION_REGEX.findall(log)[0]
 
         # Extract the main body of the log entry.
-        body = re.compile(r'(\".*)').findall(log)[0]
+        body = BODY_REGEX.findall(log)[0]
 
         # Extract the IP address from the identification section.
-        ip = re.match(r'([0-9]+\.){3}[0-9]+', identification).group()
+        ip = IP_REGEX.match(identification).group()
 
         # Extract the date in the format dd/Mon/yyyy.
-        date_match = re.search(r'\d{1,2}/\w{3}/\d{1,4}', identification)
-        date = date_match.group()
+        date = DATE_REGEX.search(identification).group()
 
         # Extract the time with timezone information.
-        time_match = re.search(r':(\d{2}:\d{2}:\d{2} [+-]\d{4})\]', identification)
-        time = time_match.group(1)
+        time = TIME_REGEX.search(identification).group(1)
 
         # Extract HTTP description and split it into its components.
-        http_description = re.compile(r'"([^"]*)"').findall(body)
-        http_request = re.compile(r'(\S+)').findall(http_description[0])
+        http_description = QUOTED_REGEX.findall(body)
+        http_request = TOKEN_REGEX.findall(http_description[0])
 
         # Handle parsing issues when the HTTP request does not match expected format.
         if len(http_request) != 3 or "HTTP" not in http_request[2]:
             http_description = [
-                re.compile(r'"(.*HTTP\/\d.\d)"').findall(body)[0],
-                re.compile(r'\s(-|\d+) "(.*)" ').findall(body)[0][1],
-                re.compile(r'"\s"(.*)(|")$').findall(body)[0][0]
+                REQUEST_FALLBACK_REGEX.findall(body)[0],
+                REFERER_FALLBACK_REGEX.findall(body)[0][1],
+                USER_AGENT_FALLBACK_REGEX.findall(body)[0][0]
             ]
-            http_request = re.compile(r'(^[A-Z]+)\s(.*)\s(HTTP\/\d.\d)$').findall(http_description[0])[0]
+            http_request = REQUEST_SPLIT_REGEX.findall(http_description[0])[0]
             status = -1  # Set status to -1 to indicate parsing issues.
 
-        # Extract HTTP request details.
-        http_request_method = http_request[0]
-        http_request_resource = http_request[1]
-        http_protocol_version = http_request[2]
-
-        # Extract HTTP referer details.
-        http_referer_url = http_description[1]
-        http_referer_domain = urlparse(http_referer_url).netloc if http_referer_url != "-" else "-"
-
-        # Extract user agent information.
-        http_user_agent = http_description[2]
-
         # Extract HTTP status code and response size.
-        http_request_status_code = re.compile(r' (\d+) (-|\d+) ').findall(body)[0][0]
-        http_request_response_size = re.compile(r' (\d+) (-|\d+) ').findall(body)[0][1]
+        http_request_status_code, http_request_response_size = STATUS_SIZE_REGEX.findall(body)[0]
 
         # Construct the structured JSON-like dictionary.
         log_json = {
@@ -80,15 +127,29 @@ class ToJSON(ITransformer):
             'date': date,
             'time': time,
             'request': {
-                'method': http_request_method,
-                'resource': http_request_resource,
-                'version': http_protocol_version,
+                'method': http_request[0],
+                'resource': http_request[1],
+                'version': http_request[2],
                 'status_code': http_request_status_code,
                 'response_size': http_request_response_size
             },
-            'referer': http_referer_domain,
-            'user_agent': http_user_agent
+            'referer': cls._referer_domain(http_description[1]),
+            'user_agent': http_description[2]
         }
 
         # Return the structured log dictionary and the status code.
         return log_json, status
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _referer_domain(referer: str) -> str:
+        """
+        Extracts the domain of a referer URL.
+
+        Args:
+            referer (str): The referer URL, or "-" when the request has no referer.
+
+        Returns:
+            str: The domain of the referer, or "-" when the request has no referer.
+        """
+        return urlparse(referer).netloc if referer != "-" else "-"
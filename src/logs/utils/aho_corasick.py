@@ -0,0 +1,84 @@
+from collections import deque  # Import deque for the breadth-first construction of failure links.
+
+class AhoCorasick:
+    """
+    A multi-pattern substring matcher based on the Aho-Corasick automaton.
+
+    The automaton is built once from a list of patterns, where the position of each pattern in the list is
+    its priority (lower is better). A search scans the text a single time and returns the highest-priority
+    pattern that occurs anywhere in it, which is the same result as checking the patterns one by one in
+    list order.
+
+    Attributes:
+        transitions (list[dict[str, int]]): The outgoing transitions of each state.
+        failures (list[int]): The failure link of each state.
+        priorities (list[int]): The best priority of the patterns recognized in each state, including those
+            recognized through failure links.
+
+    Methods:
+        search(text: str) -> int:
+            Returns the priority of the highest-priority pattern found in the text, or -1 if none is found.
+    """
+
+    NO_MATCH = float('inf')  # Priority of states that do not recognize any pattern.
+
+    def __init__(self, patterns: list[str]) -> None:
+        """
+        Builds the automaton for the given patterns.
+
+        Args:
+            patterns (list[str]): The patterns to match, in priority order.
+        """
+        self.transitions = [{}]
+        self.failures = [0]
+        self.priorities = [self.NO_MATCH]
+
+        # Build the trie of patterns, keeping the best priority for duplicated patterns.
+        for priority, pattern in enumerate(patterns):
+            state = 0
+            for character in pattern:
+                next_state = self.transitions[state].get(character)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions.append({})
+                    self.failures.append(0)
+                    self.priorities.append(self.NO_MATCH)
+                    self.transitions[state][character] = next_state
+                state = next_state
+            self.priorities[state] = min(self.priorities[state], priority)
+
+        # Compute failure links breadth-first and propagate the priorities recognized through them.
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self.transitions[state].items():
+                failure = self.failures[state]
+                while failure and character not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                failure = self.transitions[failure].get(character, 0)
+                self.failures[next_state] = failure
+                self.priorities[next_state] = min(self.priorities[next_state], self.priorities[failure])
+                queue.append(next_state)
+
+    def search(self, text: str) -> int:
+        """
+        Scans the text once and returns the highest-priority pattern that occurs in it.
+
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            int: The priority (index) of the best pattern found, or -1 if no pattern occurs in the text.
+        """
+        transitions, failures, priorities = self.transitions, self.failures, self.priorities
+        best = priorities[0]  # An empty pattern occurs in every text.
+        state = 0
+        for character in text:
+            while state and character not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(character, 0)
+            if priorities[state] < best:
+                best = priorities[state]
+                if best == 0:
+                    break
+        return -1 if best == self.NO_MATCH else best
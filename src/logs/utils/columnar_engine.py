@@ -0,0 +1,276 @@
+from src.logs.counter.double_click import DoubleClick  # Double-click counter, applied in line order.
+from src.logs.counter.robots_crawlers import RobotsCrawlers  # Robot/crawler detection, applied per distinct user agent.
+from src.logs.counter.status_code import StatusCode  # HTTP status code counter, for the lines parsed one at a time.
+from src.logs.transformer.to_json import ToJSON  # Parser of the lines the vectorized parser cannot handle.
+from src.logs.utils.date_converter import to_timestamp  # Converts the distinct access times to UNIX timestamps.
+from src.logs.utils.constants import LABEL_CONTENT_ERROR, LOG_COUNTER_STATUS_CODE, LOG_COUNTER_DOUBLE_CLICK, LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN
+from src.logs.utils.constants import LABEL_TYPE_OTHERS, LABEL_TYPE_SEARCH, LABEL_TYPE_RESOURCE, LABEL_TYPE_RESOURCE_BITSTREAM, LABEL_TYPE_BITSTREAM, LABEL_TYPE_RESOURCE_WEB
+from src.logs.utils.log_reader import LogReader  # Streams the lines of compressed log files in batches.
+from src.logs.utils.resource_classifier import ResourceClassifier  # Classifies the resources the kernels cannot handle.
+from src.logs.utils.regex_patterns import BITSTREAM, COMBINED_LOG_FORMAT, IPV6_PATTERN, SEARCH_KEYS, WEB_EXTENSIONS
+import re  # For naming the groups of the combined log format.
+try:
+    import pyarrow as pa  # Columnar arrays of log lines, required by the columnar engine.
+    import pyarrow.compute as pc  # Vectorized string and regex kernels.
+except ImportError:
+    pa = pc = None
+
+# Fields extracted from each line, in the order of the groups of COMBINED_LOG_FORMAT.
+FIELDS = ['ip_address', 'date', 'time', 'method', 'resource', 'version', 'status_code', 'response_size', 'referer', 'user_agent']
+
+# COMBINED_LOG_FORMAT anchored at the start of the line, as `re.match` is, with a name for each group.
+_names = iter(FIELDS)
+NAMED_COMBINED_LOG_FORMAT = '^' + re.sub(r'(?<!\\)\((?!\?)', lambda _: f'(?P<{next(_names)}>', COMBINED_LOG_FORMAT)
+
+# Lines or resources with any other character are handled one at a time, since RE2 and Python disagree on
+# which characters `\s`, `\d` and `\w` match outside printable ASCII.
+NOT_PLAIN_LINE = r'[^\t\n\x0c\r\x20-\x7e]'
+NOT_PLAIN_RESOURCE = r'[^\x20-\x7e]'
+
+# Referers with brackets are handled one at a time, since `urlparse` rejects unbalanced brackets and brackets
+# around an invalid IPv6 address, which makes `process_batch` count the line as an error.
+REFERER_WITH_BRACKETS = r'[\[\]]'
+
+# IPV6_PATTERN repeated, to remove every leading address in one pass as RemoveIPv6Address does in a loop.
+IPV6_PREFIX = '^(?:' + IPV6_PATTERN[1:] + ')+'
+
+# RE2 has no lookbehind: a resource matches HANDLE when it has more handles than handles in bitstream paths.
+HANDLE_ANY = r'/handle/(2099(.[1-4])?|2117)/\d'
+HANDLE_IN_BITSTREAM = r'/bitstream/handle/(2099(.[1-4])?|2117)/\d'
+
+class ColumnarEngine:
+    """
+    A columnar engine that computes the statistics of day log files with vectorized PyArrow kernels.
+
+    Lines are read with `LogReader` into Arrow arrays of `CHUNK_LINES` lines. Missing and IPv6 addresses are
+    handled, the combined log format is split and the status codes and resource types are classified with
+    string and regex kernels over whole columns. Lines the vectorized parser cannot handle, such as malformed or
+    non-ASCII lines or lines whose referer has brackets, are parsed one at a time with `ToJSON`, exactly as
+    `process_batch` does. The double-click
+    window is applied in line order, and robots are detected once per distinct user agent, so the counters
+    match those of `process_batch` on the same input.
+
+    The engine only counts logs: nothing is forwarded to Loki and no metadata is added, which makes it suited
+    to recomputing the statistics of historic logs, in the count-only runs of `LOGS_COUNT_ONLY=1`.
+
+    Attributes:
+        CHUNK_LINES (int): The number of lines processed at a time.
+
+    Methods:
+        ensure_available() -> None:
+            Ensures the pyarrow library is installed.
+        process(path, counters: dict, start: int = 0, end: int | None = None) -> dict:
+            Counts the logs of a compressed log file, or of a line range of it.
+        process_lines(lines: list, counters: dict) -> dict:
+            Counts a chunk of raw log entries.
+        _normalize_addresses(lines: pa.Array) -> pa.Array:
+            Handles missing and IPv6 addresses.
+        _parse(lines: pa.Array) -> tuple:
+            Splits the lines into fields.
+        _classify(resources: pa.Array, counters: dict) -> None:
+            Counts the types of the resources.
+        _count(mask: pa.Array) -> int:
+            Counts the true values of a mask.
+    """
+
+    CHUNK_LINES = 65536  # Lines per Arrow array.
+
+    @staticmethod
+    def ensure_available() -> None:
+        """
+        Ensures the pyarrow library is installed.
+
+        Raises:
+            ImportError: If the pyarrow package is not installed.
+        """
+        if pa is None:
+            raise ImportError("The pyarrow package is required by the columnar engine.")
+
+    @classmethod
+    def process(cls, path, counters: dict, start: int = 0, end: int | None = None) -> dict:
+        """
+        Counts the logs of a compressed log file, or of a line range of it, in chunks of `CHUNK_LINES` lines.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            counters (dict): The counters to update, as created by `new_counters`.
+            start (int): The decompressed offset of the first line of the range.
+            end (int | None): The decompressed offset where the range ends, or None for the end of the file.
+
+        Returns:
+            dict: The updated counters.
+        """
+        cls.ensure_available()
+        chunk = []
+        for batch in LogReader.batches(path, start, end):
+            chunk += batch
+            if len(chunk) >= cls.CHUNK_LINES:
+                cls.process_lines(chunk, counters)
+                chunk = []
+        if chunk:
+            cls.process_lines(chunk, counters)
+        return counters
+
+    @classmethod
+    def process_lines(cls, lines: list, counters: dict) -> dict:
+        """
+        Counts a chunk of raw log entries, with the same results as `process_batch`.
+
+        Args:
+            lines (list[str]): The raw log entries, in order.
+            counters (dict): The counters to update, as created by `new_counters`.
+
+        Returns:
+            dict: The updated counters.
+        """
+        cls.ensure_available()
+        lines = cls._normalize_addresses(pa.array(lines, type=pa.string()))
+        columns, errors, status_ok = cls._parse(lines)
+        error_count = cls._count(errors)
+        counters[LABEL_CONTENT_ERROR] += error_count
+        counters[LOG_COUNTER_STATUS_CODE] += len(lines) - error_count - cls._count(status_ok)
+
+        # Access times are converted once per distinct date and time, but the double-click window depends on the
+        # order of the accesses.
+        access_times = pc.binary_join_element_wise(pc.filter(columns['date'], status_ok), pc.filter(columns['time'], status_ok), ' ')
+        distinct_access_times = pc.unique(access_times)
+        timestamps = pc.take(
+            pa.array([to_timestamp(*access_time.split(' ', 1)) for access_time in distinct_access_times.to_pylist()], type=pa.int64()),
+            pc.index_in(access_times, value_set=distinct_access_times)
+        )
+        accesses = zip(*(pc.filter(columns[name], status_ok).to_pylist() for name in ('ip_address', 'resource', 'user_agent')))
+        filter_timestamp = DoubleClick.filter_timestamp
+        double_clicks = [
+            filter_timestamp(ip_address, timestamp, resource, user_agent)
+            for (ip_address, resource, user_agent), timestamp in zip(accesses, timestamps.to_pylist())
+        ]
+        counters[LOG_COUNTER_DOUBLE_CLICK] += sum(double_clicks)
+        remaining = pc.replace_with_mask(status_ok, status_ok, pa.array([not double_click for double_click in double_clicks], type=pa.bool_()))
+
+        # Robots are detected once per distinct user agent.
+        user_agents = pc.filter(columns['user_agent'], remaining)
+        distinct_user_agents = pc.unique(user_agents)
+        robot_names = pc.take(
+            pa.array([RobotsCrawlers.filter(user_agent) for user_agent in distinct_user_agents.to_pylist()], type=pa.string()),
+            pc.index_in(user_agents, value_set=distinct_user_agents)
+        )
+        robots = pc.not_equal(robot_names, '')
+        breakdown = counters[LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN]
+        for robot in pc.value_counts(pc.filter(robot_names, robots)).to_pylist():
+            breakdown[robot['values']] = breakdown.get(robot['values'], 0) + robot['counts']
+
+        cls._classify(pc.filter(pc.filter(columns['resource'], remaining), pc.invert(robots)), counters)
+        return counters
+
+    @staticmethod
+    def _normalize_addresses(lines: pa.Array) -> pa.Array:
+        """
+        Replaces a missing address with the default one and removes leading IPv6 addresses, as
+        `AddDefaultIpAddress` and `RemoveIPv6Address` do.
+
+        Args:
+            lines (pa.Array): The raw log entries.
+
+        Returns:
+            pa.Array: The log entries with an IPv4 address, where possible.
+        """
+        without_ip_address = pc.starts_with(lines, '-')
+        with_ipv6_address = pc.match_substring_regex(lines, IPV6_PATTERN)
+        return pc.if_else(
+            without_ip_address,
+            pc.replace_substring_regex(lines, '^-', '0.0.0.0'),
+            pc.if_else(with_ipv6_address, pc.replace_substring_regex(lines, IPV6_PREFIX, ''), lines)
+        )
+
+    @staticmethod
+    def _parse(lines: pa.Array) -> tuple:
+        """
+        Splits the lines into fields with the combined log format, and parses the other lines with `ToJSON`.
+
+        Lines whose referer has brackets are parsed with `ToJSON` too, so that a referer `urlparse` rejects makes
+        the line an error, as in `process_batch`.
+
+        Args:
+            lines (pa.Array): The log entries.
+
+        Returns:
+            tuple: The columns of the fields by name, the mask of lines that could not be parsed, and the mask of
+                parsed lines whose status code is not counted by `StatusCode`.
+        """
+        matches = pc.extract_regex(lines, NAMED_COMBINED_LOG_FORMAT)
+        parsed = pc.and_(pc.is_valid(matches), pc.invert(pc.match_substring_regex(lines, NOT_PLAIN_LINE)))
+        referer_with_brackets = pc.fill_null(pc.match_substring_regex(pc.struct_field(matches, 'referer'), REFERER_WITH_BRACKETS), False)
+        parsed = pc.and_(parsed, pc.invert(referer_with_brackets))
+        columns = {name: pc.struct_field(matches, name) for name in ('ip_address', 'date', 'time', 'resource', 'user_agent')}
+        status_ok = pc.and_(parsed, pc.is_in(pc.utf8_ltrim(pc.struct_field(matches, 'status_code'), characters='0'), value_set=pa.array(['200', '304'])))
+        errors = pa.array([False] * len(lines), type=pa.bool_())
+
+        # Parse the remaining lines one at a time.
+        others = pc.invert(parsed)
+        values = {name: [] for name in columns}
+        other_errors, other_status_ok = [], []
+        for line in pc.filter(lines, others).to_pylist():
+            try:
+                log, _ = ToJSON.transform(line)
+                fields = {
+                    'ip_address': log['ip_address'],
+                    'date': log['date'],
+                    'time': log['time'],
+                    'resource': log['request']['resource'],
+                    'user_agent': log['user_agent']
+                }
+                status_code = int(log['request']['status_code'])
+            except Exception:
+                fields, status_code = dict.fromkeys(columns), None
+            for name, value in fields.items():
+                values[name].append(value)
+            other_errors.append(status_code is None)
+            other_status_ok.append(status_code is not None and not StatusCode.filter(status_code))
+        if other_errors:
+            columns = {name: pc.replace_with_mask(column, others, pa.array(values[name], type=pa.string())) for name, column in columns.items()}
+            errors = pc.replace_with_mask(errors, others, pa.array(other_errors, type=pa.bool_()))
+            status_ok = pc.replace_with_mask(status_ok, others, pa.array(other_status_ok, type=pa.bool_()))
+        return columns, errors, status_ok
+
+    @classmethod
+    def _classify(cls, resources: pa.Array, counters: dict) -> None:
+        """
+        Counts the types of the resources, with the precedence of `process_batch`.
+
+        Args:
+            resources (pa.Array): The resources of the logs that are neither filtered nor counted as robots.
+            counters (dict): The counters to update.
+        """
+        plain = pc.invert(pc.match_substring_regex(resources, NOT_PLAIN_RESOURCE))
+        search = pc.match_substring(resources, SEARCH_KEYS[0])
+        for key in SEARCH_KEYS[1:]:
+            search = pc.or_(search, pc.match_substring(resources, key))
+        masks = [
+            (LABEL_TYPE_RESOURCE, pc.greater(pc.count_substring_regex(resources, HANDLE_ANY), pc.count_substring_regex(resources, HANDLE_IN_BITSTREAM))),
+            (LABEL_TYPE_RESOURCE_BITSTREAM, pc.match_substring_regex(resources, HANDLE_IN_BITSTREAM)),
+            (LABEL_TYPE_BITSTREAM, pc.match_substring_regex(resources, BITSTREAM)),
+            (LABEL_TYPE_RESOURCE_WEB, pc.match_substring_regex(resources, WEB_EXTENSIONS)),
+            (LABEL_TYPE_SEARCH, search)
+        ]
+        remaining = plain
+        for label_type, mask in masks:
+            counters[label_type] += cls._count(pc.and_(remaining, mask))
+            remaining = pc.and_(remaining, pc.invert(mask))
+        counters[LABEL_TYPE_OTHERS] += cls._count(remaining)
+
+        # Classify the other resources one at a time.
+        for resource in pc.filter(resources, pc.invert(plain)).to_pylist():
+            counters[ResourceClassifier.classify(resource)[0]] += 1
+
+    @staticmethod
+    def _count(mask: pa.Array) -> int:
+        """
+        Counts the true values of a mask.
+
+        Args:
+            mask (pa.Array): A boolean array.
+
+        Returns:
+            int: The number of true values.
+        """
+        return pc.sum(mask).as_py() or 0
@@ -1,4 +1,15 @@
-from datetime import datetime  # Import the datetime module for handling date and time conversions.
+from datetime import datetime, timedelta, timezone  # Import the datetime module for handling date and time conversions.
+from functools import lru_cache  # Import lru_cache to cache the start of each day.
+import re  # Import the re module to recognise the usual Apache access times.
+
+# Month abbreviations of Apache access times, as matched by `%b` in the C locale.
+MONTHS = {month: number for number, month in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1
+)}
+
+# Pre-compiled regular expressions of the usual dates ('01/Mar/2023') and times ('10:15:32 +0100').
+DATE_REGEX = re.compile(r'([0-9]{1,2})/([A-Z][a-z]{2})/([0-9]{4})')
+TIME_REGEX = re.compile(r'([01][0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9]) ([+-][01][0-9][0-5][0-9])')
 
 def to_iso_format(date: str, time: str) -> tuple[str, str]:
     """
@@ -23,16 +34,53 @@ def to_timestamp(date: str, time: str) -> int:
     """
     Converts a given date and time into a UNIX timestamp (seconds since epoch).
 
+    Usual Apache access times are parsed with a month table, and the timestamp of the start of their day in
+    their time zone is cached, since the logs of a day share it. Any other date or time is parsed with
+    `datetime.strptime`, which gives the same result, or raises the same error, for every input.
+
     Args:
         date (str): The date string in the format '%d/%b/%Y' (e.g., '01/Jan/2023').
         time (str): The time string in the format '%H:%M:%S %z' (e.g., '12:34:56 +0000').
 
     Returns:
         int: The UNIX timestamp in seconds.
+
+    Raises:
+        ValueError: If the date or time is not valid.
     """
+    time_match = TIME_REGEX.fullmatch(time)
+    if time_match:
+        hours, minutes, seconds, offset = time_match.groups()
+        start = _start_of_day(date, offset)
+        if start is not None:
+            return start + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
     # Combine the date and time strings, parse them, and convert to a UNIX timestamp.
     return int(datetime.strptime(date + ' ' + time, '%d/%b/%Y %H:%M:%S %z').timestamp())
 
+@lru_cache(maxsize=4096)
+def _start_of_day(date: str, offset: str) -> int | None:
+    """
+    Returns the UNIX timestamp of the start of a day in a time zone.
+
+    Args:
+        date (str): The date string in the format '%d/%b/%Y' (e.g., '01/Jan/2023').
+        offset (str): The UTC offset in the format '%z' (e.g., '+0100').
+
+    Returns:
+        int | None: The UNIX timestamp in seconds of midnight of the date in the time zone, or None if the date
+            is not in the usual format.
+
+    Raises:
+        ValueError: If the date does not exist.
+    """
+    date_match = DATE_REGEX.fullmatch(date)
+    if not date_match or date_match.group(2) not in MONTHS:
+        return None
+    day, month, year = date_match.groups()
+    sign = -1 if offset[0] == '-' else 1
+    zone = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+    return int(datetime(int(year), MONTHS[month], int(day), tzinfo=zone).timestamp())
+
 def to_nanoseconds(date: str, time: str) -> int:
     """
     Converts a given date and time into a UNIX timestamp in nanoseconds.
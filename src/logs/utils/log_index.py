@@ -0,0 +1,246 @@
+from functools import lru_cache  # Cache of the timestamps of the access times found in the logs.
+from pathlib import Path  # For handling filesystem paths.
+from src.logs.utils.date_converter import to_timestamp  # Converts the access times to UNIX timestamps.
+from typing import BinaryIO, List, Tuple  # Type hints for streams, lists and tuples.
+import json  # For storing the line checkpoints.
+import re  # For finding the access times of the logs.
+try:
+    import indexed_gzip  # Seekable gzip decompression, required to split a day file into line ranges.
+except ImportError:
+    indexed_gzip = None
+
+# Access time of a log, such as [01/Mar/2023:10:15:32 +0100].
+TIMESTAMP_REGEX = re.compile(rb'\[(\d{1,2}/\w{3}/\d{1,4}):(\d{2}:\d{2}:\d{2} [+-]\d{4})\]')
+
+class LogIndex:
+    """
+    A seek index of a compressed day log file, used to process disjoint line ranges of one file in parallel.
+
+    Building the index decompresses the file once with indexed_gzip, which records a seek point every
+    `SPACING` bytes of decompressed data, and records a line checkpoint, the offset of the first line starting
+    after every `CHECKPOINT_BYTES`, together with the newest access time of the lines before it. Both are saved
+    next to the log file, as `<file>.gzidx` and `<file>.gzidx.json`, and reused while the log file is unchanged.
+
+    Ranges start and end at line checkpoints. The newest access time before each checkpoint tells how far back a
+    range must replay earlier logs so that its double-click window starts as in a serial run.
+
+    Attributes:
+        SPACING (int): The number of decompressed bytes between seek points.
+        CHECKPOINT_BYTES (int): The number of decompressed bytes between line checkpoints.
+        READ_SIZE (int): The number of decompressed bytes scanned at a time while building the index.
+        VERSION (int): The version of the checkpoint file format.
+
+    Methods:
+        ensure_available() -> None:
+            Ensures the indexed_gzip library is installed.
+        build(path: Path) -> dict:
+            Builds the index of a log file, unless an up-to-date index already exists.
+        load(path: Path) -> dict | None:
+            Returns the up-to-date index of a log file.
+        ranges(index: dict, range_bytes: int) -> List[Tuple[int, int]]:
+            Splits an indexed log file into line ranges.
+        warm_up_points(index: dict, start: int) -> List[Tuple[int, int]]:
+            Returns the checkpoints from which the logs preceding a range can be replayed.
+        open(path: Path, offset: int) -> BinaryIO:
+            Opens the decompressed data of a log file at an offset.
+        _paths(path: Path) -> Tuple[Path, Path]:
+            Returns the paths of the seek points and checkpoints of a log file.
+        _newest(data: bytes, start: int, end: int) -> int:
+            Returns the newest access time of the logs in a slice of decompressed data.
+        _timestamp(date: bytes, time: bytes) -> int:
+            Converts an access time to a UNIX timestamp.
+    """
+
+    SPACING = 4194304  # 4 MiB of decompressed data between seek points.
+    CHECKPOINT_BYTES = 4194304  # 4 MiB of decompressed data between line checkpoints.
+    READ_SIZE = 1048576  # 1 MiB scanned at a time while building the index.
+    VERSION = 1  # Version of the checkpoint file format.
+
+    @staticmethod
+    def ensure_available() -> None:
+        """
+        Ensures the indexed_gzip library is installed.
+
+        Raises:
+            ImportError: If the indexed_gzip package is not installed.
+        """
+        if indexed_gzip is None:
+            raise ImportError("The indexed_gzip package is required to split day log files into line ranges.")
+
+    @classmethod
+    def build(cls, path: Path) -> dict:
+        """
+        Builds the index of a log file, unless an up-to-date index already exists.
+
+        Args:
+            path (Path): The path of the compressed log file.
+
+        Returns:
+            dict: The index, with the decompressed size of the file and its line checkpoints as
+                `[offset, newest access time before the offset]` pairs.
+        """
+        index = cls.load(path)
+        if index is not None:
+            return index
+        cls.ensure_available()
+        seek_points_path, checkpoints_path = cls._paths(path)
+        source = Path(path).stat()
+        checkpoints = [[0, 0]]
+        newest = position = 0  # Newest access time seen, and decompressed offset of `pending`.
+        pending = b''  # The incomplete last line of the data read so far.
+        next_checkpoint = cls.CHECKPOINT_BYTES
+        with indexed_gzip.IndexedGzipFile(str(path), spacing=cls.SPACING, drop_handles=False, buffer_size=cls.SPACING) as file:
+            while block := file.read(cls.READ_SIZE):
+                data = pending + block
+                end = data.rfind(b'\n') + 1  # Only complete lines are scanned.
+                scanned = 0
+                while position + end >= next_checkpoint:
+                    cut = data.find(b'\n', next_checkpoint - position - 1, end) + 1
+                    newest = max(newest, cls._newest(data, scanned, cut))
+                    checkpoints.append([position + cut, newest])
+                    scanned = cut
+                    next_checkpoint = position + cut + cls.CHECKPOINT_BYTES
+                newest = max(newest, cls._newest(data, scanned, end))
+                pending = data[end:]
+                position += end
+            temporary_file = seek_points_path.with_name(seek_points_path.name + '.tmp')
+            file.export_index(str(temporary_file))
+            temporary_file.replace(seek_points_path)
+
+        size = position + len(pending)
+        index = {
+            'version': cls.VERSION,
+            'source_bytes': source.st_size,
+            'source_mtime_ns': source.st_mtime_ns,
+            'size': size,
+            'checkpoints': [checkpoint for checkpoint in checkpoints if checkpoint[0] < size]
+        }
+        temporary_file = checkpoints_path.with_name(checkpoints_path.name + '.tmp')
+        temporary_file.write_text(json.dumps(index))
+        temporary_file.replace(checkpoints_path)
+        return index
+
+    @classmethod
+    def load(cls, path: Path) -> dict | None:
+        """
+        Returns the index of a log file, if it exists and was built from the current version of the file.
+
+        Args:
+            path (Path): The path of the compressed log file.
+
+        Returns:
+            dict | None: The index, or None if it must be built.
+        """
+        seek_points_path, checkpoints_path = cls._paths(path)
+        if not (seek_points_path.exists() and checkpoints_path.exists()):
+            return None
+        try:
+            index = json.loads(checkpoints_path.read_text())
+        except ValueError:
+            return None
+        source = Path(path).stat()
+        if (index.get('version'), index.get('source_bytes'), index.get('source_mtime_ns')) != \
+                (cls.VERSION, source.st_size, source.st_mtime_ns):
+            return None
+        return index
+
+    @staticmethod
+    def ranges(index: dict, range_bytes: int) -> List[Tuple[int, int]]:
+        """
+        Splits an indexed log file into line ranges of at least `range_bytes` decompressed bytes, except the last one.
+
+        Args:
+            index (dict): The index of the log file.
+            range_bytes (int): The minimum number of decompressed bytes of a range.
+
+        Returns:
+            List[Tuple[int, int]]: The start and end offsets of each range, covering the whole file in order.
+        """
+        starts = [0]
+        for offset, _ in index['checkpoints'][1:]:
+            if offset - starts[-1] >= range_bytes:
+                starts.append(offset)
+        return list(zip(starts, starts[1:] + [index['size']]))
+
+    @staticmethod
+    def warm_up_points(index: dict, start: int) -> List[Tuple[int, int]]:
+        """
+        Returns the checkpoints before the start of a range, nearest first.
+
+        Args:
+            index (dict): The index of the log file.
+            start (int): The start offset of the range.
+
+        Returns:
+            List[Tuple[int, int]]: The offset of each checkpoint and the newest access time of the logs before it.
+        """
+        return [(offset, newest) for offset, newest in reversed(index['checkpoints']) if offset < start]
+
+    @classmethod
+    def open(cls, path: Path, offset: int) -> BinaryIO:
+        """
+        Opens the decompressed data of an indexed log file at an offset.
+
+        Args:
+            path (Path): The path of the compressed log file.
+            offset (int): The decompressed offset to start reading at.
+
+        Returns:
+            BinaryIO: The decompressed data, positioned at the offset.
+        """
+        cls.ensure_available()
+        seek_points_path, _ = cls._paths(path)
+        file = indexed_gzip.IndexedGzipFile(
+            str(path), index_file=str(seek_points_path), drop_handles=False, buffer_size=cls.SPACING
+        )
+        file.seek(offset)
+        return file
+
+    @staticmethod
+    def _paths(path: Path) -> Tuple[Path, Path]:
+        """
+        Returns the paths of the seek points and checkpoints of a log file, saved next to it.
+
+        Args:
+            path (Path): The path of the compressed log file.
+
+        Returns:
+            Tuple[Path, Path]: The paths of the seek points and of the checkpoints.
+        """
+        path = Path(path)
+        return path.with_name(path.name + '.gzidx'), path.with_name(path.name + '.gzidx.json')
+
+    @classmethod
+    def _newest(cls, data: bytes, start: int, end: int) -> int:
+        """
+        Returns the newest access time of the logs in a slice of decompressed data.
+
+        Any bracketed access time of a line is taken into account, which can only make the result newer.
+
+        Args:
+            data (bytes): The decompressed data.
+            start (int): The start of the slice.
+            end (int): The end of the slice.
+
+        Returns:
+            int: The newest access time as a UNIX timestamp, or 0 if there is none.
+        """
+        return max((cls._timestamp(date, time) for date, time in set(TIMESTAMP_REGEX.findall(data, start, end))), default=0)
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _timestamp(date: bytes, time: bytes) -> int:
+        """
+        Converts an access time to a UNIX timestamp.
+
+        Args:
+            date (bytes): The date, such as `01/Mar/2023`.
+            time (bytes): The time, such as `10:15:32 +0100`.
+
+        Returns:
+            int: The UNIX timestamp, or 0 if the access time is not valid.
+        """
+        try:
+            return to_timestamp(date.decode('ascii'), time.decode('ascii'))
+        except ValueError:
+            return 0
@@ -0,0 +1,309 @@
+from contextlib import closing  # For closing the block generator of the read-ahead thread.
+from queue import Queue, Full  # Bounded queue of decompressed blocks between the decompressor and the parser.
+from src.logs.utils.log_index import LogIndex  # Seek index used to read line ranges of a file.
+from typing import Iterator, List  # Type hints for the batches of lines.
+import codecs  # For decoding UTF-8 incrementally across block boundaries.
+import gzip  # For the error raised on files that are not gzip data.
+import io  # For the universal newline decoder and fast line splitting.
+import os  # For accessing environment variables.
+import shutil  # For locating external decompressors.
+import subprocess  # For running external decompressors such as pigz.
+import threading  # For reading blocks ahead in a background thread.
+import zlib  # For decompressing day log files in-process.
+
+class LogReader:
+    """
+    A streaming reader of compressed day log files that yields batches of lines.
+
+    Files are decompressed in large blocks, either in-process with zlib, which releases the GIL while
+    inflating, or through an external decompressor such as pigz. On machines with several CPUs, a background
+    thread reads blocks ahead and hands them to the parsing thread through a bounded queue. Line ranges of a
+    file indexed with `LogIndex` are read from its nearest seek point. Blocks are decoded and split into lines
+    in bulk, producing exactly the lines of `gzip.open(path, mode='rt', encoding='utf-8', errors='ignore')`:
+    invalid UTF-8 is dropped and `\\r\\n` and `\\r` line endings are translated to `\\n`.
+
+    Attributes:
+        READ_SIZE (int): The number of compressed bytes read from the file at a time.
+        BLOCK_SIZE (int): The maximum number of decompressed bytes per block.
+        QUEUE_SIZE (int): The number of decompressed blocks buffered ahead of the parser.
+
+    Methods:
+        batches(path, start: int = 0, end: int | None = None) -> Iterator[List[str]]:
+            Yields the lines of a compressed log file in batches.
+        lines(path, start: int = 0, end: int | None = None) -> Iterator[str]:
+            Yields the lines of a compressed log file one at a time.
+        _split(text: str) -> List[str]:
+            Splits decoded text into lines at `\\n` only.
+        _prefetch(path, start: int, end: int | None) -> Iterator[bytes]:
+            Yields the decompressed blocks of a file, read ahead by a background thread.
+        _read_ahead(path, start: int, end: int | None, blocks: Queue, stop: threading.Event) -> None:
+            Puts the decompressed blocks of a file in a queue.
+        _blocks(path, start: int, end: int | None) -> Iterator[bytes]:
+            Yields the decompressed blocks of a file.
+        _range_blocks(path, start: int, end: int | None) -> Iterator[bytes]:
+            Yields the decompressed blocks of a line range of an indexed file.
+        _inflate(stream, path) -> Iterator[bytes]:
+            Yields the decompressed blocks of a gzip stream.
+        _open(path) -> tuple:
+            Opens a file with the configured decompressor.
+    """
+
+    READ_SIZE = 1 << 18  # 256 KiB of compressed data read from the file at a time.
+    BLOCK_SIZE = 1 << 16  # 64 KiB of decompressed data per block, small enough to stay in the CPU cache.
+    QUEUE_SIZE = 32  # Blocks decompressed ahead of the parser.
+    LINE_BREAKS = '\x0b\x0c\x1c\x1d\x1e'  # Characters other than \n that str.splitlines breaks at in ASCII text.
+    UNICODE_LINE_BREAKS = LINE_BREAKS + '\x85\u2028\u2029'  # And in any text.
+
+    @classmethod
+    def batches(cls, path, start: int = 0, end: int | None = None) -> Iterator[List[str]]:
+        """
+        Yields the lines of a compressed log file in batches, one batch per decompressed block.
+
+        The decompressor is chosen with `LOGS_DECOMPRESSOR`: `zlib` (default) decompresses in-process, while
+        `pigz` or `gzip` pipe the file through that external command. On machines with more than one CPU,
+        blocks are read ahead in a background thread, so that decompression overlaps with parsing.
+
+        A line range of a file indexed with `LogIndex` is read from its nearest seek point instead.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset of the first line to read, a line start of an indexed file.
+            end (int | None): The decompressed offset where reading stops, a line start of an indexed file, or
+                None to read until the end of the file.
+
+        Yields:
+            List[str]: The next lines of the file, each ending with `\\n` except possibly the last one.
+        """
+        blocks = cls._prefetch(path, start, end) if (os.cpu_count() or 1) > 1 else cls._blocks(path, start, end)
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(errors='ignore'), translate=True)
+        remainder = ''
+        try:
+            for block in blocks:
+                text = decoder.decode(block)
+                if remainder:
+                    text = remainder + text
+                cut = text.rfind('\n') + 1  # The end of the last complete line.
+                remainder = text[cut:]
+                if cut:
+                    yield cls._split(text[:cut] if remainder else text)
+            text = remainder + decoder.decode(b'', final=True)
+            if text:
+                yield cls._split(text)
+        finally:
+            blocks.close()
+
+    @classmethod
+    def lines(cls, path, start: int = 0, end: int | None = None) -> Iterator[str]:
+        """
+        Yields the lines of a compressed log file one at a time.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset of the first line to read, see `batches`.
+            end (int | None): The decompressed offset where reading stops, see `batches`.
+
+        Yields:
+            str: The next line of the file.
+        """
+        for batch in cls.batches(path, start, end):
+            yield from batch
+
+    @classmethod
+    def _split(cls, text: str) -> List[str]:
+        """
+        Splits decoded text into lines at `\\n` only, keeping the line endings, as a text file does.
+
+        `str.splitlines` is used when the text has none of the other characters it breaks at, such as `\\x0c`
+        or `\\u2028`, which is the usual case and faster than splitting through `io.StringIO`.
+
+        Args:
+            text (str): The decoded text, with newlines already translated to `\\n`.
+
+        Returns:
+            List[str]: The lines of the text.
+        """
+        line_breaks = cls.LINE_BREAKS if text.isascii() else cls.UNICODE_LINE_BREAKS
+        if any(character in text for character in line_breaks):
+            return io.StringIO(text, newline='\n').readlines()
+        return text.splitlines(keepends=True)
+
+    @classmethod
+    def _prefetch(cls, path, start: int, end: int | None) -> Iterator[bytes]:
+        """
+        Yields the decompressed blocks of a file, read ahead by a background thread.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset to start reading at.
+            end (int | None): The decompressed offset to stop reading at, or None.
+
+        Yields:
+            bytes: The next decompressed block.
+        """
+        blocks = Queue(maxsize=cls.QUEUE_SIZE)
+        stop = threading.Event()
+        reader = threading.Thread(target=cls._read_ahead, args=(path, start, end, blocks, stop), daemon=True)
+        reader.start()
+        try:
+            while (block := blocks.get()) is not None:
+                if isinstance(block, BaseException):
+                    raise block
+                yield block
+        finally:
+            # Unblock and stop the reader if the consumer stops early.
+            stop.set()
+            while reader.is_alive():
+                while not blocks.empty():
+                    blocks.get_nowait()
+                reader.join(timeout=0.1)
+
+    @classmethod
+    def _read_ahead(cls, path, start: int, end: int | None, blocks: Queue, stop: threading.Event) -> None:
+        """
+        Puts the decompressed blocks of a file in a queue, followed by None, or by the exception that stopped it.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset to start reading at.
+            end (int | None): The decompressed offset to stop reading at, or None.
+            blocks (Queue): The queue receiving the decompressed blocks.
+            stop (threading.Event): Set when the consumer no longer needs blocks.
+        """
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    blocks.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        try:
+            with closing(cls._blocks(path, start, end)) as file_blocks:
+                for block in file_blocks:
+                    if not put(block):
+                        return
+            put(None)
+        except BaseException as e:
+            put(e)
+
+    @classmethod
+    def _blocks(cls, path, start: int, end: int | None) -> Iterator[bytes]:
+        """
+        Yields the decompressed blocks of a file.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset to start reading at.
+            end (int | None): The decompressed offset to stop reading at, or None.
+
+        Yields:
+            bytes: The next decompressed block.
+
+        Raises:
+            OSError: If the external decompressor fails.
+        """
+        if start or end is not None:
+            yield from cls._range_blocks(path, start, end)
+            return
+        stream, process = cls._open(path)
+        try:
+            with stream:
+                if process is not None:
+                    while block := stream.read(cls.BLOCK_SIZE):
+                        yield block
+                else:
+                    yield from cls._inflate(stream, path)
+            if process is not None and process.wait() != 0:
+                raise OSError(f"Decompressor exited with status {process.returncode} for {path}")
+        finally:
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+
+    @classmethod
+    def _range_blocks(cls, path, start: int, end: int | None) -> Iterator[bytes]:
+        """
+        Yields the decompressed blocks of a line range of a file indexed with `LogIndex`.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+            start (int): The decompressed offset to start reading at.
+            end (int | None): The decompressed offset to stop reading at, or None.
+
+        Yields:
+            bytes: The next decompressed block.
+        """
+        remaining = None if end is None else end - start
+        with LogIndex.open(path, start) as stream:
+            while remaining is None or remaining > 0:
+                block = stream.read(cls.BLOCK_SIZE if remaining is None else min(cls.BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                yield block
+
+    @classmethod
+    def _inflate(cls, stream, path) -> Iterator[bytes]:
+        """
+        Yields the decompressed blocks of a gzip stream, which may hold several concatenated members.
+
+        Inflating with zlib directly avoids the per-read overhead of `gzip.GzipFile`, while zlib still checks
+        the CRC and length of every member.
+
+        Args:
+            stream (BinaryIO): The compressed file.
+            path (Path | str): The path of the compressed log file, for error messages.
+
+        Yields:
+            bytes: The next decompressed block.
+
+        Raises:
+            EOFError: If the file ends in the middle of a member.
+            gzip.BadGzipFile: If a member does not start with the gzip magic number.
+            zlib.error: If a member is corrupt.
+        """
+        decompressor = zlib.decompressobj(wbits=31)
+        started = False  # Whether the current member has received any data.
+        while data := stream.read(cls.READ_SIZE):
+            while data:
+                if not started:
+                    data = data.lstrip(b'\x00')  # Zero padding between members, skipped as gzip does.
+                    if not data:
+                        break
+                    if not b'\x1f\x8b'.startswith(data[:2]):
+                        raise gzip.BadGzipFile(f"Not a gzipped file ({data[:2]!r}): {path}")
+                    started = True
+                if block := decompressor.decompress(data, cls.BLOCK_SIZE):
+                    yield block
+                data = decompressor.unconsumed_tail
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+                    started = False
+        if started:
+            raise EOFError(f"Compressed file ended before the end-of-stream marker was reached: {path}")
+
+    @staticmethod
+    def _open(path) -> tuple:
+        """
+        Opens a file with the decompressor configured in `LOGS_DECOMPRESSOR`.
+
+        An external decompressor that is not installed falls back to in-process zlib decompression.
+
+        Args:
+            path (Path | str): The path of the compressed log file.
+
+        Returns:
+            tuple: The output stream and process of the external decompressor, or the compressed file and None
+                when decompressing in-process.
+        """
+        decompressor = os.environ.get('LOGS_DECOMPRESSOR') or 'zlib'
+        if decompressor != 'zlib':
+            command = shutil.which(decompressor)
+            if command:
+                process = subprocess.Popen([command, '-dc', str(path)], stdout=subprocess.PIPE, bufsize=LogReader.BLOCK_SIZE)
+                return process.stdout, process
+            print(f"Decompressor {decompressor} not found, decompressing {path} with zlib")
+        return open(path, 'rb'), None
@@ -0,0 +1,131 @@
+from typing import Iterable, Tuple  # Type hints for the records loaded into the index.
+import sys  # Import sys to intern metadata strings and estimate the memory used by the index.
+
+class MetadataIndex:
+    """
+    A compact in-memory index of resource metadata, keyed by handle.
+
+    Handles such as `2117/12345` are stored as integers that combine a small code for the handle prefix with
+    the handle number, which is cheaper to hash and store than the string. Metadata strings are interned and
+    identical metadata dictionaries are shared between resources, since a few hundred combinations of
+    language, type and access cover the whole repository.
+
+    Attributes:
+        prefixes (dict[str, int]): The code of each handle prefix.
+        entries (dict[int | str, dict]): The shared metadata dictionary of each resource key.
+        values (dict[str, dict]): The shared metadata dictionaries, by their representation.
+
+    Methods:
+        load(records: Iterable[Tuple[str, dict]]) -> int:
+            Adds the metadata of many resources to the index.
+        add(resource: str, metadata: dict) -> None:
+            Adds the metadata of a resource to the index.
+        get(resource: str) -> dict:
+            Returns the metadata of a resource.
+        stats() -> dict:
+            Returns size and memory statistics of the index.
+        key(prefixes: dict, resource: str, create: bool) -> int | str | None:
+            Returns the key of a resource handle.
+    """
+
+    NUMBER_BITS = 40  # Bits reserved for the handle number in integer keys.
+    EMPTY = {}  # Metadata of resources missing from the index, shared and never modified.
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty index.
+        """
+        self.prefixes = {}
+        self.entries = {}
+        self.values = {}
+
+    def load(self, records: Iterable[Tuple[str, dict]]) -> int:
+        """
+        Adds the metadata of many resources to the index.
+
+        Args:
+            records (Iterable[Tuple[str, dict]]): The resource ids and their metadata.
+
+        Returns:
+            int: The number of records read.
+        """
+        count = 0
+        for resource, metadata in records:
+            self.add(resource, metadata)
+            count += 1
+        return count
+
+    def add(self, resource: str, metadata: dict) -> None:
+        """
+        Adds the metadata of a resource to the index.
+
+        Empty metadata values are dropped, and resources without any metadata are not stored, since they
+        enrich logs in the same way as missing resources.
+
+        Args:
+            resource (str): The resource id, such as `2117/12345`.
+            metadata (dict): The metadata of the resource.
+        """
+        metadata = {
+            key: sys.intern(value) if isinstance(value, str) else value
+            for key, value in metadata.items() if value
+        }
+        if not metadata:
+            return
+        shared = self.values.setdefault(repr(sorted(metadata.items())), metadata)
+        self.entries[self.key(self.prefixes, resource, create=True)] = shared
+
+    def get(self, resource: str) -> dict:
+        """
+        Returns the metadata of a resource.
+
+        Args:
+            resource (str): The resource id, such as `2117/12345`.
+
+        Returns:
+            dict: The shared metadata dictionary of the resource, or an empty dictionary if it is not indexed.
+                The returned dictionary must not be modified.
+        """
+        return self.entries.get(self.key(self.prefixes, resource, create=False), self.EMPTY)
+
+    def stats(self) -> dict:
+        """
+        Returns size and memory statistics of the index.
+
+        The memory estimate covers the index containers, keys and shared dictionaries, not the interned strings.
+
+        Returns:
+            dict: The number of resources, of distinct metadata dictionaries and the estimated memory in bytes.
+        """
+        memory = sys.getsizeof(self.entries) + sys.getsizeof(self.values)
+        memory += sum(sys.getsizeof(key) for key in self.entries)
+        memory += sum(sys.getsizeof(value) for value in self.values.values())
+        return {
+            'resources': len(self.entries),
+            'distinct_values': len(self.values),
+            'memory_bytes': memory
+        }
+
+    @classmethod
+    def key(cls, prefixes: dict, resource: str, create: bool) -> int | str | None:
+        """
+        Returns the key of a resource handle.
+
+        Args:
+            prefixes (dict[str, int]): The code of each handle prefix, extended in place when creating codes.
+            resource (str): The resource id, such as `2117/12345`.
+            create (bool): Whether to assign a code to a handle prefix seen for the first time.
+
+        Returns:
+            int | str | None: An integer combining the prefix code and the handle number, the resource id itself
+                if it is not a canonical numeric handle, or None if the prefix is unknown and no code is created.
+        """
+        prefix, _, number = resource.partition('/')
+        if not (number.isascii() and number.isdigit()) or number[0] == '0' or int(number) >> cls.NUMBER_BITS:
+            return resource  # Keep ids that would not round-trip through an integer as strings.
+        code = prefixes.get(prefix)
+        if code is None:
+            if not create:
+                return None
+            code = prefixes[prefix] = len(prefixes)
+        return code << cls.NUMBER_BITS | int(number)
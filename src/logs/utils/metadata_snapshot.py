@@ -0,0 +1,168 @@
+from array import array  # Import array to write the key and value index arrays.
+from bisect import bisect_left  # Import bisect_left to search the sorted key array.
+from pathlib import Path  # Import Path for handling file paths.
+from src.logs.utils.metadata_index import MetadataIndex  # Import MetadataIndex to build snapshots and encode keys.
+from typing import Iterable, Tuple  # Type hints for the records exported to a snapshot.
+import json  # Import json to store the value table.
+import mmap  # Import mmap to share the snapshot pages between processes.
+import os  # Import os for accessing environment variables.
+import struct  # Import struct to read and write the snapshot header.
+import sys  # Import sys for the command-line arguments of the export.
+
+class MetadataSnapshot:
+    """
+    A read-only, memory-mapped snapshot of resource metadata.
+
+    The snapshot file holds a header, the sorted integer keys of the resources (see `MetadataIndex.key`),
+    the index of each resource's metadata in the value table, and a JSON value table with the handle prefix
+    codes, the distinct metadata dictionaries and the resources whose ids are not numeric handles. Lookups
+    binary-search the mapped key array without copying it, so every process that opens the snapshot shares
+    the same page-cached file.
+
+    Attributes:
+        file (BinaryIO): The open snapshot file.
+        mapping (mmap.mmap): The memory mapping of the snapshot file.
+        keys (memoryview): The sorted resource keys.
+        value_indexes (memoryview): The index in `values` of the metadata of each key.
+        prefixes (dict[str, int]): The code of each handle prefix.
+        values (list[dict]): The distinct metadata dictionaries.
+        extra (dict[str, int]): The value index of the resources whose ids are not numeric handles.
+
+    Methods:
+        export(path: Path, records: Iterable[Tuple[str, dict]]) -> dict:
+            Writes the metadata of many resources to a snapshot file.
+        get(resource: str) -> dict:
+            Returns the metadata of a resource.
+        stats() -> dict:
+            Returns size statistics of the snapshot.
+        close() -> None:
+            Releases the memory mapping and the file.
+    """
+
+    MAGIC = b'OSTIAMD1'  # Identifies snapshot files and their format version.
+    HEADER = struct.Struct('<8sQQQ')  # Magic, byte order marker, number of keys and value table size.
+
+    def __init__(self, path: Path) -> None:
+        """
+        Opens and memory-maps a snapshot file.
+
+        Args:
+            path (Path): The path of the snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot or was written on a machine with another byte order.
+        """
+        self.file = open(path, 'rb')
+        self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order, key_count, table_size = self.HEADER.unpack_from(self.mapping)
+        if magic != self.MAGIC or byte_order != int.from_bytes(b'\x01\x02', sys.byteorder):
+            self.close()
+            raise ValueError(f"{path} is not a metadata snapshot for this machine.")
+
+        view = memoryview(self.mapping)
+        keys_end = self.HEADER.size + key_count * 8
+        indexes_end = keys_end + key_count * 4
+        self.keys = view[self.HEADER.size:keys_end].cast('Q')
+        self.value_indexes = view[keys_end:indexes_end].cast('I')
+        table = json.loads(self.mapping[indexes_end:indexes_end + table_size])
+        self.prefixes = table['prefixes']
+        self.values = table['values']
+        self.extra = table['extra']
+
+    @classmethod
+    def export(cls, path: Path, records: Iterable[Tuple[str, dict]]) -> dict:
+        """
+        Writes the metadata of many resources to a snapshot file.
+
+        The file is written through a temporary name, so that readers never map a partial snapshot.
+
+        Args:
+            path (Path): The path of the snapshot file.
+            records (Iterable[Tuple[str, dict]]): The resource ids and their metadata.
+
+        Returns:
+            dict: The number of records read, of resources and distinct values stored, and the file size.
+        """
+        index = MetadataIndex()
+        records = index.load(records)
+
+        # Number the distinct metadata dictionaries and split numeric keys from string ids.
+        value_numbers = {id(value): number for number, value in enumerate(index.values.values())}
+        numeric_keys = sorted(key for key in index.entries if isinstance(key, int))
+        table = {
+            'prefixes': index.prefixes,
+            'values': list(index.values.values()),
+            'extra': {
+                key: value_numbers[id(value)] for key, value in index.entries.items() if isinstance(key, str)
+            }
+        }
+        table_bytes = json.dumps(table, ensure_ascii=False).encode('utf-8')
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file = path.with_name(path.name + '.tmp')
+        with open(temporary_file, 'wb') as file:
+            byte_order = int.from_bytes(b'\x01\x02', sys.byteorder)
+            file.write(cls.HEADER.pack(cls.MAGIC, byte_order, len(numeric_keys), len(table_bytes)))
+            array('Q', numeric_keys).tofile(file)
+            array('I', (value_numbers[id(index.entries[key])] for key in numeric_keys)).tofile(file)
+            file.write(table_bytes)
+        temporary_file.replace(path)
+        return {
+            'records': records,
+            'resources': len(index.entries),
+            'distinct_values': len(index.values),
+            'file_bytes': path.stat().st_size
+        }
+
+    def get(self, resource: str) -> dict:
+        """
+        Returns the metadata of a resource.
+
+        Args:
+            resource (str): The resource id, such as `2117/12345`.
+
+        Returns:
+            dict: The shared metadata dictionary of the resource, or an empty dictionary if it is not in the
+                snapshot. The returned dictionary must not be modified.
+        """
+        key = MetadataIndex.key(self.prefixes, resource, create=False)
+        if key is None:
+            return MetadataIndex.EMPTY
+        if isinstance(key, str):
+            number = self.extra.get(key)
+            return MetadataIndex.EMPTY if number is None else self.values[number]
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self.values[self.value_indexes[position]]
+        return MetadataIndex.EMPTY
+
+    def stats(self) -> dict:
+        """
+        Returns size statistics of the snapshot.
+
+        Returns:
+            dict: The number of resources, of distinct metadata dictionaries and the size of the mapped file.
+        """
+        return {
+            'resources': len(self.keys) + len(self.extra),
+            'distinct_values': len(self.values),
+            'file_bytes': len(self.mapping)
+        }
+
+    def close(self) -> None:
+        """
+        Releases the memory mapping and the file.
+        """
+        for attribute in ('keys', 'value_indexes'):
+            if hasattr(self, attribute):
+                getattr(self, attribute).release()
+        self.mapping.close()
+        self.file.close()
+
+if __name__ == "__main__":
+    # Export the metadata used to enrich logs: python src/logs/utils/metadata_snapshot.py [snapshot_path]
+    from src.metadata.forwarder.mongodb_forwarder import MongoDbForwarder
+    snapshot_path = Path(sys.argv[1] if len(sys.argv) > 1 else os.environ.get('METADATA_SNAPSHOT_PATH', '').strip())
+    print(f"Exported metadata snapshot to {snapshot_path}: {MetadataSnapshot.export(snapshot_path, MongoDbForwarder.iter_metadata())}")
+    MongoDbForwarder.close()
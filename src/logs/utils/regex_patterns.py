@@ -29,3 +29,13 @@ SEARCH_KEYS = [
     'e-prints', 'eprintsrecercat?', 'revistes?', 'tesis'  # Keywords for repositories, journals, and theses.
 ]
 # SEARCH_KEYS is used to identify log entries that relate to specific search or content access actions.
+
+# Regex pattern for parsing a whole Apache combined log line in a single pass.
+COMBINED_LOG_FORMAT = (
+    r'([0-9]+\.[0-9]+\.[0-9]+\.[0-9]+) [^\s\[/"]+ [^\s\[/"]+ '
+    r'\[(\d{1,2}/\w{3}/\d{1,4}):(\d{2}:\d{2}:\d{2} [+-]\d{4})\] '
+    r'"([^\s"]+) ([^\s"]+) ([^\s"]*HTTP[^\s"]*)" '
+    r'(\d+) (-|\d+) "([^"\n]*)" "([^"\n]*)"'
+)
+# Captures IP, date, time, method, resource, version, status code, response size, referer and user agent
+# of a well-formed line. Lines that do not match are handled by the multi-regex fallback in ToJSON.
@@ -0,0 +1,85 @@
+from functools import lru_cache  # Cache of the classification of repeated resources.
+from src.logs.utils.constants import LABEL_TYPE_OTHERS, LABEL_TYPE_SEARCH, LABEL_TYPE_RESOURCE, LABEL_TYPE_RESOURCE_BITSTREAM, LABEL_TYPE_BITSTREAM, LABEL_TYPE_RESOURCE_WEB
+from src.logs.utils.regex_patterns import BITSTREAM, HANDLE, HANDLE_BITSTREAM, SEARCH_KEYS, WEB_EXTENSIONS
+import re  # For the fused classification regex.
+
+BITSTREAM_PATH = '/bitstream'  # A HANDLE match must not follow it.
+
+# The resource patterns in order of precedence, each rewritten to start with a literal character, so that the
+# fused regex skips quickly to the positions where any of them can match. The lookbehind of HANDLE is checked
+# separately, the leading `.*` of WEB_EXTENSIONS is dropped since a match may start anywhere, and an empty
+# group ends the patterns without a resource id, so that the last matched group tells which one matched.
+RESOURCE_PATTERNS = [
+    (LABEL_TYPE_RESOURCE, HANDLE.removeprefix(f'(?<!{BITSTREAM_PATH})'), True),
+    (LABEL_TYPE_RESOURCE_BITSTREAM, '/bitstream/handle/' + HANDLE_BITSTREAM.removeprefix('(?<=/bitstream/handle/)'), True),
+    (LABEL_TYPE_BITSTREAM, BITSTREAM + '()', False),
+    (LABEL_TYPE_RESOURCE_WEB, WEB_EXTENSIONS.removeprefix('.*') + '()', False),
+] + [(LABEL_TYPE_SEARCH, re.escape(key) + '()', False) for key in dict.fromkeys(SEARCH_KEYS)]
+
+RESOURCE_REGEX = re.compile('|'.join(pattern for _, pattern, _ in RESOURCE_PATTERNS))
+
+def _resource_groups() -> dict:
+    """
+    Maps the index of every group of RESOURCE_REGEX to the pattern it belongs to.
+
+    Returns:
+        dict: The precedence, label type and index of the resource id group of the pattern, or None for the
+            patterns without a resource id, by group index.
+    """
+    precedence = list(dict.fromkeys(label_type for label_type, _, _ in RESOURCE_PATTERNS))
+    groups = {}
+    offset = 0
+    for label_type, pattern, has_id in RESOURCE_PATTERNS:
+        count = re.compile(pattern).groups
+        for index in range(offset + 1, offset + count + 1):
+            groups[index] = (precedence.index(label_type), label_type, offset + 1 if has_id else None)
+        offset += count
+    return groups
+
+RESOURCE_GROUPS = _resource_groups()
+
+class ResourceClassifier:
+    """
+    A classifier of requested resources that replaces the chain of `AccessResource`, `AccessResourceBitstream`,
+    `AccessBitstream`, `WebResource` and `SearchResource` filters and the handle id transformers.
+
+    A single compiled regex finds the matches of every resource pattern in one scan of the resource, and the
+    type with the highest precedence wins, as in the filter chain. The results are cached, since popular
+    resources are requested many times.
+
+    Methods:
+        classify(resource: str) -> tuple[str, str | None]:
+            Returns the type of a resource and its handle id.
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def classify(resource: str) -> tuple[str, str | None]:
+        """
+        Returns the type of a resource and, for handles, its id.
+
+        The scan resumes one character after the start of each match, so that overlapping matches of other
+        patterns are found too, and stops at the first HANDLE match.
+
+        Args:
+            resource (str): The requested resource, such as `/handle/2117/12345`.
+
+        Returns:
+            tuple[str, str | None]: The label type of the resource, and the id of the first matching handle, such as
+                `2117/12345`, for resources and bitstream resources, or None for other types.
+        """
+        best = None
+        position = 0
+        while match := RESOURCE_REGEX.search(resource, position):
+            position = match.start() + 1
+            group = RESOURCE_GROUPS[match.lastindex]
+            if group[1] == LABEL_TYPE_RESOURCE and resource.endswith(BITSTREAM_PATH, 0, match.start()):
+                continue
+            if best is None or group[0] < best[0][0]:
+                best = group, match
+                if group[0] == 0:
+                    break
+        if best is None:
+            return LABEL_TYPE_OTHERS, None
+        (_, label_type, id_group), match = best
+        return label_type, None if id_group is None else match.group(id_group)
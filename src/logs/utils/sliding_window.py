@@ -0,0 +1,126 @@
+import heapq  # Import heapq to keep the per-second buckets ordered by time.
+import sys  # Import sys to estimate the memory used by the window.
+
+class SlidingWindow:
+    """
+    A sliding time window that remembers when each key was last seen.
+
+    Keys are grouped in per-second buckets ordered by a min-heap, so that expiring old keys only
+    touches the buckets that have fallen out of the window. Each access costs amortized O(1),
+    regardless of how many keys are live.
+
+    Attributes:
+        seconds (int): The length of the window in seconds.
+        last_seen (dict): The last access time of each live key.
+        buckets (dict[int, set]): The live keys grouped by their last access time.
+        bucket_times (list[int]): A min-heap with the times of the existing buckets.
+        peak_keys (int): The largest number of live keys observed.
+
+    Methods:
+        hit(key, timestamp: int) -> bool:
+            Records an access and tells whether the key was still inside the window.
+        clear() -> None:
+            Forgets all keys and the peak occupancy.
+        stats() -> dict:
+            Returns occupancy and memory statistics of the window.
+        newest() -> int | None:
+            Returns the newest access time recorded.
+        _expire(threshold: int) -> None:
+            Removes the keys last seen at or before the given time.
+    """
+
+    def __init__(self, seconds: int) -> None:
+        """
+        Initializes an empty sliding window.
+
+        Args:
+            seconds (int): The length of the window in seconds.
+        """
+        self.seconds = seconds
+        self.last_seen = {}
+        self.buckets = {}
+        self.bucket_times = []
+        self.peak_keys = 0
+
+    def hit(self, key, timestamp: int) -> bool:
+        """
+        Records an access to a key.
+
+        Keys last seen `seconds` or more before the given timestamp are expired first. The access then
+        becomes the key's last access time, whether or not the key was still inside the window.
+
+        Args:
+            key (Hashable): The key being accessed.
+            timestamp (int): The access time in seconds since the epoch.
+
+        Returns:
+            bool: True if the key was still inside the window, False otherwise.
+        """
+        self._expire(timestamp - self.seconds)
+
+        previous = self.last_seen.get(key)
+        if previous is not None:
+            self.buckets[previous].discard(key)  # Move the key out of its previous bucket.
+        self.last_seen[key] = timestamp
+
+        bucket = self.buckets.get(timestamp)
+        if bucket is None:
+            bucket = self.buckets[timestamp] = set()
+            heapq.heappush(self.bucket_times, timestamp)
+        bucket.add(key)
+
+        if len(self.last_seen) > self.peak_keys:
+            self.peak_keys = len(self.last_seen)
+        return previous is not None
+
+    def clear(self) -> None:
+        """
+        Forgets all keys and the peak occupancy.
+        """
+        self.last_seen.clear()
+        self.buckets.clear()
+        self.bucket_times.clear()
+        self.peak_keys = 0
+
+    def stats(self) -> dict:
+        """
+        Returns occupancy and memory statistics of the window.
+
+        The memory estimate covers the window's own containers, not the keys they reference.
+
+        Returns:
+            dict: The number of live keys, the peak number of live keys, the number of buckets,
+                the time span covered by the buckets and the estimated memory in bytes.
+        """
+        memory = sys.getsizeof(self.last_seen) + sys.getsizeof(self.buckets) + sys.getsizeof(self.bucket_times)
+        memory += sum(sys.getsizeof(bucket) for bucket in self.buckets.values())
+        return {
+            'keys': len(self.last_seen),
+            'peak_keys': self.peak_keys,
+            'buckets': len(self.buckets),
+            'span_seconds': max(self.buckets) - self.bucket_times[0] if self.buckets else 0,
+            'memory_bytes': memory
+        }
+
+    def newest(self) -> int | None:
+        """
+        Returns the newest access time recorded since the window was cleared.
+
+        The bucket of the newest access is never expired, since expiring it takes an even newer access.
+
+        Returns:
+            int | None: The newest access time in seconds since the epoch, or None if there was no access.
+        """
+        return max(self.buckets) if self.buckets else None
+
+    def _expire(self, threshold: int) -> None:
+        """
+        Removes the keys last seen at or before the given time.
+
+        Args:
+            threshold (int): The latest access time, in seconds since the epoch, that is expired.
+        """
+        bucket_times = self.bucket_times
+        while bucket_times and bucket_times[0] <= threshold:
+            for key in self.buckets.pop(heapq.heappop(bucket_times)):
+                del self.last_seen[key]
@@ -1,5 +1,6 @@
 from src.metadata.filter.filter_interface import IFilter  # Import the IFilter interface to define a standard filtering structure.
 from src.metadata.utils.constants import RECORD_DELETED, HEADER_STATUS_KEY  # Import constants for deleted record status and header key.
+from typing import Any  # Import Any for the type of XML elements.
 
 class RecordDeleted(IFilter):
     """
@@ -11,6 +12,8 @@ class RecordDeleted(IFilter):
     Methods:
         filter(record: dict) -> bool:
             Checks if the given record's status in the header indicates it is deleted.
+        filter_header(header: Any) -> bool:
+            Checks if the status of an XML record header indicates it is deleted.
     """
 
     @classmethod
@@ -27,3 +30,16 @@ class RecordDeleted(IFilter):
         """
         # Check the 'header' field in the record and return True if the status matches `RECORD_DELETED`.
         return record['header'].get(HEADER_STATUS_KEY) == RECORD_DELETED
+
+    @classmethod
+    def filter_header(cls, header: Any) -> bool:
+        """
+        Determines if the given XML record header has a status of 'deleted'.
+
+        Args:
+            header (Any): The lxml `header` element of a record.
+
+        Returns:
+            bool: True if the `status` attribute of the header matches the `RECORD_DELETED` constant, False otherwise.
+        """
+        return header.get('status') == RECORD_DELETED
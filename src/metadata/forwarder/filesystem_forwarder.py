@@ -13,29 +13,33 @@ class FileSystemForwarder(IForwarder):
         output_path (Path): The base directory for saving metadata files, derived from the environment variable `METADATA_OUTPUT_PATH`.
 
     Methods:
-        forward(metadata_list: list[dict], batch: int) -> int:
+        forward(metadata_list: list[dict], batch: int, partition: str | None = None) -> int:
             Saves a list of metadata records to a JSON file in the appropriate folder.
-        _get_subfolder(batch: int) -> Path:
+        forward_deleted(resource_ids: list[str], batch: int, partition: str | None = None) -> int:
+            Saves the IDs of the deleted records of a batch to a JSON file next to its metadata.
+        _get_subfolder(batch: int, partition: str | None = None) -> Path:
             Determines and creates the appropriate subfolder for a given batch.
     """
 
     folder_size = 1000  # Number of batches per folder.
-    output_path = Path(os.environ.get('METADATA_OUTPUT_PATH'))  # Base path for storing metadata files.
+    output_path = Path(os.environ.get('METADATA_OUTPUT_PATH', ''))  # Base path for storing metadata files.
 
     @classmethod
-    def forward(cls, metadata_list: list[dict], batch: int) -> int:
+    def forward(cls, metadata_list: list[dict], batch: int, partition: str | None = None) -> int:
         """
         Saves a list of metadata records to a JSON file.
 
         Args:
             metadata_list (list[dict]): A list of metadata records to save.
             batch (int): The current batch number used for naming files and determining the folder.
+            partition (str | None): The harvest partition of the records, whose batches are kept in a
+                subdirectory of the same name, or None for an unpartitioned harvest.
 
         Returns:
             int: 0 if the metadata was successfully written, 1 if an error occurred.
         """
         # Determine the appropriate subfolder for the batch.
-        folder = cls._get_subfolder(batch)
+        folder = cls._get_subfolder(batch, partition)
         
         # Construct the file name and full file path.
         filename = f"{batch}_{batch + SIZE_RECORDS_LIST}.metadata.json"
@@ -54,12 +58,35 @@ class FileSystemForwarder(IForwarder):
             return 1
 
     @classmethod
-    def _get_subfolder(cls, batch: int) -> Path:
+    def forward_deleted(cls, resource_ids: list[str], batch: int, partition: str | None = None) -> int:
+        """
+        Saves the IDs of the deleted records of a batch to a JSON file next to its metadata file, so that the
+        deletions can be applied when the metadata is ingested.
+
+        Args:
+            resource_ids (list[str]): The IDs of the records flagged as deleted.
+            batch (int): The current batch number used for naming files and determining the folder.
+            partition (str | None): The harvest partition of the records, or None for an unpartitioned harvest.
+
+        Returns:
+            int: 0 if the IDs were successfully written, 1 if an error occurred.
+        """
+        file_path = cls._get_subfolder(batch, partition) / f"{batch}_{batch + SIZE_RECORDS_LIST}.deleted.json"
+        try:
+            file_path.write_text(json.dumps(resource_ids, indent=4), encoding='utf-8')
+            return 0
+        except Exception as e:
+            print(f"Error writing deleted records to {file_path}: {e}")
+            return 1
+
+    @classmethod
+    def _get_subfolder(cls, batch: int, partition: str | None = None) -> Path:
         """
         Determines and creates the appropriate subfolder for a given batch.
 
         Args:
             batch (int): The current batch number.
+            partition (str | None): The harvest partition of the batch, or None for an unpartitioned harvest.
 
         Returns:
             Path: The Path object representing the subfolder.
@@ -70,8 +97,8 @@ class FileSystemForwarder(IForwarder):
         # Construct the folder name based on the batch range.
         folder_name = f"batch_{batch_start}_{batch_start + cls.folder_size}"
         
-        # Create the full folder path.
-        path = cls.output_path / folder_name
+        # Create the full folder path, inside the directory of the partition if any.
+        path = (cls.output_path if partition is None else cls.output_path / partition) / folder_name
         
         # Ensure the folder exists, creating it if necessary.
         path.mkdir(parents=True, exist_ok=True)
@@ -1,10 +1,13 @@
 from pathlib import Path  # Import Path for handling file paths.
-from pymongo import MongoClient  # Import MongoClient for MongoDB connections.
+from pymongo import MongoClient, ReplaceOne  # Import MongoClient for MongoDB connections and ReplaceOne for upserts.
 from pymongo.collection import Collection  # Import Collection for MongoDB collection operations.
+from pymongo.errors import BulkWriteError  # Import the error of a bulk write with failed operations.
 from src.metadata.forwarder.forwarder_interface import IForwarder  # Import the IForwarder interface for standardizing forwarders.
-from typing import Optional  # Import Optional for type hinting optional attributes.
+from typing import Dict, Iterator, List, Optional, Tuple  # Import type hints for optional attributes and metadata lookups.
+import itertools  # Import itertools for splitting the upserts into chunks.
 import json  # Import json for reading and processing metadata files.
 import os  # Import os for accessing environment variables.
+import threading  # Import threading for sharing the client between concurrent ingests.
 
 class MongoDbForwarder(IForwarder):
     """
@@ -16,10 +19,16 @@ class MongoDbForwarder(IForwarder):
         mongodb_collection_name (Optional[str]): The name of the MongoDB collection.
         mongoDbClient (Optional[MongoClient]): The MongoDB client instance.
         mongoDbCollection (Optional[Collection]): The MongoDB collection instance.
+        METADATA_PROJECTION (dict): The projection of the metadata fields used to enrich logs.
+        UPSERT_CHUNK_SIZE (int): The default number of records of each bulk write of `upsert`.
 
     Methods:
         forward(metadata_path: Path) -> int:
             Sends metadata from the given file to the MongoDB collection.
+        upsert(metadata_path: Path, chunk_size: Optional[int]) -> Dict[str, int]:
+            Inserts or replaces the metadata from the given file in the MongoDB collection, in unordered bulk writes.
+        delete(resource_ids: List[str]) -> int:
+            Deletes the metadata of the given resources from the MongoDB collection.
         close() -> None:
             Closes the MongoDB client connection.
         _preprocess_metadata(metadata_path: Path) -> list:
@@ -32,6 +41,12 @@ class MongoDbForwarder(IForwarder):
             Counts the number of documents in the MongoDB collection.
         get_metadata_by_id(resource_id: str) -> dict:
             Retrieves metadata for a specific resource by ID.
+        get_metadata_by_ids(resource_ids: List[str]) -> Dict[str, dict]:
+            Retrieves metadata for many resources with a single query.
+        iter_metadata(batch_size: int) -> Iterator[Tuple[str, dict]]:
+            Iterates over the metadata of every resource in the collection.
+        _to_metadata(result: dict) -> dict:
+            Maps a projected document to the metadata fields used to enrich logs.
     """
 
     # MongoDB connection details and client/collection placeholders.
@@ -40,6 +55,15 @@ class MongoDbForwarder(IForwarder):
     mongodb_collection_name: Optional[str] = None
     mongoDbClient: Optional[MongoClient] = None
     mongoDbCollection: Optional[Collection] = None
+    _client_lock = threading.Lock()  # Guards the creation of the client shared by concurrent ingests.
+    # Metadata fields used to enrich logs.
+    METADATA_PROJECTION = {
+        "metadata.dc-language-iso": 1,
+        "metadata.dc-type": 1,
+        "metadata.dc-rights-access": 1,
+        "_id": 0
+    }
+    UPSERT_CHUNK_SIZE = 1000
 
     @classmethod
     def forward(cls, metadata_path: Path) -> int:
@@ -65,6 +89,83 @@ class MongoDbForwarder(IForwarder):
             print(f"Error while forwarding metadata: {e}")
             return 1
 
+    @classmethod
+    def upsert(cls, metadata_path: Path, chunk_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Inserts or replaces the metadata from the given file in the MongoDB collection, matching records by `id`,
+        so that changed records replace their previous version instead of failing on the unique index.
+
+        The records are sent in unordered bulk writes of `chunk_size` `ReplaceOne` operations, so a failed record
+        does not stop the others, and ingesting the same file again leaves the collection unchanged. The
+        collection and its connection pool are shared, so several files can be upserted concurrently.
+
+        Args:
+            metadata_path (Path): The path to the metadata file.
+            chunk_size (Optional[int]): The number of records of each bulk write, or None for
+                `METADATA_INGEST_CHUNK_SIZE` (`UPSERT_CHUNK_SIZE` by default).
+
+        Returns:
+            Dict[str, int]: The number of records `inserted`, `updated`, `unchanged` (already identical) and
+                `failed`, which also counts the records without `id` and is 1 if the file cannot be read.
+        """
+        chunk_size = chunk_size or int(os.environ.get('METADATA_INGEST_CHUNK_SIZE') or cls.UPSERT_CHUNK_SIZE)
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        try:
+            print(f"Upserting metadata from: {metadata_path}")
+            collection = cls._get_mongodb_collection()
+            metadata_list = cls._preprocess_metadata(metadata_path)
+        except Exception as e:
+            print(f"Error while upserting metadata: {e}")
+            stats['failed'] = 1
+            return stats
+
+        # Records without ID cannot be matched, so they are left out.
+        stats['failed'] = sum(1 for metadata in metadata_list if not metadata.get("id"))
+        pending = len(metadata_list) - stats['failed']  # Records not written yet.
+        operations = (ReplaceOne({"id": metadata["id"]}, metadata, upsert=True) for metadata in metadata_list if metadata.get("id"))
+        while chunk := list(itertools.islice(operations, chunk_size)):
+            try:
+                result = collection.bulk_write(chunk, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                # The other operations of an unordered bulk write are still applied.
+                result = e.details
+                print(f"Error while upserting {len(result['writeErrors'])} records: {result['writeErrors'][0]['errmsg']}")
+                stats['failed'] += len(result['writeErrors'])
+            except Exception as e:
+                print(f"Error while upserting metadata: {e}")
+                stats['failed'] += pending
+                break
+            stats['inserted'] += result['nUpserted']
+            stats['updated'] += result['nModified']
+            stats['unchanged'] += result['nMatched'] - result['nModified']
+            pending -= len(chunk)
+
+        print(
+            f"Upserted metadata from {metadata_path.name}: {stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['failed']} failed"
+        )
+        return stats
+
+    @classmethod
+    def delete(cls, resource_ids: List[str]) -> int:
+        """
+        Deletes the metadata of the given resources from the MongoDB collection.
+
+        Args:
+            resource_ids (List[str]): The IDs of the deleted resources.
+
+        Returns:
+            int: 0 if successful, 1 if an error occurred.
+        """
+        try:
+            if resource_ids:
+                result = cls._get_mongodb_collection().delete_many({"id": {"$in": resource_ids}})
+                print(f"Deleted metadata of {result.deleted_count} resources")
+            return 0
+        except Exception as e:
+            print(f"Error while deleting metadata: {e}")
+            return 1
+
     @classmethod
     def close(cls) -> None:
         """
@@ -112,15 +213,18 @@ class MongoDbForwarder(IForwarder):
         """
         Returns the MongoDB collection instance, initializing the connection if necessary.
 
+        The client, and its connection pool, is created once and shared by every thread.
+
         Returns:
             Collection: The MongoDB collection instance.
         """
-        if not cls.mongoDbClient:
-            cls._get_mongodb_credentials()
-            cls.mongoDbClient = MongoClient(cls.mongodb_url)
-            cls.mongoDbCollection = cls.mongoDbClient[cls.mongodb_database_name][cls.mongodb_collection_name]
-            # Ensure an index on the "id" field for uniqueness.
-            cls.mongoDbCollection.create_index("id", unique=True)
+        with cls._client_lock:
+            if not cls.mongoDbClient:
+                cls._get_mongodb_credentials()
+                cls.mongoDbClient = MongoClient(cls.mongodb_url)
+                cls.mongoDbCollection = cls.mongoDbClient[cls.mongodb_database_name][cls.mongodb_collection_name]
+                # Ensure an index on the "id" field for uniqueness.
+                cls.mongoDbCollection.create_index("id", unique=True)
         return cls.mongoDbCollection
 
     @classmethod
@@ -150,17 +254,55 @@ class MongoDbForwarder(IForwarder):
             dict: A dictionary containing the metadata fields `language`, `type_recurs`, and `access`.
                   Returns an empty dictionary if no metadata is found.
         """
-        # Define the projection for the query to limit retrieved fields.
-        projection = {
-            "metadata.dc-language-iso": 1,
-            "metadata.dc-type": 1,
-            "metadata.dc-rights-access": 1,
-            "_id": 0
-        }
         # Query the MongoDB collection for the specified resource ID.
-        result = cls._get_mongodb_collection().find_one({"id": resource_id}, projection)
+        result = cls._get_mongodb_collection().find_one({"id": resource_id}, cls.METADATA_PROJECTION)
+        return cls._to_metadata(result) if result else {}
+
+    @classmethod
+    def get_metadata_by_ids(cls, resource_ids: List[str]) -> Dict[str, dict]:
+        """
+        Retrieves metadata for many resources with a single `$in` query.
+
+        Args:
+            resource_ids (List[str]): The IDs of the resources to retrieve metadata for.
+
+        Returns:
+            Dict[str, dict]: The metadata fields `language`, `type_recurs`, and `access` of each resource found.
+                Resources missing from the collection are left out.
+        """
+        projection = {**cls.METADATA_PROJECTION, "id": 1}
+        results = cls._get_mongodb_collection().find({"id": {"$in": resource_ids}}, projection)
+        return {result["id"]: cls._to_metadata(result) for result in results}
+
+    @classmethod
+    def iter_metadata(cls, batch_size: int = 10000) -> Iterator[Tuple[str, dict]]:
+        """
+        Iterates over the metadata of every resource in the collection with a single query.
+
+        Args:
+            batch_size (int): The number of documents fetched per round-trip.
+
+        Yields:
+            Tuple[str, dict]: The resource ID and its metadata fields `language`, `type_recurs`, and `access`.
+        """
+        projection = {**cls.METADATA_PROJECTION, "id": 1}
+        for result in cls._get_mongodb_collection().find({}, projection, batch_size=batch_size):
+            yield result["id"], cls._to_metadata(result)
+
+    @staticmethod
+    def _to_metadata(result: dict) -> dict:
+        """
+        Maps a projected document to the metadata fields used to enrich logs.
+
+        Args:
+            result (dict): A document returned with `METADATA_PROJECTION`.
+
+        Returns:
+            dict: A dictionary containing the metadata fields `language`, `type_recurs`, and `access`.
+        """
+        metadata = result.get("metadata", {})
         return {
-            "language": result.get("metadata", {}).get("dc-language-iso"),
-            "type_recurs": result.get("metadata", {}).get("dc-type"),
-            "access": result.get("metadata", {}).get("dc-rights-access")
-        } if result else {}
+            "language": metadata.get("dc-language-iso"),
+            "type_recurs": metadata.get("dc-type"),
+            "access": metadata.get("dc-rights-access")
+        }
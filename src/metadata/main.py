@@ -1,92 +1,187 @@
+from concurrent.futures import ThreadPoolExecutor  # Import ThreadPoolExecutor for harvesting partitions concurrently.
+from datetime import date  # Import date for the date windows of a partitioned harvest.
 from pathlib import Path  # Import Path for handling filesystem paths.
 from src.metadata.filter.record_deleted import RecordDeleted  # Import filter to identify deleted records.
 from src.metadata.forwarder.filesystem_forwarder import FileSystemForwarder  # Forwarder for writing metadata to the filesystem.
 from src.metadata.forwarder.mongodb_forwarder import MongoDbForwarder  # Forwarder for sending metadata to MongoDB.
 from src.metadata.oaipmh.oaiclient import OAIClient  # Client for interacting with an OAI-PMH endpoint.
 from src.metadata.parser.dim_parser import DimParser  # Parser for metadata transformation.
-from src.metadata.utils.constants import SIZE_RECORDS_LIST  # Constant defining the size of metadata batches.
+from src.metadata.utils.constants import OAI_NAMESPACE, SIZE_RECORDS_LIST  # Namespace of the records and size of metadata batches.
 from src.metadata.utils.get_resource_id import get_resource_id  # Utility to extract resource IDs.
+from src.metadata.utils.harvest_state import load_state, save_state  # Harvest state and checkpoints.
+from sickle.oaiexceptions import BadResumptionToken  # Import the error of an expired or invalid resumption token.
 import json  # Import json for handling serialization and deserialization.
 import os  # Import os for accessing environment variables.
 import re  # Import re for regular expression handling.
 import requests  # Import requests for HTTP communication.
 import time  # Import time for measuring execution time.
-import xmltodict  # Import xmltodict for parsing XML responses.
 
-def process_metadata_batch(client: OAIClient, resumptionToken: str | None, batch: int) -> tuple[str, int]:
+INCREMENTS_FOLDER = 'increments'  # Folder of the output of incremental harvests, one subfolder per harvest.
+CHECKPOINT_FILE = 'checkpoint.json'  # Checkpoint of a harvest, in the folder of its output.
+
+def owns_record(set_spec, partition_set: str, prefix: str = 'col_') -> bool:
+    """
+    Tells whether a set partition stores a record, so that a record listed in several sets is stored only once.
+
+    The owner is the first of the record's sets, in sort order, with the prefix of the harvested sets, which
+    every partition can decide on its own. Since every set with that prefix is harvested, the owner always is.
+
+    Args:
+        set_spec (str | list[str]): The set specs of the record header.
+        partition_set (str): The set spec of the partition, such as `col_2117_1234`.
+        prefix (str): The prefix of the harvested sets, `METADATA_HARVEST_SET_PREFIX`.
+
+    Returns:
+        bool: True if the record belongs to the partition.
+    """
+    set_specs = [set_spec] if isinstance(set_spec, str) else set_spec or []
+    return min((spec for spec in set_specs if spec.startswith(prefix)), default=partition_set) == partition_set
+
+def process_metadata_batch(client: OAIClient, resumptionToken: str | None, batch: int, partition: str | None = None, params: dict | None = None) -> tuple[str, int, int]:
     """
     Processes a single batch of metadata from the OAI-PMH endpoint.
 
+    The records are read directly from the XML elements of the response. The IDs of the records flagged as
+    deleted are saved next to the metadata of the batch, so that the deletions are applied when the metadata
+    is ingested.
+
     Args:
         client (OAIClient): The OAI-PMH client used to retrieve records.
         resumptionToken (str | None): The token to continue fetching records. None for the first request.
         batch (int): The current batch number.
+        partition (str | None): The name of the harvest partition, or None for an unpartitioned harvest.
+        params (dict | None): The `ListRecords` arguments of the partition, such as `set` or `from` and `until`.
 
     Returns:
-        tuple[str, int]: A tuple containing the next resumption token (or None) and the number of metadata records processed.
+        tuple[str, int, int]: A tuple containing the next resumption token (or None), the number of metadata records
+            processed and the number of deleted records.
+
+    Raises:
+        requests.exceptions.RequestException: If the records cannot be fetched after `METADATA_HARVEST_RETRIES`
+            retries (5 by default), waiting `METADATA_HARVEST_BACKOFF` seconds (2 by default) before the first
+            and twice as long before each of the next ones.
+        BadResumptionToken: If the resumption token has expired or is invalid.
+        OSError: If the metadata cannot be written.
     """
-    print(f"Processing metadata batch {batch} with resumptionToken: {resumptionToken}")
+    print(f"Processing metadata batch {batch}{f' of {partition}' if partition else ''} with resumptionToken: {resumptionToken}")
     metadataList = []
-    try:
-        # Fetch records using the OAI-PMH client.
-        records, resumption_token = client.get_records(resumptionToken=resumptionToken)
-    except requests.exceptions.HTTPError as e:
-        # Handle HTTP errors during record retrieval.
-        print(f"HTTP error occurred: {e}")
-        return None, 0
+    deletedList = []
+    partition_set = (params or {}).get('set')
+    set_prefix = os.environ.get('METADATA_HARVEST_SET_PREFIX') or 'col_'
+    retries = int(os.environ.get('METADATA_HARVEST_RETRIES') or 5)
+    backoff = float(os.environ.get('METADATA_HARVEST_BACKOFF') or 2)
+    for attempt in range(retries + 1):
+        try:
+            # Fetch records using the OAI-PMH client.
+            records, resumption_token = client.get_records(resumptionToken=resumptionToken, params=params)
+            break
+        except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # Retry HTTP and network errors with exponential backoff, then give up.
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            print(f"HTTP error occurred: {e}, retrying in {delay:.1f} seconds")
+            time.sleep(delay)
 
     endOfRecords = SIZE_RECORDS_LIST  # Set the number of records to process in this batch.
 
     while endOfRecords > 0:
         try:
             # Fetch the next record.
-            record = records.next()
+            record = next(records)
         except StopIteration:
             # Stop when there are no more records.
             break
         
-        # Parse the XML record into a dictionary.
-        data = xmltodict.parse(str(record))['record']
-        # Skip records marked as deleted.
-        if not RecordDeleted.filter(data):
-            id = data['header']['identifier']  # Extract the record identifier.
-            setSpec = data['header']['setSpec']  # Extract the setSpec information.
-            metadata_list = data['metadata']['mets']['dmdSec']['mdWrap']['xmlData']['dim:dim']['dim:field']
-            
+        # Read the header of the XML record.
+        header = record.find(f'{OAI_NAMESPACE}header')
+        id = header.findtext(f'{OAI_NAMESPACE}identifier')  # Extract the record identifier.
+        if RecordDeleted.filter_header(header):
+            # Collect the IDs of the records marked as deleted, to be deleted when ingesting.
+            deletedList.append(get_resource_id(id))
+            endOfRecords -= 1
+            continue
+
+        # Extract the setSpec information, a single spec or a list of them.
+        set_specs = [set_spec.text for set_spec in header.iterfind(f'{OAI_NAMESPACE}setSpec')]
+        setSpec = set_specs[0] if len(set_specs) == 1 else set_specs
+        # Skip records stored by the partition of another of their sets.
+        if partition_set is None or owns_record(setSpec, partition_set, set_prefix):
             # Construct the metadata dictionary.
             metadata = {
                 'id': get_resource_id(id),  # Extract the resource ID.
                 'identifier': id,
                 'setSpec': setSpec,
-                'metadata': DimParser.parse(metadata_list)[0]  # Parse the metadata fields.
+                'metadata': DimParser.parse_element(record)[0]  # Parse the metadata fields.
             }
             metadataList.append(metadata)  # Add the metadata to the list.
         endOfRecords -= 1
 
     # Forward the processed metadata to the filesystem.
-    FileSystemForwarder.forward(metadata_list=metadataList, batch=(batch * int(SIZE_RECORDS_LIST)))
-    return resumption_token, len(metadataList)
+    if FileSystemForwarder.forward(metadata_list=metadataList, batch=(batch * int(SIZE_RECORDS_LIST)), partition=partition) or \
+            deletedList and FileSystemForwarder.forward_deleted(resource_ids=deletedList, batch=(batch * int(SIZE_RECORDS_LIST)), partition=partition):
+        raise OSError(f"Could not write metadata batch {batch}{f' of {partition}' if partition else ''}")
+    return resumption_token, len(metadataList), len(deletedList)
 
-def get_metadata(client: OAIClient) -> dict:
+def get_metadata(client: OAIClient, partition: str | None = None, params: dict | None = None, resume: bool = False) -> dict:
     """
     Retrieves metadata from the OAI-PMH endpoint in batches.
 
+    After each batch is written, the next resumption token, the next batch number and the record counts are
+    saved in the `CHECKPOINT_FILE` of the output folder. When resuming, the harvest continues from the
+    checkpoint, and a completed harvest is not repeated. If a resumption token has expired, the harvest is
+    listed again up to the checkpointed batch to obtain a fresh token, without processing those records again.
+
     Args:
         client (OAIClient): The OAI-PMH client used to retrieve metadata.
+        partition (str | None): The name of the harvest partition, or None to harvest the whole repository.
+        params (dict | None): The `ListRecords` arguments of the partition.
+        resume (bool): Whether to continue from the checkpoint of a previous harvest, if any.
 
     Returns:
         dict: A dictionary containing statistics on the metadata retrieval process.
+
+    Raises:
+        requests.exceptions.RequestException: If the records cannot be fetched, see `process_metadata_batch`.
+        BadResumptionToken: If a fresh resumption token is rejected too.
     """
-    print("Starting metadata retrieval")
-    stats = {'n_metadata': 0, 'time': 0}  # Initialize statistics.
-    iteration = 0
-    resumptionToken = None
+    checkpoint_path = FileSystemForwarder.output_path / (partition or '') / CHECKPOINT_FILE
+    checkpoint = load_state(checkpoint_path) if resume else {}
+    if checkpoint.get('completed'):
+        print(f"Metadata retrieval{f' of {partition}' if partition else ''} already completed")
+        return {'n_metadata': checkpoint['n_metadata'], 'n_deleted': checkpoint['n_deleted'], 'time': 0}
+
+    iteration = checkpoint.get('batch', 0)
+    print(f"Starting metadata retrieval{f' of {partition}' if partition else ''}{f' from batch {iteration}' if iteration else ''}")
+    stats = {'n_metadata': checkpoint.get('n_metadata', 0), 'n_deleted': checkpoint.get('n_deleted', 0), 'time': 0}  # Initialize statistics.
+    resumptionToken = checkpoint.get('resumption_token')
+    refreshed = False  # Whether the resumption token was just refreshed.
 
     while True:
         # Process a batch of metadata.
-        resumptionToken, total_metadata = process_metadata_batch(client, resumptionToken=resumptionToken, batch=iteration)
+        try:
+            resumptionToken, total_metadata, total_deleted = process_metadata_batch(
+                client, resumptionToken=resumptionToken, batch=iteration, partition=partition, params=params
+            )
+        except BadResumptionToken as e:
+            if refreshed or resumptionToken is None:
+                raise
+            print(f"Resumption token rejected ({e}), listing {iteration} batches again for a fresh one")
+            resumptionToken = client.get_resumption_token(params, iteration)
+            if resumptionToken is None:
+                # The listing no longer reaches the checkpointed batch, so there is nothing left to harvest.
+                save_state(checkpoint_path, completed=True)
+                break
+            refreshed = True
+            continue
+        refreshed = False
         print(f"Batch {iteration} processed, total metadata: {total_metadata}")
         stats['n_metadata'] += total_metadata
+        stats['n_deleted'] += total_deleted
+        save_state(
+            checkpoint_path, resumption_token=resumptionToken, batch=iteration + 1, n_metadata=stats['n_metadata'],
+            n_deleted=stats['n_deleted'], completed=resumptionToken is None
+        )
 
         if iteration % 100 == 0:
             print(f"Metadata track: {iteration * SIZE_RECORDS_LIST}")
@@ -99,28 +194,170 @@ def get_metadata(client: OAIClient) -> dict:
 
     return stats
 
-def process_metadata() -> float:
+def get_partitions(client: OAIClient, since: str | None = None) -> dict[str, dict]:
+    """
+    Plans the partitions of a harvest, depending on `METADATA_HARVEST_PARTITIONS`.
+
+    With `sets`, there is one partition per set whose spec starts with `METADATA_HARVEST_SET_PREFIX` (`col_` by
+    default). With `dates`, the days from `METADATA_HARVEST_FROM` (the earliest datestamp of the repository by
+    default) to `METADATA_HARVEST_UNTIL` (today by default) are split into windows of
+    `METADATA_HARVEST_WINDOW_DAYS` days (365 by default).
+
+    Args:
+        client (OAIClient): The OAI-PMH client used to list the sets or read the earliest datestamp.
+        since (str | None): The high-water mark of an incremental harvest, from which every partition starts.
+
+    Returns:
+        dict[str, dict]: The `ListRecords` arguments of each partition, by partition name, or an empty dictionary
+            to harvest the repository as a whole.
+    """
+    strategy = os.environ.get('METADATA_HARVEST_PARTITIONS', '')
+    if strategy == 'sets':
+        partitions = client.set_partitions(os.environ.get('METADATA_HARVEST_SET_PREFIX') or 'col_')
+        return {name: {**params, 'from': since} if since else params for name, params in partitions.items()}
+    if strategy == 'dates':
+        start = date.fromisoformat((since or os.environ.get('METADATA_HARVEST_FROM') or client.get_earliest_datestamp())[:10])
+        end = date.fromisoformat(os.environ.get('METADATA_HARVEST_UNTIL') or date.today().isoformat())
+        return OAIClient.date_partitions(start, end, int(os.environ.get('METADATA_HARVEST_WINDOW_DAYS') or 365))
+    return {}
+
+def get_partitioned_metadata(client: OAIClient, partitions: dict[str, dict], workers: int, resume: bool = False) -> dict:
+    """
+    Retrieves the metadata of each partition concurrently, each partition following its own resumption tokens.
+
+    The batches of each partition are written to a subdirectory named after the partition, so the layout of
+    the output does not depend on the order in which the partitions finish. Each partition has its own
+    checkpoint, so resuming skips the completed partitions and continues the others.
+
+    Args:
+        client (OAIClient): The OAI-PMH client used to retrieve metadata.
+        partitions (dict[str, dict]): The `ListRecords` arguments of each partition, by partition name.
+        workers (int): The number of partitions harvested at the same time.
+        resume (bool): Whether to continue from the checkpoints of a previous harvest, if any.
+
+    Returns:
+        dict: The statistics of the whole harvest, with the number of records of each partition.
+    """
+    print(f"Harvesting {len(partitions)} partitions with {workers} workers")
+    stats = {'n_metadata': 0, 'n_deleted': 0, 'time': 0, 'partitions': {}}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(get_metadata, [client] * len(partitions), partitions, partitions.values(), [resume] * len(partitions))
+        for partition, partition_stats in zip(partitions, results):
+            stats['partitions'][partition] = partition_stats['n_metadata']
+            stats['n_metadata'] += partition_stats['n_metadata']
+            stats['n_deleted'] += partition_stats['n_deleted']
+    return stats
+
+def harvest(client: OAIClient, since: str | None = None, folder: str | None = None, resume: bool = False) -> dict:
+    """
+    Retrieves metadata from the OAI-PMH endpoint, as a whole or by partitions, see `get_partitions`.
+
+    Args:
+        client (OAIClient): The OAI-PMH client used to retrieve metadata.
+        since (str | None): The `from` argument of an incremental harvest, or None for a full harvest.
+        folder (str | None): The folder of the output, relative to `METADATA_OUTPUT_PATH`, or None for its root.
+        resume (bool): Whether to continue from the checkpoints of a previous harvest, if any.
+
+    Returns:
+        dict: A dictionary containing statistics on the metadata retrieval process.
+    """
+    partitions = get_partitions(client, since)
+    if partitions:
+        if folder is not None:
+            partitions = {f'{folder}/{name}': params for name, params in partitions.items()}
+        return get_partitioned_metadata(client, partitions, int(os.environ.get('METADATA_HARVEST_WORKERS') or 4), resume)
+    return get_metadata(client=client, partition=folder, params={'from': since} if since else None, resume=resume)
+
+def harvest_incremental(client: OAIClient) -> dict:
+    """
+    Retrieves the records changed since the last successful harvest and applies them to MongoDB.
+
+    The high-water mark of the last successful harvest is read from `METADATA_HARVEST_STATE_PATH`
+    (`harvest_state.json` in `METADATA_OUTPUT_PATH` by default) and used as the `from` argument of the harvest.
+    Without it, the whole repository is harvested. The records are written to a folder of their own in
+    `INCREMENTS_FOLDER`, then changed records are upserted and deleted records are deleted. The new mark, the
+    `responseDate` of the repository when the harvest started, is only stored once everything was applied,
+    so that a failed harvest is retried from the same mark. Until then, the harvest is recorded as in progress,
+    and the next run resumes it from its checkpoints instead of starting a new one.
+
+    Args:
+        client (OAIClient): The OAI-PMH client used to retrieve metadata.
+
+    Returns:
+        dict: A dictionary containing statistics on the metadata retrieval process.
+    """
+    state_path = Path(os.environ.get('METADATA_HARVEST_STATE_PATH') or FileSystemForwarder.output_path / 'harvest_state.json')
+    state = load_state(state_path)
+    since = state.get('high_water_mark')
+    started = state.get('in_progress') or client.get_response_date()
+    save_state(state_path, in_progress=started)
+    folder = f"{INCREMENTS_FOLDER}/{started.replace(':', '-')}"
+    print(f"Starting incremental harvest from {since or 'the beginning'} into {folder}")
+
+    stats = harvest(client, since, folder, resume=True)
+    stats['from'] = since
+    elapsed_time, failures = process_metadata(FileSystemForwarder.output_path / folder, upsert=True)
+    stats['failures'] = failures
+    if failures == 0:
+        save_state(state_path, high_water_mark=started, in_progress=None)
+        print(f"Stored high-water mark {started} in {state_path}")
+    return stats
+
+def process_metadata(base_path: Path | None = None, upsert: bool = False) -> tuple[float, int]:
     """
     Processes metadata from the filesystem and forwards it to MongoDB.
 
+    When upserting, `METADATA_INGEST_WORKERS` files (1 by default) are upserted at the same time through the
+    shared MongoDB client, in bulk writes of `METADATA_INGEST_CHUNK_SIZE` records, and the number of records
+    inserted, updated, unchanged and failed is printed for each file and in total. The deleted records saved
+    next to the metadata files are deleted from MongoDB once every file is forwarded.
+
+    Args:
+        base_path (Path | None): The folder of the metadata files, or None for `METADATA_OUTPUT_PATH`, in which
+            case the output of incremental harvests is left out.
+        upsert (bool): Whether to insert or replace each record, instead of inserting them, which fails on records
+            that already exist.
+
     Returns:
-        float: The total time taken to process the metadata, in seconds.
+        tuple[float, int]: The total time taken to process the metadata, in seconds, and the number of files that
+            could not be forwarded, entirely or in part.
     """
     print("Processing metadata from filesystem")
-    base_path = Path(os.environ.get('METADATA_OUTPUT_PATH'))  # Retrieve the base path from environment variables.
+    incremental = base_path is not None
+    if base_path is None:
+        base_path = Path(os.environ.get('METADATA_OUTPUT_PATH'))  # Retrieve the base path from environment variables.
     start_time = time.time()  # Record the start time.
+    failures = 0
+
+    # Collect the files of each batch directory in the base path, including those of partitioned harvests.
+    metadata_files = []
+    deleted_files = []
+    for batch in sorted(base_path.glob('**/batch_*')):
+        if batch.is_dir() and (incremental or INCREMENTS_FOLDER not in batch.relative_to(base_path).parts):
+            metadata_files.extend(sorted(batch.glob("*.metadata.json")))
+            deleted_files.extend(sorted(batch.glob("*.deleted.json")))
 
-    # Iterate through each batch directory in the base path.
-    for batch in base_path.iterdir():
-        if batch.is_dir():
-            print(f"Processing batch: {batch.name}")
-            # Process each metadata file in the batch directory.
-            for metadata_file in batch.glob("*.metadata.json"):
-                print(f"Forwarding metadata file: {metadata_file}")
-                MongoDbForwarder.forward(metadata_file)
+    if upsert:
+        workers = int(os.environ.get('METADATA_INGEST_WORKERS') or 1)
+        print(f"Upserting {len(metadata_files)} metadata files with {workers} workers")
+        totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for stats in executor.map(MongoDbForwarder.upsert, metadata_files):
+                failures += stats['failed'] > 0
+                for key in totals:
+                    totals[key] += stats[key]
+        print(f"Upserted metadata: {json.dumps(totals)}")
+    else:
+        # Process each metadata file.
+        for metadata_file in metadata_files:
+            print(f"Forwarding metadata file: {metadata_file}")
+            failures += MongoDbForwarder.forward(metadata_file)
+    # Apply the deletions.
+    for deleted_file in deleted_files:
+        failures += MongoDbForwarder.delete(json.loads(deleted_file.read_text(encoding='utf-8')))
     
     MongoDbForwarder.close()  # Close the MongoDB connection.
-    return time.time() - start_time  # Calculate the total time taken.
+    return time.time() - start_time, failures  # Calculate the total time taken.
 
 def main():
     """
@@ -146,17 +383,21 @@ def main():
         start_time = time.time()
         
         try:
-            stats = get_metadata(client=client)  # Retrieve metadata from the endpoint.
-        except requests.exceptions.HTTPError as e:
-            print(f"Failed to retrieve metadata due to HTTP error: {e}")
+            # Retrieve metadata from the endpoint, either every record or those changed since the last harvest.
+            if int(os.environ.get('METADATA_HARVEST_INCREMENTAL', 0)) == 1:
+                stats = harvest_incremental(client)
+            else:
+                stats = harvest(client, resume=int(os.environ.get('METADATA_HARVEST_RESUME', 0)) == 1)
+        except (requests.exceptions.RequestException, BadResumptionToken, OSError) as e:
+            print(f"Failed to retrieve metadata, resume from the checkpoint: {e}")
             return
         
         stats['time'] = time.time() - start_time  # Calculate the time taken for metadata retrieval.
         print(json.dumps(stats, indent=4))  # Print retrieval statistics as a JSON object.
     else:
-        # Process metadata from the filesystem.
-        elapsed_time = process_metadata()
-        print(f"Time taken to process metadata: {elapsed_time:.2f} seconds")
+        # Process metadata from the filesystem, inserting or upserting it.
+        elapsed_time, failures = process_metadata(upsert=int(os.environ.get('METADATA_INGEST_UPSERT', 0)) == 1)
+        print(f"Time taken to process metadata: {elapsed_time:.2f} seconds, files that failed: {failures}")
     
     # Count and print the total number of documents in MongoDB.
     total_documents = MongoDbForwarder.count_documents()
@@ -1,9 +1,24 @@
+from datetime import date, timedelta  # Import date and timedelta for splitting date windows.
 from sickle import Sickle  # Import Sickle for interacting with OAI-PMH endpoints.
+from sickle.app import DEFAULT_CLASS_MAP  # Import the default mapping of OAI-PMH items to Sickle classes.
+from sickle.oaiexceptions import NoRecordsMatch  # Import the error of a selective harvest without records.
 from typing import Any, Optional, Iterator  # Import type hints for better code clarity.
 import json  # Import json for potential serialization of records (not used here).
 import os  # Import os for environment variable access (not used here).
 import xmltodict  # Import xmltodict for processing XML responses (not used here).
 
+def _record_element(record: Any) -> Any:
+    """
+    Maps the `record` elements of a `ListRecords` response to themselves, instead of to Sickle records.
+
+    Args:
+        record (Any): The lxml `record` element.
+
+    Returns:
+        Any: The same element.
+    """
+    return record
+
 class OAIClient:
     """
     A client for interacting with an OAI-PMH (Open Archives Initiative Protocol for Metadata Harvesting) endpoint.
@@ -18,8 +33,20 @@ class OAIClient:
     Methods:
         __init__(endpoint: str, metadataPrefix: str) -> None:
             Initializes the OAIClient with the specified endpoint and metadata prefix.
-        get_records(resumptionToken: Optional[str]) -> tuple[Iterator, Optional[str]]:
+        get_records(resumptionToken: Optional[str], params: Optional[dict]) -> tuple[Iterator, Optional[str]]:
             Fetches records from the OAI-PMH endpoint, optionally using a resumption token.
+        list_sets(prefix: str) -> list[str]:
+            Lists the sets of the repository whose spec starts with a prefix.
+        get_earliest_datestamp() -> str:
+            Returns the earliest datestamp of the repository.
+        get_response_date() -> str:
+            Returns the current date and time of the repository.
+        get_resumption_token(params: Optional[dict], pages: int) -> Optional[str]:
+            Lists the first pages of a harvest again to obtain a fresh resumption token.
+        set_partitions(prefix: str) -> dict[str, dict]:
+            Splits a harvest into one partition per set.
+        date_partitions(start: date, end: date, days: int) -> dict[str, dict]:
+            Splits a harvest into consecutive date windows.
     """
 
     def __init__(self, endpoint: str, metadataPrefix: str) -> None:
@@ -32,9 +59,11 @@ class OAIClient:
         """
         self.url = endpoint  # Store the OAI-PMH endpoint URL.
         self.prefix = metadataPrefix  # Store the metadata format prefix.
-        self.client = Sickle(endpoint)  # Initialize the Sickle client with the endpoint.
+        # Initialize the Sickle client with the endpoint. Records are yielded as the `record` elements of the parsed
+        # response, leaving them to `DimParser.parse_element` instead of converting each of them into dictionaries.
+        self.client = Sickle(endpoint, class_mapping={**DEFAULT_CLASS_MAP, 'ListRecords': _record_element})
 
-    def get_records(self, resumptionToken: Optional[str]) -> tuple[Iterator, Optional[str]]:
+    def get_records(self, resumptionToken: Optional[str], params: Optional[dict] = None) -> tuple[Iterator, Optional[str]]:
         """
         Fetches records from the OAI-PMH endpoint.
 
@@ -44,16 +73,113 @@ class OAIClient:
         Args:
             resumptionToken (Optional[str]): The resumption token for continuing a previous request. 
                 If None, the request starts from the beginning using the metadata prefix.
+            params (Optional[dict]): Selective harvesting arguments of the first request, such as `set`, `from`
+                or `until`. They are ignored when a resumption token is given, which already encodes them.
 
         Returns:
             tuple[Iterator, Optional[str]]:
-                - An iterator over the fetched records.
+                - An iterator over the lxml `record` elements of the fetched records, empty if no record matches the
+                  harvesting arguments.
                 - The next resumption token, if available; otherwise, None.
         """
-        # Use the resumption token if provided; otherwise, use the metadata prefix.
-        records = self.client.ListRecords(
-            metadataPrefix=self.prefix if resumptionToken is None else None,
-            resumptionToken=resumptionToken
-        )
+        # Use the resumption token if provided; otherwise, use the metadata prefix and the harvesting arguments.
+        if resumptionToken is None:
+            try:
+                records = self.client.ListRecords(metadataPrefix=self.prefix, **(params or {}))
+            except NoRecordsMatch:
+                # A selective harvest, such as an incremental one, may have nothing to return.
+                return iter([]), None
+        else:
+            records = self.client.ListRecords(resumptionToken=resumptionToken)
         # Extract the next resumption token, if available.
         return records, getattr(records.resumption_token, "token", None)
+
+    def get_resumption_token(self, params: Optional[dict], pages: int) -> Optional[str]:
+        """
+        Lists the first pages of a harvest again to obtain a fresh resumption token for the next page, for
+        instance once the token of an interrupted harvest has expired.
+
+        Only the page responses are requested; their records are not processed.
+
+        Args:
+            params (Optional[dict]): The selective harvesting arguments of the harvest.
+            pages (int): The number of pages already harvested.
+
+        Returns:
+            Optional[str]: The resumption token of the page following them, or None if the harvest has no such page
+                or has not started.
+        """
+        token = None
+        for page in range(pages):
+            _, token = self.get_records(resumptionToken=token if page else None, params=params)
+            if token is None:
+                break
+        return token
+
+    def list_sets(self, prefix: str = '') -> list[str]:
+        """
+        Lists the sets of the repository whose spec starts with a prefix, following every resumption token.
+
+        Args:
+            prefix (str): The prefix of the set specs to keep, such as `col_` for the DSpace collections.
+
+        Returns:
+            list[str]: The matching set specs, sorted.
+        """
+        return sorted(oai_set.setSpec for oai_set in self.client.ListSets() if oai_set.setSpec.startswith(prefix))
+
+    def get_earliest_datestamp(self) -> str:
+        """
+        Returns the earliest datestamp of the repository, from its `Identify` response.
+
+        Returns:
+            str: The datestamp, such as `2004-05-12T08:05:00Z`.
+        """
+        return self.client.Identify().earliestDatestamp
+
+    def get_response_date(self) -> str:
+        """
+        Returns the current date and time of the repository, as the `responseDate` of an `Identify` request.
+
+        Using the clock of the repository rather than the local one keeps incremental harvests correct
+        when the clocks differ.
+
+        Returns:
+            str: The response date, such as `2023-03-01T10:15:32Z`.
+        """
+        return self.client.harvest(verb='Identify').xml.findtext(f'{self.client.oai_namespace}responseDate')
+
+    def set_partitions(self, prefix: str = 'col_') -> dict[str, dict]:
+        """
+        Splits a harvest into one partition per set.
+
+        In DSpace, an item mapped to several collections is listed in each of their sets, so the partitions may
+        overlap; see `owns_record` in `src/metadata/main.py`.
+
+        Args:
+            prefix (str): The prefix of the set specs to harvest, `col_` (the DSpace collections) by default.
+
+        Returns:
+            dict[str, dict]: The `ListRecords` arguments of each partition, by partition name (the set spec).
+        """
+        return {set_spec: {'set': set_spec} for set_spec in self.list_sets(prefix)}
+
+    @staticmethod
+    def date_partitions(start: date, end: date, days: int) -> dict[str, dict]:
+        """
+        Splits a harvest into consecutive date windows, which do not overlap since `from` and `until` are inclusive.
+
+        Args:
+            start (date): The first day to harvest.
+            end (date): The last day to harvest.
+            days (int): The number of days of each window.
+
+        Returns:
+            dict[str, dict]: The `ListRecords` arguments of each partition, by partition name (`<from>_<until>`).
+        """
+        partitions = {}
+        while start <= end:
+            until = min(start + timedelta(days=days - 1), end)
+            partitions[f'{start.isoformat()}_{until.isoformat()}'] = {'from': start.isoformat(), 'until': until.isoformat()}
+            start = until + timedelta(days=1)
+        return partitions
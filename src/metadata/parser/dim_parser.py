@@ -1,4 +1,5 @@
 from src.metadata.parser.parser_interface import IParser  # Import the IParser interface for standardizing parsers.
+from src.metadata.utils.constants import DIM_NAMESPACE  # Import the namespace of the DIM elements.
 from typing import Dict, List, Any  # Import type annotations for better clarity and code tooling support.
 
 class DimParser(IParser):
@@ -11,6 +12,8 @@ class DimParser(IParser):
     Methods:
         parse(metadata: dict) -> list[dict]:
             Parses the input metadata into a structured list of dictionaries.
+        parse_element(element: Any) -> list[dict]:
+            Parses the `dim:field` elements of an XML element into a structured list of dictionaries.
     """
 
     @classmethod
@@ -44,20 +47,57 @@ class DimParser(IParser):
             # Construct the metadata key by combining schema, element, qualifier, and lang.
             metadata_key = '.'.join(filter(None, [schema, element, qualifier, lang]))
 
-            # Decode the metadata value, handling special characters and errors.
-            metadata_value = data.get('#text', '').encode('latin-1', errors='ignore').decode('unicode-escape', errors='ignore')
-
-            # Check if the key already exists in the dictionary.
-            if metadata_key in upcommons_metadata:
-                # If the value is already a list, append the new value.
-                if isinstance(upcommons_metadata[metadata_key], list):
-                    upcommons_metadata[metadata_key].append(metadata_value)
-                else:
-                    # Convert the existing value into a list and add the new value.
-                    upcommons_metadata[metadata_key] = [upcommons_metadata[metadata_key], metadata_value]
-            else:
-                # Add the new key-value pair to the dictionary.
-                upcommons_metadata[metadata_key] = metadata_value
+            # Decode the metadata value and add it, grouping the values of repeated keys.
+            cls._add_value(upcommons_metadata, metadata_key, data.get('#text', ''))
 
         # Return the parsed metadata as a list containing a single dictionary.
         return [upcommons_metadata]
+
+    @classmethod
+    def parse_element(cls, element: Any) -> list[dict]:
+        """
+        Parses the `dim:field` elements of an XML element into the same format as `parse`.
+
+        The fields are read directly from the lxml tree of the OAI-PMH response, such as a `record` element,
+        which avoids serializing the record and parsing it again into nested dictionaries.
+
+        Args:
+            element (Any): An lxml element containing `dim:field` elements at any depth.
+
+        Returns:
+            list[dict]: A list containing a single dictionary of parsed metadata, as returned by `parse`.
+        """
+        upcommons_metadata = {}  # Initialize a dictionary to hold the parsed metadata.
+        for field in element.iter(f'{DIM_NAMESPACE}field'):
+            attributes = field.attrib
+            metadata_key = '.'.join(filter(None, [
+                attributes.get('mdschema'), attributes.get('element'), attributes.get('qualifier'), attributes.get('lang')
+            ]))
+            # Surrounding whitespace is stripped, as xmltodict does for `#text`.
+            cls._add_value(upcommons_metadata, metadata_key, (field.text or '').strip())
+        return [upcommons_metadata]
+
+    @staticmethod
+    def _add_value(upcommons_metadata: dict, metadata_key: str, value: str) -> None:
+        """
+        Decodes a metadata value and adds it to the parsed metadata, turning repeated keys into lists.
+
+        Args:
+            upcommons_metadata (dict): The parsed metadata.
+            metadata_key (str): The metadata key, such as `dc.language.iso`.
+            value (str): The raw metadata value.
+        """
+        # Decode the metadata value, handling special characters and errors.
+        metadata_value = value.encode('latin-1', errors='ignore').decode('unicode-escape', errors='ignore')
+
+        # Check if the key already exists in the dictionary.
+        if metadata_key in upcommons_metadata:
+            # If the value is already a list, append the new value.
+            if isinstance(upcommons_metadata[metadata_key], list):
+                upcommons_metadata[metadata_key].append(metadata_value)
+            else:
+                # Convert the existing value into a list and add the new value.
+                upcommons_metadata[metadata_key] = [upcommons_metadata[metadata_key], metadata_value]
+        else:
+            # Add the new key-value pair to the dictionary.
+            upcommons_metadata[metadata_key] = metadata_value
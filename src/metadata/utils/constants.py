@@ -17,3 +17,15 @@ SIZE_RECORDS_LIST = 100
 int: The default size for a batch of records. 
 Used for splitting large sets of metadata into manageable chunks during processing.
 """
+
+OAI_NAMESPACE = "{http://www.openarchives.org/OAI/2.0/}"
+"""
+str: The namespace of the OAI-PMH 2.0 elements, in the `{uri}` form used by lxml tag names.
+Used to find the header elements of the harvested records.
+"""
+
+DIM_NAMESPACE = "{http://www.dspace.org/xmlns/dspace/dim}"
+"""
+str: The namespace of the DSpace Intermediate Metadata (DIM) elements, in the `{uri}` form used by lxml tag names.
+Used to find the `dim:field` elements of the harvested records.
+"""
@@ -0,0 +1,35 @@
+from pathlib import Path  # Import Path for handling the state file path.
+import json  # Import json for reading and writing the state file.
+
+def load_state(state_path: Path) -> dict:
+    """
+    Reads a harvest state file.
+
+    Args:
+        state_path (Path): The path of the state file.
+
+    Returns:
+        dict: The state, empty if the file does not exist.
+    """
+    if not state_path.exists():
+        return {}
+    return json.loads(state_path.read_text(encoding='utf-8'))
+
+def save_state(state_path: Path, **values) -> None:
+    """
+    Updates values of a harvest state file, removing those set to None.
+
+    The file is written to a temporary file first and then renamed, so that a crash never leaves a partial
+    state file behind.
+
+    Args:
+        state_path (Path): The path of the state file.
+        **values: The values to update.
+    """
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state = load_state(state_path)
+    state.update(values)
+    state = {key: value for key, value in state.items() if value is not None}
+    temporary_path = state_path.with_suffix('.tmp')
+    temporary_path.write_text(json.dumps(state, indent=4), encoding='utf-8')
+    temporary_path.replace(state_path)
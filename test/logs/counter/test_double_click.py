@@ -0,0 +1,69 @@
+import pytest
+from logs.counter.double_click import DoubleClick
+from logs.utils.date_converter import to_timestamp
+
+
+@pytest.fixture(autouse=True)
+def reset_double_click():
+
+    DoubleClick.reset()
+    yield
+    DoubleClick.reset()
+
+
+def access(time: str, resource: str = "/handle/2117/1") -> bool:
+
+    return DoubleClick.filter("1.2.3.4", "01/Jan/2023", f"{time} +0100", resource, "Mozilla/5.0")
+
+
+def test_double_click_with_first_access():
+
+    assert access("12:00:00") == False
+
+
+@pytest.mark.parametrize(
+    "second_time, expected",
+    [
+        ("12:00:00", True),
+        ("12:00:29", True),
+        ("12:00:30", False),
+        ("12:01:00", False),
+    ]
+)
+def test_double_click_within_window(second_time: str, expected: bool):
+
+    access("12:00:00")
+    assert access(second_time) == expected
+
+
+def test_double_click_window_slides_with_each_access():
+
+    access("12:00:00")
+    assert access("12:00:20") == True
+    assert access("12:00:40") == True
+    assert access("12:01:10") == False
+
+
+def test_double_click_with_different_resource():
+
+    access("12:00:00")
+    assert access("12:00:05", "/handle/2117/2") == False
+
+
+def test_double_click_stats():
+
+    access("12:00:00")
+    access("12:00:01", "/handle/2117/2")
+    stats = DoubleClick.stats()
+    assert stats['keys'] == 2
+    assert stats['buckets'] == 2
+
+
+def test_double_click_newest():
+
+    assert DoubleClick.newest() is None
+    access("12:00:10")
+    access("12:00:00", "/handle/2117/2")
+    assert DoubleClick.newest() == to_timestamp("01/Jan/2023", "12:00:10 +0100")
+    access("12:01:00", "/handle/2117/3")
+    assert DoubleClick.newest() == to_timestamp("01/Jan/2023", "12:01:00 +0100")
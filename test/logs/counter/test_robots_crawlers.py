@@ -0,0 +1,91 @@
+import json
+import runpy
+import sys
+import pytest
+from types import SimpleNamespace
+from logs.counter import robots_crawlers
+from logs.counter.robots_crawlers import RobotsCrawlers
+
+
+@pytest.fixture(autouse=True)
+def robots_path(tmp_path, monkeypatch):
+
+    monkeypatch.setenv('ROBOTS_LIST_PATH', str(tmp_path))
+    monkeypatch.delenv('ROBOTS_LIST_VERSION', raising=False)
+    for attribute in ('counter_robots_list', 'counter_robots_version', 'counter_robots_mtime', 'robots_names', 'matcher'):
+        monkeypatch.setattr(RobotsCrawlers, attribute, getattr(RobotsCrawlers, attribute))
+    yield tmp_path
+    RobotsCrawlers.filter.cache_clear()
+
+
+def write_cache(tmp_path, version: str, robots: list, overrides: dict | None = None):
+
+    cache = {'version': version, 'source': 'test', 'sha256': RobotsCrawlers._checksum(robots), 'robots': robots}
+    cache.update(overrides or {})
+    cache_file = tmp_path / f'COUNTER_Robots_list.{version}.json'
+    cache_file.write_text(json.dumps(cache))
+    return cache_file
+
+
+def fake_get(requests: list):
+
+    def get(url, timeout=None):
+        requests.append(url)
+        return SimpleNamespace(text='Googlebot\nspider\n', raise_for_status=lambda: None)
+    return get
+
+
+def test_load_uses_cached_version_offline(robots_path, monkeypatch):
+
+    write_cache(robots_path, 'v1.0', ['spider'])
+    monkeypatch.setenv('ROBOTS_LIST_VERSION', 'v1.0')
+    monkeypatch.setattr(robots_crawlers.requests, 'get', lambda *args, **kwargs: pytest.fail('downloaded'))
+    RobotsCrawlers.load()
+    assert RobotsCrawlers.counter_robots_version == 'v1.0'
+    assert RobotsCrawlers.filter('my spider/1.0') == 'spider'
+
+
+def test_load_rejects_checksum_mismatch(robots_path, monkeypatch):
+
+    write_cache(robots_path, 'v1.0', ['spider'], {'sha256': '0' * 64})
+    monkeypatch.setenv('ROBOTS_LIST_VERSION', 'v1.0')
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        RobotsCrawlers.load()
+
+
+def test_load_rejects_version_mismatch(robots_path, monkeypatch):
+
+    write_cache(robots_path, 'v1.0', ['spider'], {'version': 'v2.0'})
+    monkeypatch.setenv('ROBOTS_LIST_VERSION', 'v1.0')
+    with pytest.raises(ValueError, match='contains version v2.0'):
+        RobotsCrawlers.load()
+
+
+def test_load_requires_pinned_version_in_cache(monkeypatch):
+
+    monkeypatch.setenv('ROBOTS_LIST_VERSION', 'v1.0')
+    monkeypatch.setattr(robots_crawlers.requests, 'get', lambda *args, **kwargs: pytest.fail('downloaded'))
+    with pytest.raises(FileNotFoundError, match='v1.0 is not cached'):
+        RobotsCrawlers.load()
+
+
+def test_load_downloads_default_version_once(robots_path, monkeypatch):
+
+    requests = []
+    monkeypatch.setattr(robots_crawlers.requests, 'get', fake_get(requests))
+    RobotsCrawlers.load()
+    RobotsCrawlers.load()
+    assert requests == [RobotsCrawlers.COUNTER_ROBOTS_URL.format(version=RobotsCrawlers.DEFAULT_VERSION)]
+    assert RobotsCrawlers.counter_robots_list == ['Googlebot', 'spider']
+
+
+def test_main_refreshes_given_version(robots_path, monkeypatch):
+
+    requests = []
+    monkeypatch.setattr('requests.get', fake_get(requests))
+    monkeypatch.setattr(sys, 'argv', ['robots_crawlers.py', 'v1.0'])
+    runpy.run_path(robots_crawlers.__file__, run_name='__main__')
+    cache = json.loads((robots_path / 'COUNTER_Robots_list.v1.0.json').read_text())
+    assert requests == [RobotsCrawlers.COUNTER_ROBOTS_URL.format(version='v1.0')]
+    assert cache['version'] == 'v1.0' and cache['robots'] == ['Googlebot', 'spider']
+    assert cache['sha256'] == RobotsCrawlers._checksum(cache['robots'])
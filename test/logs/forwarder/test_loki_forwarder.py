@@ -0,0 +1,215 @@
+import gzip
+import json
+import threading
+import pytest
+
+pytest.importorskip("requests")
+from types import SimpleNamespace
+from logs.forwarder.loki_forwarder import LokiForwarder
+from logs.forwarder.loki_spool import LokiSpool
+
+
+@pytest.fixture
+def forwarder(monkeypatch):
+    sent = []
+    monkeypatch.setattr(LokiForwarder, 'batch', [])
+    monkeypatch.setattr(LokiForwarder, 'batch_bytes', 0)
+    monkeypatch.setattr(LokiForwarder, 'max_logs', 500)
+    monkeypatch.setattr(LokiForwarder, 'max_linger', 60.0)
+    monkeypatch.setattr(LokiForwarder, 'target_bytes', 100)
+
+    def forward_batch():
+        sent.append(list(LokiForwarder.batch))
+        LokiForwarder.batch.clear()
+        LokiForwarder.batch_bytes = 0
+        return 0
+
+    monkeypatch.setattr(LokiForwarder, 'forward_batch', forward_batch)
+    return sent
+
+
+def test_forward_flushes_on_byte_budget(forwarder):
+
+    for _ in range(5):
+        LokiForwarder.forward({}, 'x' * 30)
+    assert [len(batch) for batch in forwarder] == [4]
+    assert len(LokiForwarder.batch) == 1
+
+
+def test_forward_flushes_on_count(forwarder, monkeypatch):
+
+    monkeypatch.setattr(LokiForwarder, 'max_logs', 2)
+    for _ in range(5):
+        LokiForwarder.forward({}, 'x')
+    assert [len(batch) for batch in forwarder] == [2, 2]
+
+
+def test_forward_flushes_on_linger(forwarder, monkeypatch):
+
+    monkeypatch.setattr(LokiForwarder, 'max_linger', 0.0)
+    LokiForwarder.forward({}, 'x')
+    assert [len(batch) for batch in forwarder] == [1]
+
+
+def test_adapt_batch(monkeypatch):
+
+    monkeypatch.setattr(LokiForwarder, 'target_bytes', LokiForwarder.MIN_BATCH_BYTES * 4)
+    LokiForwarder._adapt_batch(0.1, False)
+    assert LokiForwarder.target_bytes == LokiForwarder.MIN_BATCH_BYTES * 5
+    LokiForwarder._adapt_batch(0.1, True)
+    assert LokiForwarder.target_bytes == LokiForwarder.MIN_BATCH_BYTES * 5 // 2
+    LokiForwarder._adapt_batch(LokiForwarder.TARGET_LATENCY * 2, False)
+    assert LokiForwarder.target_bytes == LokiForwarder.MIN_BATCH_BYTES * 5 // 4
+    for _ in range(10):
+        LokiForwarder._adapt_batch(0.1, True)
+    assert LokiForwarder.target_bytes == LokiForwarder.MIN_BATCH_BYTES
+
+
+def test_skip_advances_timestamps_without_forwarding(forwarder, monkeypatch):
+
+    monkeypatch.setattr(LokiForwarder, 'skipped_runs', 0)
+    monkeypatch.setattr(LokiForwarder, 'previous_date', ('', ''))
+    monkeypatch.setattr(LokiForwarder, 'previous_timestamp', 0)
+    log = {'date': '01/Mar/2023', 'time': '10:00:00 +0100'}
+    LokiForwarder.skip(log)
+    LokiForwarder.skip(log)
+    assert LokiForwarder.skipped_runs == 1
+    LokiForwarder.skip({'date': '01/Mar/2023', 'time': '10:00:01 +0100'})
+    assert LokiForwarder.skipped_runs == 2
+    assert LokiForwarder._set_timestamp('01/Mar/2023', '10:00:01 +0100') == 1677661201000000001
+    assert forwarder == [] and LokiForwarder.batch == []
+
+
+def test_forward_many_flushes_like_forward(forwarder):
+
+    LokiForwarder.forward_many([({}, 'x' * 30) for _ in range(9)])
+    assert [len(batch) for batch in forwarder] == [4, 4]
+    assert len(LokiForwarder.batch) == 1
+
+
+class FakeSession:
+
+    def __init__(self, status_code: int = 204):
+        self.status_code = status_code
+        self.posts = []
+
+    def post(self, url, data=None, headers=None):
+        self.posts.append((url, data, headers))
+        return SimpleNamespace(status_code=self.status_code, content=b'', raw=SimpleNamespace(retries=None))
+
+
+def access_log(resource: str, status_code: str = '200', type: str = 'recurs') -> dict:
+
+    return {
+        'content': 'ok', 'date': '01/Mar/2023', 'time': '10:00:00 +0100', 'referer': 'google.com', 'type': type,
+        'resource': resource, 'request': {'method': 'GET', 'status_code': status_code}
+    }
+
+
+@pytest.fixture
+def loki(monkeypatch):
+    monkeypatch.setenv('LOKI_SENDERS', '0')
+    monkeypatch.delenv('LOKI_SPOOL_PATH', raising=False)
+    monkeypatch.delenv('LOKI_ENCODING', raising=False)
+    for attribute in ('batch', 'senders'):
+        monkeypatch.setattr(LokiForwarder, attribute, [])
+    for attribute in ('batch_bytes', 'previous_timestamp', 'skipped_runs', 'pushes', 'entries_sent', 'streams_sent',
+                      'bytes_sent', 'failed_pushes', 'failed_entries', 'spooled_pushes', 'spooled_entries'):
+        monkeypatch.setattr(LokiForwarder, attribute, 0)
+    monkeypatch.setattr(LokiForwarder, 'previous_date', ('', ''))
+    monkeypatch.setattr(LokiForwarder, 'queue', None)
+    monkeypatch.setattr(LokiForwarder, 'spool_retry_at', 0.0)
+    monkeypatch.setattr(LokiForwarder, 'loki_url', 'http://loki:3100')
+    session = FakeSession()
+    monkeypatch.setattr(LokiForwarder, '_get_session', lambda: session)
+    return session
+
+
+def test_forward_batch_posts_gzip_json_grouped_by_labels(loki):
+
+    LokiForwarder.batch.extend([
+        (access_log('2117/1'), 'line 1'), (access_log('2117/2', '404'), 'line 2'), (access_log('2117/3'), 'line 3')
+    ])
+    assert LokiForwarder.forward_batch() == 0
+    url, payload, headers = loki.posts[0]
+    assert url == 'http://loki:3100/loki/api/v1/push'
+    assert headers == {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+    streams = json.loads(gzip.decompress(payload))['streams']
+    assert [stream['stream']['status_code'] for stream in streams] == ['200', '404']
+    assert [[json.loads(value[1]) for value in stream['values']] for stream in streams] == [
+        [{'log': 'line 1', 'recurs': '2117/1'}, {'log': 'line 3', 'recurs': '2117/3'}],
+        [{'log': 'line 2', 'recurs': '2117/2'}]
+    ]
+    # Logs with the same time get increasing timestamps, in batch order.
+    assert [int(value[0]) for value in streams[0]['values']] == [1677661200000000000, 1677661200000000002]
+    assert LokiForwarder.stats()['streams'] == 2 and LokiForwarder.stats()['entries'] == 3
+    assert LokiForwarder.batch == []
+
+
+def test_get_session_is_reused_per_thread(monkeypatch):
+
+    monkeypatch.setattr(LokiForwarder, 'sessions', threading.local())
+    session = LokiForwarder._get_session()
+    assert LokiForwarder._get_session() is session
+    other = []
+    thread = threading.Thread(target=lambda: other.extend([LokiForwarder._get_session(), LokiForwarder._get_session()]))
+    thread.start()
+    thread.join()
+    assert other[0] is other[1] and other[0] is not session
+    assert session.get_adapter('http://loki:3100').max_retries.total == 5
+
+
+def test_failed_batch_is_kept_without_spool(loki, monkeypatch):
+
+    monkeypatch.setenv('LOKI_SENDERS', '2')
+    loki.status_code = 500
+    LokiForwarder.batch.append((access_log('2117/1'), 'line 1'))
+    assert LokiForwarder.forward_batch() == 1
+    assert LokiForwarder.queue is None and LokiForwarder.senders == []
+    assert len(LokiForwarder.batch) == 1 and LokiForwarder.stats()['failed_entries'] == 1
+
+    loki.status_code = 204
+    assert LokiForwarder.forward_batch() == 0
+    assert LokiForwarder.batch == [] and LokiForwarder.stats()['entries'] == 1
+    lines = [json.loads(gzip.decompress(payload))['streams'][0]['values'][0][1] for _, payload, _ in loki.posts]
+    assert lines[0] == lines[1]
+
+
+def test_sender_threads_ship_every_batch_and_stop(loki, monkeypatch, tmp_path):
+
+    monkeypatch.setenv('LOKI_SPOOL_PATH', str(tmp_path))
+    monkeypatch.setenv('LOKI_SENDERS', '2')
+    monkeypatch.setenv('LOKI_QUEUE_SIZE', '1')
+    for number in range(5):
+        LokiForwarder.batch.append((access_log(f'2117/{number}'), f'line {number}'))
+        assert LokiForwarder.forward_batch() == 0
+    senders = list(LokiForwarder.senders)
+    assert len(senders) == 2
+
+    LokiForwarder.close()
+    assert LokiForwarder.queue is None and LokiForwarder.senders == []
+    assert not any(sender.is_alive() for sender in senders)
+    assert len(loki.posts) == 5 and LokiForwarder.stats()['entries'] == 5
+
+
+def test_sender_threads_spill_failed_payloads(loki, monkeypatch, tmp_path):
+
+    monkeypatch.setenv('LOKI_SPOOL_PATH', str(tmp_path))
+    loki.status_code = 500
+    LokiForwarder.batch.append((access_log('2117/1'), 'line 1'))
+    assert LokiForwarder.forward_batch() == 0
+    LokiForwarder.close()
+    stats = LokiForwarder.stats()
+    assert stats['spooled_entries'] == 1 and stats['failed_entries'] == 0
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_push_waits_for_payloads_being_replayed(loki, monkeypatch, tmp_path):
+
+    monkeypatch.setenv('LOKI_SPOOL_PATH', str(tmp_path))
+    # Another sender thread has claimed the last spooled payload and is replaying it.
+    spool_file = LokiSpool.spill(b'older', 'json', 1, 1)
+    spool_file.rename(spool_file.with_name(spool_file.name + '.sending'))
+    assert LokiForwarder._push(b'newer', 'json', 1, 1) == 0
+    assert loki.posts == []
+    assert [path.read_bytes() for path in LokiSpool.pending(claimed=True)] == [b'older', b'newer']
@@ -0,0 +1,48 @@
+import pytest
+from logs.forwarder.loki_protobuf import LokiProtobuf
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (0, b'\x00'),
+        (1, b'\x01'),
+        (127, b'\x7f'),
+        (128, b'\x80\x01'),
+        (300, b'\xac\x02'),
+        (1677662132, b'\xb4\xaf\xfc\x9f\x06'),
+    ]
+)
+def test_varint(value: int, expected: bytes):
+
+    assert LokiProtobuf._varint(value) == expected
+
+
+def test_encode_labels_sorted_and_escaped():
+
+    labels = LokiProtobuf._encode_labels({'service_name': 'log-upcommons', 'content': 'ok', 'referer': 'a"b\\c'})
+    assert labels == '{content="ok", referer="a\\"b\\\\c", service_name="log-upcommons"}'
+
+
+def test_encode_stream():
+
+    stream = {'stream': {'content': 'ok'}, 'values': [['1000000005', 'ab']]}
+    labels = b'{content="ok"}'
+    timestamp = b'\x08\x01\x10\x05'  # 1 second and 5 nanoseconds.
+    entry = b'\x0a' + bytes((len(timestamp),)) + timestamp + b'\x12\x02ab'
+    expected = b'\x0a' + bytes((len(labels),)) + labels + b'\x12' + bytes((len(entry),)) + entry
+    assert LokiProtobuf._encode_stream(stream) == expected
+
+
+def test_encode_stream_omits_zero_nanoseconds():
+
+    stream = {'stream': {}, 'values': [['2000000000', '']]}
+    assert LokiProtobuf._encode_stream(stream) == b'\x0a\x02{}\x12\x06\x0a\x02\x08\x02\x12\x00'
+
+
+def test_encode_is_snappy_compressed():
+
+    snappy = pytest.importorskip("snappy")
+    streams = [{'stream': {'content': 'ok'}, 'values': [['1000000005', 'ab']]}]
+    stream = LokiProtobuf._encode_stream(streams[0])
+    assert snappy.uncompress(LokiProtobuf.encode(streams)) == b'\x0a' + bytes((len(stream),)) + stream
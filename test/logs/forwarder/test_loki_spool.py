@@ -0,0 +1,45 @@
+import pytest
+from logs.forwarder.loki_spool import LokiSpool
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOKI_SPOOL_PATH', str(tmp_path))
+    return tmp_path
+
+
+def test_spool_disabled(monkeypatch):
+
+    monkeypatch.delenv('LOKI_SPOOL_PATH', raising=False)
+    assert not LokiSpool.enabled()
+    assert LokiSpool.pending() == []
+
+
+def test_replay_in_spill_order(spool):
+
+    for index in range(3):
+        LokiSpool.spill(f'payload-{index}'.encode(), 'json', index + 1, 1)
+    sent = []
+    assert LokiSpool.replay(lambda payload, encoding: sent.append((payload, encoding)) or 0) == (3, 6)
+    assert sent == [(b'payload-0', 'json'), (b'payload-1', 'json'), (b'payload-2', 'json')]
+    assert LokiSpool.pending() == []
+
+
+def test_replay_stops_at_first_failure(spool):
+
+    LokiSpool.spill(b'first', 'protobuf', 10, 2)
+    LokiSpool.spill(b'second', 'json', 20, 3)
+    sent = []
+    assert LokiSpool.replay(lambda payload, encoding: sent.append(payload) or 1) == (0, 0)
+    assert sent == [b'first']
+    assert [LokiSpool._parse_name(path) for path in LokiSpool.pending()] == [('protobuf', 10, 2), ('json', 20, 3)]
+
+
+def test_recover_claimed_payloads(spool):
+
+    spool_file = LokiSpool.spill(b'payload', 'json', 1, 1)
+    spool_file.rename(spool_file.with_name(spool_file.name + '.sending'))
+    assert LokiSpool.pending() == []
+    assert LokiSpool.pending(claimed=True) == [spool_file.with_name(spool_file.name + '.sending')]
+    assert LokiSpool.recover() == 1
+    assert LokiSpool.pending() == [spool_file]
@@ -0,0 +1,138 @@
+import gzip
+import pytest
+
+pytest.importorskip("requests")
+from logs import main
+
+
+def log_line(day: int, time: str, resource: str = '/about', month: str = 'Mar') -> str:
+
+    return f'1.2.3.4 - - [{day:02}/{month}/2023:{time} +0100] "GET {resource} HTTP/1.1" 200 5 "-" "Mozilla/5.0"\n'
+
+
+def write_day(folder, day: int, lines: list):
+
+    log_file = folder / f'anon_upc_access_log.2023-03-{day:02}.txt.gz'
+    with gzip.open(log_file, 'wt') as file:
+        file.writelines(lines)
+    return log_file
+
+
+@pytest.fixture
+def days(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.RobotsCrawlers, 'reload', lambda: None)
+    monkeypatch.setattr(main.RobotsCrawlers, 'filter', lambda user_agent: '')
+    monkeypatch.setattr(main.AddLogMetadata, 'load', lambda: None)
+    monkeypatch.setattr(main.LokiForwarder, 'close', lambda: None)
+    # The forwarder keeps every log, as if Loki could not be reached.
+    monkeypatch.setattr(main, 'forward_records', lambda records: main.LokiForwarder.batch.extend(records))
+    main.DoubleClick.reset()
+    main.LokiForwarder.reset()
+    main.LokiForwarder.batch = []
+    first = write_day(tmp_path, 1, [log_line(1, '10:00:00', '/help'), log_line(1, '23:59:50')])
+    second = write_day(tmp_path, 2, [log_line(2, '00:00:10'), log_line(2, '00:00:50')])
+    yield first, second
+    main.DoubleClick.reset()
+    main.LokiForwarder.batch = []
+
+
+def test_double_click_across_midnight_in_sequence(days):
+
+    first, second = days
+    main.process_day(first, sequential=True)
+    day_stats = main.process_day(second, sequential=True)
+    assert day_stats[main.LOG_COUNTER_DOUBLE_CLICK] == 1
+    assert main.UNSENT_LOGS not in day_stats
+
+
+def test_double_click_across_midnight_in_worker(days):
+
+    first, second = days
+    main.process_day(first)
+    main.DoubleClick.reset()
+    day_stats = main.process_day(second, previous_file=first)
+    assert day_stats[main.LOG_COUNTER_DOUBLE_CLICK] == 1
+    # The logs the worker could not forward are handed back instead of being lost with the process.
+    assert [line for _, line in day_stats[main.UNSENT_LOGS]] == [log_line(2, '00:00:50')]
+    assert main.LokiForwarder.batch == []
+
+
+def test_previous_files_only_pairs_consecutive_days(tmp_path):
+
+    files = [tmp_path / f'anon_upc_access_log.2023-03-{day:02}.txt.gz' for day in (1, 2, 4)]
+    previous = tmp_path / 'anon_upc_access_log.2023-02-28.txt.gz'
+    assert main.previous_files(files, previous) == [previous, files[0], None]
+    assert main.previous_files(files) == [None, files[0], None]
+
+
+def test_count_only_day_is_not_forwarded(days, monkeypatch):
+
+    pytest.importorskip("pyarrow")
+    monkeypatch.setenv('LOGS_COUNT_ONLY', '1')
+    monkeypatch.delenv('LOKI_URL', raising=False)
+    first, second = days
+    main.process_day(first, sequential=True)
+    day_stats = main.process_day(second, sequential=True)
+    assert day_stats[main.LOG_COUNTER_DOUBLE_CLICK] == 1
+    assert main.LokiForwarder.batch == []
+
+
+def test_count_only_is_refused_with_loki_url(monkeypatch):
+
+    monkeypatch.setenv('LOGS_COUNT_ONLY', '1')
+    monkeypatch.setenv('LOKI_URL', 'http://loki:3100')
+    with pytest.raises(ValueError):
+        main.count_only()
+    monkeypatch.delenv('LOKI_URL')
+    assert main.count_only()
+    monkeypatch.setenv('LOGS_COUNT_ONLY', '0')
+    assert not main.count_only()
+
+
+def test_unsent_logs_are_not_duplicated_across_months(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.RobotsCrawlers, 'reload', lambda: None)
+    monkeypatch.setattr(main.RobotsCrawlers, 'filter', lambda user_agent: '')
+    monkeypatch.setattr(main.AddLogMetadata, 'load', lambda: None)
+    # Every push fails, as during a Loki outage.
+    monkeypatch.setattr(main.LokiForwarder, '_send', lambda payload, encoding: 1)
+    monkeypatch.setattr(main.LokiForwarder, 'loki_url', 'http://loki:3100')
+    monkeypatch.setattr(main.LokiForwarder, 'batch', [])
+    monkeypatch.setenv('LOKI_SENDERS', '0')
+    monkeypatch.delenv('LOKI_SPOOL_PATH', raising=False)
+    monkeypatch.delenv('LOGS_RANGE_BYTES', raising=False)
+    monkeypatch.setenv('LOGS_OUTPUT_PATH', str(tmp_path))
+    monkeypatch.setenv('LOGS_WORKERS', '2')
+    monkeypatch.setenv('START_DAY', '1')
+    monkeypatch.setenv('END_DAY', '31')
+    lines = []
+    for month, name, day in ((3, 'Mar', 30), (3, 'Mar', 31), (4, 'Apr', 1)):
+        day_lines = [log_line(day, f'1{hour}:00:00', f'/help/{hour}', name) for hour in range(3)]
+        (tmp_path / f'anon_upc_access_log.2023-{month:02}-{day:02}.txt.gz').write_bytes(gzip.compress(''.join(day_lines).encode()))
+        lines += day_lines
+
+    yearly_stats = {**main.new_counters(), main.LOG_COUNTER_ROBOTS_CRAWLERS: 0, 'total_logs': 0, 'time': 0.0}
+    previous_file = main.process_month(2023, 3, yearly_stats)
+    main.process_month(2023, 4, yearly_stats, previous_file)
+    assert sorted(line for _, line in main.LokiForwarder.batch) == sorted(lines)
+
+
+def test_replay_day_end_reads_from_the_last_checkpoints(tmp_path, monkeypatch):
+
+    pytest.importorskip("indexed_gzip")
+    monkeypatch.setattr(main.LogIndex, 'CHECKPOINT_BYTES', 1000)
+    lines = [log_line(1, f'23:{second // 60 + 56:02}:{second % 60:02}', f'/help/{second}') for second in range(240)]
+    # Two accesses are out of order: one in the window is logged early, one out of it is logged late.
+    lines[-20], lines[-50] = lines[-50], lines[-20]
+    log_file = write_day(tmp_path, 1, lines)
+    replayed, offsets = [], []
+    monkeypatch.setattr(main, 'process_batch', lambda batch, enrich: replayed.append(batch))
+    batches = main.LogReader.batches
+    monkeypatch.setattr(main.LogReader, 'batches', lambda path, start=0, end=None: offsets.append(start) or batches(path, start, end))
+
+    main.replay_day_end(log_file)
+    main.LogIndex.build(log_file)
+    main.replay_day_end(log_file)
+    assert replayed[0] == replayed[1] == lines[-50:-49] + lines[-31:-20] + lines[-19:]
+    assert offsets[0] == 0 and len(offsets) > 2 and min(offsets[1:]) > 0
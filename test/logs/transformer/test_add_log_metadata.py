@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import pytest
+
+pytest.importorskip("pymongo")
+from logs.transformer import add_log_metadata
+from logs.transformer.add_log_metadata import AddLogMetadata
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    queries = []
+
+    def get_metadata_by_ids(resource_ids):
+        queries.append(sorted(resource_ids))
+        return {resource: {'language': 'ca', 'type_recurs': None, 'access': 'Open'}
+                for resource in resource_ids if resource.endswith('7')}
+
+    monkeypatch.setattr(add_log_metadata.MongoDbForwarder, 'get_metadata_by_ids', get_metadata_by_ids)
+    monkeypatch.setattr(AddLogMetadata, 'batching', True)
+    monkeypatch.setattr(AddLogMetadata, 'batch_size', 2)
+    monkeypatch.setattr(AddLogMetadata, 'cache', OrderedDict())
+    monkeypatch.setattr(AddLogMetadata, 'negative_cache', OrderedDict())
+    monkeypatch.setattr(AddLogMetadata, 'pending', {})
+    monkeypatch.setattr(AddLogMetadata, 'held', [])
+    AddLogMetadata.reset()
+    return queries
+
+
+def test_batched_lookups_keep_log_order(batching):
+
+    first, second, third = {'n': 1}, {'n': 2}, {'n': 3}
+    assert not AddLogMetadata.hold({'n': 0}, 'line 0')
+    AddLogMetadata.transform(first, '2117/7')
+    assert AddLogMetadata.hold(first, 'line 1')
+    assert AddLogMetadata.hold(second, 'line 2')
+    assert not AddLogMetadata.should_flush()
+    AddLogMetadata.transform(third, '2117/8')
+    assert AddLogMetadata.hold(third, 'line 3')
+    assert AddLogMetadata.should_flush()
+
+    assert AddLogMetadata.flush() == [(first, 'line 1'), (second, 'line 2'), (third, 'line 3')]
+    assert batching == [['2117/7', '2117/8']]
+    assert first == {'n': 1, 'language': 'ca', 'access': 'Open'}
+    assert third == {'n': 3}
+
+
+def test_batched_lookups_use_caches(batching):
+
+    AddLogMetadata.transform({}, '2117/7')
+    AddLogMetadata.transform({}, '2117/8')
+    AddLogMetadata.flush()
+
+    found, missing = {}, {}
+    AddLogMetadata.transform(found, '2117/7')
+    AddLogMetadata.transform(missing, '2117/8')
+    assert not AddLogMetadata.pending
+    assert found == {'language': 'ca', 'access': 'Open'}
+    assert missing == {}
+    assert len(batching) == 1
+
+    stats = AddLogMetadata.stats()
+    assert (stats['hits'], stats['negative_hits'], stats['misses'], stats['not_found'], stats['queries']) == (1, 1, 2, 1, 1)
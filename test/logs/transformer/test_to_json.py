@@ -0,0 +1,52 @@
+import pytest
+from logs.transformer.to_json import ToJSON
+
+
+@pytest.mark.parametrize(
+    "log",
+    [
+        ('1.2.3.4 - - [01/Jan/2023:12:34:56 +0100] "GET /handle/2117/1 HTTP/1.1" 200 123 '
+         '"https://fake-domain/fake-resource" "Mozilla/5.0 (X11; Linux x86_64)"\n'),
+        ('10.0.0.1 - - [1/Feb/2023:00:00:01 -0500] "POST /discover?query=x HTTP/1.0" 304 - "-" "curl/7.68.0"\n'),
+    ]
+)
+def test_to_json_single_pass_matches_fallback(log: str):
+
+    assert ToJSON.transform(log) == ToJSON._transform_fallback(log)
+
+
+def test_to_json_with_correct_log():
+
+    log = ('1.2.3.4 - - [01/Jan/2023:12:34:56 +0100] "GET /handle/2117/1 HTTP/1.1" 200 123 '
+           '"https://fake-domain/fake-resource" "Mozilla/5.0"\n')
+    log_json, status = ToJSON.transform(log)
+    assert status == 0
+    assert log_json == {
+        'ip_address': '1.2.3.4',
+        'date': '01/Jan/2023',
+        'time': '12:34:56 +0100',
+        'request': {
+            'method': 'GET',
+            'resource': '/handle/2117/1',
+            'version': 'HTTP/1.1',
+            'status_code': '200',
+            'response_size': '123'
+        },
+        'referer': 'fake-domain',
+        'user_agent': 'Mozilla/5.0'
+    }
+
+
+def test_to_json_with_malformed_request():
+
+    log = '1.2.3.4 - - [01/Jan/2023:12:34:56 +0100] "GET /handle/2117/1 extra HTTP/1.1" 200 123 "-" "Mozilla/5.0"\n'
+    log_json, status = ToJSON.transform(log)
+    assert status == -1
+    assert log_json['request']['resource'] == '/handle/2117/1 extra'
+    assert log_json['request']['method'] == 'GET'
+
+
+def test_to_json_with_invalid_log():
+
+    with pytest.raises(Exception):
+        ToJSON.transform("not a log line\n")
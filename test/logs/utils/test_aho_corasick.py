@@ -0,0 +1,29 @@
+import pytest
+from logs.utils.aho_corasick import AhoCorasick
+
+
+@pytest.mark.parametrize(
+    "patterns, text, expected",
+    [
+        (["bingbot", "bot", "crawler"], "mozilla/5.0 (compatible; bingbot/2.0)", 0),
+        (["crawler", "bot", "bingbot"], "mozilla/5.0 (compatible; bingbot/2.0)", 1),
+        (["he", "she", "his", "hers"], "ushers", 0),
+        (["hers", "she", "he"], "ushers", 0),
+        (["abcd", "bc"], "abce", 1),
+        (["bot"], "mozilla/5.0 (windows nt 10.0)", -1),
+        (["bot", ""], "mozilla/5.0 (windows nt 10.0)", 1),
+        ([], "mozilla/5.0", -1),
+    ]
+)
+def test_aho_corasick_returns_highest_priority_match(patterns: list, text: str, expected: int):
+
+    assert AhoCorasick(patterns).search(text) == expected
+
+
+def test_aho_corasick_matches_substring_search():
+
+    patterns = ["ab", "bca", "c", "abcab", "ba"]
+    matcher = AhoCorasick(patterns)
+    for text in ["", "a", "abcab", "xxbcax", "bab", "ccc", "aabbaabb"]:
+        expected = next((index for index, pattern in enumerate(patterns) if pattern in text), -1)
+        assert matcher.search(text) == expected
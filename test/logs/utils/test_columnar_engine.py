@@ -0,0 +1,111 @@
+import pytest
+import random
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("requests")
+from logs import main
+from logs.utils import columnar_engine
+from logs.utils.columnar_engine import ColumnarEngine
+
+
+def log_line(resource: str, second: int = 0, address: str = '1.2.3.4', status: str = '200', user_agent: str = 'Mozilla/5.0', referer: str = '-') -> str:
+
+    return f'{address} - - [01/Mar/2023:10:15:{second:02} +0100] "GET {resource} HTTP/1.1" {status} 5 "{referer}" "{user_agent}"\n'
+
+
+LINES = [
+    log_line('/handle/2117/1'),
+    log_line('/handle/2117/1', second=10),
+    log_line('/handle/2117/1', second=45),
+    log_line('/bitstream/handle/2099.1/7/thesis.pdf'),
+    log_line('/bitstream/handle/2117/8/a.pdf?from=/handle/2117/9'),
+    log_line('/bitstream/id/12/file.pdf'),
+    log_line('/static/style.css'),
+    log_line('/discover?query=energia'),
+    log_line('/about'),
+    log_line('/handle/2117/2', status='404'),
+    log_line('/handle/2117/3', status='0304'),
+    log_line('/handle/2117/4', user_agent='Googlebot/2.1'),
+    log_line('/handle/2117/5', address='-'),
+    log_line('/handle/2117/6', address='2001:db8::1, unknown, 5.6.7.8'),
+    log_line('/handle/2117/٣'),
+    log_line('/handle/2117/10', user_agent='Mozilla\x0b5.0'),
+    log_line('/cerca café'),
+    '1.2.3.4 - - [01/Mar/2023:10:16:00 +0100] "GET /handle/2117/11 and more HTTP/1.1" 200 5 "-" "curl"\n',
+    'not a log line\n',
+]
+
+MALFORMED_LINES = [
+    log_line('/handle/2117/20', referer='https://ww[google.com/'),
+    log_line('/handle/2117/21', referer='https://www.google.com]/'),
+    log_line('/handle/2117/22', referer='https://[www.google.com]/'),
+    log_line('/handle/2117/23', referer='https://[2001:db8::1]/search'),
+    log_line('/handle/2117/24', referer='https://www.google.com/search?q=[energia]'),
+    log_line('/handle/2117/25', referer='https://ww[google.com/', user_agent='Googlebot/2.1'),
+    log_line('/bitstream/id/26/file.pdf', referer='ftp://]'),
+    '1.2.3.4 - - [01/Mar/2023:10:15:00 +0100] "GET /handle/2117/27 HTTP/1.1" 200 5 "https://ww[google.com/"\n',
+    '1.2.3.4 - - [01/Mar/2023:10:15:00 +0100] "GET /handle/2117/28 HTTP/1.1" 200 5 "-" "Mozilla/5.0" "extra"\n',
+    '1.2.3.4 - - [01/Mar/2023:10:15 +0100] "GET /handle/2117/29 HTTP/1.1" 200 5 "-" "Mozilla/5.0"\n',
+    '\n',
+]
+
+# Characters that break the fields of a line when they are inserted into it.
+MUTATIONS = '[]"-: /?\t0a\\'
+
+
+@pytest.fixture(autouse=True)
+def robots(monkeypatch):
+    monkeypatch.setattr(columnar_engine.RobotsCrawlers, 'filter', lambda user_agent: 'bot' if 'bot' in user_agent.lower() else '')
+    columnar_engine.DoubleClick.reset()
+    yield
+    columnar_engine.DoubleClick.reset()
+
+
+def test_counters_match_process_batch():
+
+    expected = main.process_batch(LINES, enrich=False)[1]
+    columnar_engine.DoubleClick.reset()
+    assert ColumnarEngine.process_lines(LINES, main.new_counters()) == expected
+
+
+def test_counters_of_malformed_lines_match_process_batch():
+
+    expected = main.process_batch(MALFORMED_LINES, enrich=False)[1]
+    columnar_engine.DoubleClick.reset()
+    counters = ColumnarEngine.process_lines(MALFORMED_LINES, main.new_counters())
+    assert counters == expected
+    assert counters[main.LABEL_CONTENT_ERROR] >= 4
+
+
+def test_counters_of_mutated_lines_match_process_batch():
+
+    rng = random.Random(0)
+    lines = []
+    for line in (LINES + MALFORMED_LINES) * 20:
+        for _ in range(rng.randint(1, 3)):
+            # The access time is kept, since an invalid one stops both paths.
+            position = rng.randrange(min(line.find(']') + 1, len(line) - 1), len(line))
+            line = line[:position] + rng.choice(MUTATIONS) + line[position + rng.randint(0, 1):]
+        lines.append(line)
+    expected = main.process_batch(lines, enrich=False)[1]
+    columnar_engine.DoubleClick.reset()
+    assert ColumnarEngine.process_lines(lines, main.new_counters()) == expected
+
+
+def test_counters_of_each_type():
+
+    counters = ColumnarEngine.process_lines(LINES, main.new_counters())
+    assert counters[main.LOG_COUNTER_DOUBLE_CLICK] == 1
+    assert counters[main.LOG_COUNTER_STATUS_CODE] == 1
+    assert counters[main.LOG_COUNTER_ROBOTS_CRAWLERS_BREAKDOWN] == {'bot': 1}
+    assert counters[main.LABEL_TYPE_RESOURCE] == 9
+    assert counters[main.LABEL_TYPE_RESOURCE_BITSTREAM] == 1
+    assert counters[main.LABEL_CONTENT_ERROR] == 1
+
+
+def test_double_click_window_spans_chunks():
+
+    counters = main.new_counters()
+    ColumnarEngine.process_lines(LINES[:1], counters)
+    ColumnarEngine.process_lines(LINES[1:2], counters)
+    assert counters[main.LOG_COUNTER_DOUBLE_CLICK] == 1
@@ -0,0 +1,40 @@
+import pytest
+from datetime import datetime
+from logs.utils.date_converter import to_timestamp
+
+
+def strptime_timestamp(date: str, time: str) -> int:
+
+    return int(datetime.strptime(date + ' ' + time, '%d/%b/%Y %H:%M:%S %z').timestamp())
+
+
+@pytest.mark.parametrize(
+    "date, time",
+    [
+        ("01/Mar/2023", "10:15:32 +0100"),
+        ("1/Mar/2023", "00:00:00 +0000"),
+        ("31/Dec/2023", "23:59:59 -0530"),
+        ("29/Feb/2024", "12:00:00 +1400"),
+        ("15/mar/2023", "10:15:32 +0100"),
+        ("15/Mar/2023", "10:15:32 +01:00"),
+    ]
+)
+def test_to_timestamp_matches_strptime(date: str, time: str):
+
+    assert to_timestamp(date, time) == strptime_timestamp(date, time)
+
+
+@pytest.mark.parametrize(
+    "date, time",
+    [
+        ("29/Feb/2023", "10:15:32 +0100"),
+        ("01/Foo/2023", "10:15:32 +0100"),
+        ("01/Mar/23", "10:15:32 +0100"),
+        ("01/Mar/2023", "24:00:00 +0100"),
+        ("01/Mar/2023", "10:15:60 +0100"),
+    ]
+)
+def test_to_timestamp_rejects_invalid_times(date: str, time: str):
+
+    with pytest.raises(ValueError):
+        to_timestamp(date, time)
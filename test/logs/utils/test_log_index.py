@@ -0,0 +1,71 @@
+import gzip
+import pytest
+
+pytest.importorskip("indexed_gzip")
+from logs.utils.date_converter import to_timestamp
+from logs.utils.log_index import LogIndex
+from logs.utils.log_reader import LogReader
+
+
+def log_line(second: int) -> str:
+
+    return f'1.2.3.4 - - [01/Mar/2023:10:{second // 60:02}:{second % 60:02} +0100] "GET /handle/2117/{second} HTTP/1.1" 200 5 "-" "Mozilla/5.0"\n'
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogIndex, 'CHECKPOINT_BYTES', 1000)
+    monkeypatch.setattr(LogIndex, 'READ_SIZE', 700)
+    # One access arrives late, so the newest access time before a checkpoint is not always the last one.
+    seconds = list(range(200))
+    seconds[50], seconds[60] = seconds[60], seconds[50]
+    path = tmp_path / 'anon_upc_access_log.2023-03-01.txt.gz'
+    with gzip.open(path, 'wt') as file:
+        file.write(''.join(log_line(second) for second in seconds) + 'café without newline')
+    return path
+
+
+def test_build_saves_checkpoints_at_line_starts(log_file):
+
+    index = LogIndex.build(log_file)
+    data = gzip.decompress(log_file.read_bytes())
+    assert index['size'] == len(data)
+    assert index['checkpoints'][0] == [0, 0]
+    assert len(index['checkpoints']) > 10
+    for offset, newest in index['checkpoints'][1:]:
+        assert data[offset - 1:offset] == b'\n'
+        lines = data[:offset].decode().splitlines()
+        assert newest == max(to_timestamp('01/Mar/2023', line[25:39]) for line in lines)
+
+
+def test_build_reuses_index_until_file_changes(log_file):
+
+    index = LogIndex.build(log_file)
+    assert LogIndex.load(log_file) == index
+    with gzip.open(log_file, 'at') as file:
+        file.write(log_line(300))
+    assert LogIndex.load(log_file) is None
+    assert LogIndex.build(log_file)['size'] > index['size']
+
+
+def test_ranges_cover_file(log_file):
+
+    index = LogIndex.build(log_file)
+    ranges = LogIndex.ranges(index, 3000)
+    assert ranges[0][0] == 0 and ranges[-1][1] == index['size']
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+    assert all(end - start >= 3000 for start, end in ranges[:-1])
+
+
+def test_range_lines_add_up_to_file(log_file):
+
+    index = LogIndex.build(log_file)
+    lines = [line for start, end in LogIndex.ranges(index, 3000) for line in LogReader.lines(log_file, start, end)]
+    assert lines == list(LogReader.lines(log_file))
+
+
+def test_warm_up_points_before_start(log_file):
+
+    index = LogIndex.build(log_file)
+    start = index['checkpoints'][3][0]
+    assert LogIndex.warm_up_points(index, start) == [tuple(checkpoint) for checkpoint in index['checkpoints'][2::-1]]
@@ -0,0 +1,92 @@
+import gzip
+import pytest
+from logs.utils import log_reader
+from logs.utils.log_reader import LogReader
+
+
+@pytest.fixture(params=[1, 4], ids=['inline', 'read_ahead'])
+def cpus(request, monkeypatch):
+    # One CPU decompresses inline, several read blocks ahead in a background thread.
+    monkeypatch.setattr(log_reader.os, 'cpu_count', lambda: request.param)
+    return request.param
+
+
+def write_members(path, *members):
+    with open(path, 'wb') as file:
+        for member in members:
+            file.write(gzip.compress(member))
+    return path
+
+
+def read_text_mode(path):
+    with gzip.open(path, mode='rt', encoding='utf-8', errors='ignore') as file:
+        return list(file)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b'',
+        b'first\nsecond\n',
+        b'no trailing newline',
+        b'windows\r\nline\r\nendings\r\n',
+        b'old mac\rline\rendings',
+        b'mixed\r\n\r\n\n\r',
+        b'caf\xc3\xa9 \xff invalid\n\xe2\x82 truncated\n',
+        b'vertical\x0btab and\xe2\x80\xa8separator\n',
+    ]
+)
+def test_lines_match_gzip_text_mode(tmp_path, monkeypatch, cpus, data):
+    # Tiny blocks split CRLF pairs and multibyte characters across block boundaries.
+    monkeypatch.setattr(LogReader, 'BLOCK_SIZE', 3)
+    path = write_members(tmp_path / 'day.txt.gz', data)
+    assert list(LogReader.lines(path)) == read_text_mode(path)
+
+
+def test_multiple_gzip_members(tmp_path, monkeypatch, cpus):
+    monkeypatch.setattr(LogReader, 'READ_SIZE', 5)
+    monkeypatch.setattr(LogReader, 'BLOCK_SIZE', 4)
+    path = tmp_path / 'day.txt.gz'
+    path.write_bytes(gzip.compress(b'one\r') + b'\x00' * 8 + gzip.compress(b'\ntwo\n\xc3') + gzip.compress(b'\xa9three'))
+    assert list(LogReader.lines(path)) == read_text_mode(path) == ['one\n', 'two\n', '\xe9three']
+
+
+def test_batches_split_lines_at_newlines_only(tmp_path, cpus):
+    path = write_members(tmp_path / 'day.txt.gz', b'aaaa\nbb\x0cbb\ncc\xc2\x85cc\ndddd\n')
+    assert list(LogReader.batches(path)) == [['aaaa\n', 'bb\x0cbb\n', 'cc\x85cc\n', 'dddd\n']]
+
+
+def test_external_decompressor(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOGS_DECOMPRESSOR', 'gzip')
+    path = write_members(tmp_path / 'day.txt.gz', b'first\r\nsecond\n', b'third\n')
+    assert list(LogReader.lines(path)) == ['first\n', 'second\n', 'third\n']
+
+
+def test_missing_decompressor_falls_back_to_zlib(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOGS_DECOMPRESSOR', 'missing-decompressor')
+    path = write_members(tmp_path / 'day.txt.gz', b'first\nsecond\n')
+    assert list(LogReader.lines(path)) == ['first\n', 'second\n']
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        (gzip.compress(b'first\nsecond\n')[:-12], EOFError),
+        (gzip.compress(b'first\n') + b'not gzip', gzip.BadGzipFile),
+    ]
+)
+def test_corrupt_file_raises(tmp_path, cpus, data, error):
+    path = tmp_path / 'day.txt.gz'
+    path.write_bytes(data)
+    with pytest.raises(error):
+        list(LogReader.lines(path))
+
+
+def test_stopping_early_releases_reader(tmp_path, monkeypatch, cpus):
+    monkeypatch.setattr(LogReader, 'BLOCK_SIZE', 64)
+    monkeypatch.setattr(LogReader, 'QUEUE_SIZE', 1)
+    path = write_members(tmp_path / 'day.txt.gz', *[b'line\n' * 1000] * 20)
+    batches = LogReader.batches(path)
+    assert set(next(batches)) == {'line\n'}
+    batches.close()
+    assert log_reader.threading.active_count() == 1
@@ -0,0 +1,38 @@
+from logs.utils.metadata_index import MetadataIndex
+
+
+def test_metadata_index_lookup():
+
+    index = MetadataIndex()
+    records = [
+        ('2117/12345', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+        ('2099.1/7', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+        ('2117/1', {'language': 'en', 'type_recurs': None, 'access': None}),
+        ('2117/2', {'language': None, 'type_recurs': None, 'access': None}),
+    ]
+    assert index.load(records) == 4
+    assert index.get('2117/12345') == {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}
+    assert index.get('2117/1') == {'language': 'en'}
+    assert index.get('2117/2') == {}
+    assert index.get('2117/3') == {}
+    assert index.get('2099.2/7') == {}
+    assert index.stats()['resources'] == 3
+    assert index.stats()['distinct_values'] == 2
+
+
+def test_metadata_index_shares_values():
+
+    index = MetadataIndex()
+    index.add('2117/1', {'language': 'ca', 'access': 'Open'})
+    index.add('2117/2', {'access': 'Open', 'language': 'ca'})
+    assert index.get('2117/1') is index.get('2117/2')
+
+
+def test_metadata_index_non_numeric_handles():
+
+    index = MetadataIndex()
+    index.add('2117/0123', {'language': 'ca'})
+    index.add('2117/abc', {'language': 'es'})
+    assert index.get('2117/0123') == {'language': 'ca'}
+    assert index.get('2117/123') == {}
+    assert index.get('2117/abc') == {'language': 'es'}
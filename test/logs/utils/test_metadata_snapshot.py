@@ -0,0 +1,52 @@
+import pytest
+from logs.utils.metadata_snapshot import MetadataSnapshot
+
+
+RECORDS = [
+    ('2117/12345', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+    ('2099.1/7', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+    ('2117/1', {'language': 'en', 'type_recurs': None, 'access': None}),
+    ('2117/2', {'language': None, 'type_recurs': None, 'access': None}),
+    ('2117/0123', {'language': 'es'}),
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / 'metadata.snapshot'
+    assert MetadataSnapshot.export(path, RECORDS)['resources'] == 4
+    snapshot = MetadataSnapshot(path)
+    yield snapshot
+    snapshot.close()
+
+
+@pytest.mark.parametrize(
+    "resource, expected",
+    [
+        ('2117/12345', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+        ('2099.1/7', {'language': 'ca', 'type_recurs': 'Article', 'access': 'Open'}),
+        ('2117/1', {'language': 'en'}),
+        ('2117/2', {}),
+        ('2117/0123', {'language': 'es'}),
+        ('2117/123', {}),
+        ('2117/99999', {}),
+        ('2099.4/7', {}),
+    ]
+)
+def test_snapshot_lookup(snapshot, resource: str, expected: dict):
+
+    assert snapshot.get(resource) == expected
+
+
+def test_snapshot_shares_values(snapshot):
+
+    assert snapshot.get('2117/12345') is snapshot.get('2099.1/7')
+    assert snapshot.stats()['distinct_values'] == 3
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+
+    path = tmp_path / 'other'
+    path.write_bytes(b'not a snapshot' * 4)
+    with pytest.raises(ValueError):
+        MetadataSnapshot(path)
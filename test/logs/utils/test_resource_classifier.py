@@ -0,0 +1,24 @@
+import pytest
+from logs.utils.resource_classifier import ResourceClassifier
+
+
+@pytest.mark.parametrize(
+    "resource, expected",
+    [
+        ("/handle/2117/12345", ("recurs", "2117/12345")),
+        ("/handle/2099.1/7/browse?type=author", ("recurs", "2099.1/7")),
+        ("/bitstream/handle/2099.1/7/thesis.pdf", ("recurs-bitstream", "2099.1/7")),
+        ("/bitstream/handle/2117/8/a.pdf?from=/handle/2117/9", ("recurs", "2117/9")),
+        ("/static/a.png/handle/2117/10", ("recurs", "2117/10")),
+        ("/bitstream/id/12/file.pdf", ("bitstream", None)),
+        ("/static/style.css", ("recurs-web", None)),
+        ("/static/logo.png?v=2", ("recurs-web", None)),
+        ("/discover?query=energia", ("cerca", None)),
+        ("/community-list", ("cerca", None)),
+        ("/handle/2117/x", ("altres", None)),
+        ("/about", ("altres", None)),
+    ]
+)
+def test_classify(resource: str, expected: tuple):
+
+    assert ResourceClassifier.classify(resource) == expected
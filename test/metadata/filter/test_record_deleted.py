@@ -7,3 +7,9 @@ def test_record_deleted_with_empty_record():
         'header': {}
     }
     assert RecordDeleted.filter(record) == False
+
+def test_record_deleted_with_xml_header():
+
+    etree = pytest.importorskip("lxml.etree")
+    assert RecordDeleted.filter_header(etree.fromstring('<header status="deleted"/>')) == True
+    assert RecordDeleted.filter_header(etree.fromstring('<header/>')) == False
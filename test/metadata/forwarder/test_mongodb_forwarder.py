@@ -0,0 +1,81 @@
+import json
+import pytest
+
+pytest.importorskip("pymongo")
+from types import SimpleNamespace
+from pymongo.errors import BulkWriteError
+from metadata.forwarder.mongodb_forwarder import MongoDbForwarder
+
+
+class FakeCollection:
+
+    def __init__(self):
+        self.calls = []
+        self.documents = {}
+
+    def bulk_write(self, operations, ordered=True):
+        self.calls.append(('bulk_write', [operation._filter for operation in operations], ordered))
+        result = {'nUpserted': 0, 'nMatched': 0, 'nModified': 0, 'writeErrors': []}
+        for index, operation in enumerate(operations):
+            resource_id = operation._filter['id']
+            if resource_id.endswith('!'):
+                result['writeErrors'].append({'index': index, 'errmsg': 'invalid id'})
+            elif resource_id not in self.documents:
+                result['nUpserted'] += 1
+            else:
+                result['nMatched'] += 1
+                result['nModified'] += self.documents[resource_id] != operation._doc
+            if not resource_id.endswith('!'):
+                self.documents[resource_id] = operation._doc
+        if result['writeErrors']:
+            raise BulkWriteError(result)
+        return SimpleNamespace(bulk_api_result=result)
+
+    def delete_many(self, query):
+        self.calls.append(('delete_many', query))
+        return SimpleNamespace(deleted_count=len(query['id']['$in']))
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(MongoDbForwarder, 'mongoDbClient', object())
+    monkeypatch.setattr(MongoDbForwarder, 'mongoDbCollection', collection)
+    return collection
+
+
+def test_upsert_replaces_records_by_id(tmp_path, collection):
+
+    metadata_file = tmp_path / '0_100.metadata.json'
+    metadata_file.write_text(json.dumps([{'id': '2117/1', 'metadata': {'dc.title': 'A'}}, {'id': '2117/2', 'metadata': {}}]))
+    assert MongoDbForwarder.upsert(metadata_file) == {'inserted': 2, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    assert collection.calls == [('bulk_write', [{'id': '2117/1'}, {'id': '2117/2'}], False)]
+
+
+def test_upsert_writes_chunks_and_counts_records(tmp_path, collection):
+
+    records = [{'id': f'2117/{number}', 'metadata': {'dc.title': 'A'}} for number in range(5)]
+    metadata_file = tmp_path / '0_100.metadata.json'
+    metadata_file.write_text(json.dumps(records))
+    assert MongoDbForwarder.upsert(metadata_file, chunk_size=2) == {'inserted': 5, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    assert [len(call[1]) for call in collection.calls] == [2, 2, 1]
+
+    records[0]['metadata']['dc.title'] = 'B'
+    metadata_file.write_text(json.dumps(records + [{'id': '2117/9!'}, {'metadata': {}}]))
+    assert MongoDbForwarder.upsert(metadata_file, chunk_size=10) == {'inserted': 0, 'updated': 1, 'unchanged': 4, 'failed': 2}
+    assert len(collection.documents) == 5
+
+
+def test_upsert_unreadable_file(tmp_path, collection):
+
+    metadata_file = tmp_path / '0_100.metadata.json'
+    metadata_file.write_text('[{')
+    assert MongoDbForwarder.upsert(metadata_file)['failed'] == 1
+    assert collection.calls == []
+
+
+def test_delete_removes_records_by_id(collection):
+
+    assert MongoDbForwarder.delete(['2117/4']) == 0
+    assert MongoDbForwarder.delete([]) == 0
+    assert collection.calls == [('delete_many', {'id': {'$in': ['2117/4']}})]
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("sickle")
+from datetime import date
+from types import SimpleNamespace
+from metadata.oaipmh.oaiclient import OAIClient
+
+
+class FakeSickle:
+
+    def __init__(self):
+        self.requests = []
+
+    def ListRecords(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(resumption_token=SimpleNamespace(token='next'))
+
+    def ListSets(self):
+        return iter(SimpleNamespace(setSpec=spec) for spec in ['com_2117_1', 'col_2117_9', 'col_2117_3'])
+
+
+@pytest.fixture
+def client():
+    client = OAIClient(endpoint='https://example.org/oai/request', metadataPrefix='mets')
+    client.client = FakeSickle()
+    return client
+
+
+def test_get_records_sends_params_only_on_the_first_request(client):
+
+    assert client.get_records(None, params={'set': 'col_2117_3'})[1] == 'next'
+    client.get_records('next', params={'set': 'col_2117_3'})
+    assert client.client.requests == [{'metadataPrefix': 'mets', 'set': 'col_2117_3'}, {'resumptionToken': 'next'}]
+
+
+def test_set_partitions_keep_sets_with_prefix(client):
+
+    assert client.set_partitions() == {'col_2117_3': {'set': 'col_2117_3'}, 'col_2117_9': {'set': 'col_2117_9'}}
+
+
+def test_date_partitions_cover_range_without_overlap():
+
+    partitions = OAIClient.date_partitions(date(2023, 1, 1), date(2023, 1, 25), 10)
+    assert partitions == {
+        '2023-01-01_2023-01-10': {'from': '2023-01-01', 'until': '2023-01-10'},
+        '2023-01-11_2023-01-20': {'from': '2023-01-11', 'until': '2023-01-20'},
+        '2023-01-21_2023-01-25': {'from': '2023-01-21', 'until': '2023-01-25'},
+    }
+
+
+def test_get_resumption_token_lists_pages_again(client):
+
+    assert client.get_resumption_token({'set': 'col_2117_3'}, 3) == 'next'
+    assert client.client.requests == [{'metadataPrefix': 'mets', 'set': 'col_2117_3'}, {'resumptionToken': 'next'}, {'resumptionToken': 'next'}]
+    assert client.get_resumption_token({'set': 'col_2117_3'}, 0) is None
+
+
+def test_records_are_yielded_as_xml_elements():
+
+    client = OAIClient(endpoint='https://example.org/oai/request', metadataPrefix='mets')
+    record = object()
+    assert client.client.class_mapping['ListRecords'](record) is record
+    assert client.client.class_mapping['ListSets'] is not client.client.class_mapping['ListRecords']
@@ -0,0 +1,39 @@
+import pytest
+
+lxml = pytest.importorskip("lxml")
+xmltodict = pytest.importorskip("xmltodict")
+from lxml import etree
+from metadata.parser.dim_parser import DimParser
+
+RECORD = (
+    '<record xmlns="http://www.openarchives.org/OAI/2.0/"><header><identifier>oai:upcommons.upc.edu:2117/1</identifier>'
+    '</header><metadata><mets><dmdSec><mdWrap><xmlData><dim:dim xmlns:dim="http://www.dspace.org/xmlns/dspace/dim">'
+    '<dim:field mdschema="dc" element="title" lang="ca">  Energia &amp; aigua  </dim:field>'
+    '<dim:field mdschema="dc" element="contributor" qualifier="author">Garcia, Anna</dim:field>'
+    '<dim:field mdschema="dc" element="contributor" qualifier="author">Puig, Joan</dim:field>'
+    '<dim:field mdschema="dc" element="contributor" qualifier="author">Soler, Marta</dim:field>'
+    '<dim:field mdschema="dc" element="description" qualifier="">Caf\\u00e9</dim:field>'
+    '<dim:field mdschema="dc" element="subject"/>'
+    '</dim:dim></xmlData></mdWrap></dmdSec></mets></metadata></record>'
+)
+
+
+def test_parse_element_matches_parse():
+
+    data = xmltodict.parse(RECORD)['record']
+    fields = data['metadata']['mets']['dmdSec']['mdWrap']['xmlData']['dim:dim']['dim:field']
+    assert DimParser.parse_element(etree.fromstring(RECORD)) == DimParser.parse(fields)
+
+
+def test_parse_element_groups_repeated_keys():
+
+    metadata = DimParser.parse_element(etree.fromstring(RECORD))[0]
+    assert metadata['dc.title.ca'] == 'Energia & aigua'
+    assert metadata['dc.contributor.author'] == ['Garcia, Anna', 'Puig, Joan', 'Soler, Marta']
+    assert metadata['dc.description'] == 'Café'
+    assert metadata['dc.subject'] == ''
+
+
+def test_parse_element_without_fields():
+
+    assert DimParser.parse_element(etree.fromstring('<record/>')) == [{}]
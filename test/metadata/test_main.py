@@ -0,0 +1,227 @@
+import json
+import pytest
+
+pytest.importorskip("sickle")
+pytest.importorskip("pymongo")
+from lxml import etree
+from metadata import main
+
+
+def record_xml(handle: str, sets: list, deleted: bool = False):
+
+    status = ' status="deleted"' if deleted else ''
+    set_specs = ''.join(f'<setSpec>{spec}</setSpec>' for spec in sets)
+    return etree.fromstring(
+        f'<record xmlns="http://www.openarchives.org/OAI/2.0/"><header{status}>'
+        f'<identifier>oai:upcommons.upc.edu:{handle}</identifier>'
+        f'<datestamp>2023-03-01T10:00:00Z</datestamp>{set_specs}</header>'
+        '<metadata><mets><dmdSec><mdWrap><xmlData><dim:dim xmlns:dim="http://www.dspace.org/xmlns/dspace/dim">'
+        '<dim:field mdschema="dc" element="title">Title</dim:field>'
+        '<dim:field mdschema="dc" element="language" qualifier="iso">ca</dim:field>'
+        '</dim:dim></xmlData></mdWrap></dmdSec></mets></metadata></record>'
+    )
+
+
+class FakeClient:
+
+    def __init__(self, pages: dict):
+        self.pages = pages
+
+    def get_records(self, resumptionToken, params=None):
+        key = resumptionToken or params['set']
+        records, token = self.pages[key]
+        return iter(records), token
+
+
+PAGES = {
+    'col_2117_1': ([record_xml('2117/1', ['com_2117_0', 'col_2117_1']), record_xml('2117/2', ['col_2117_1', 'col_2117_2'])], 'col_2117_1-page2'),
+    'col_2117_1-page2': ([record_xml('2117/3', ['col_2117_1']), record_xml('2117/4', [], deleted=True)], None),
+    'col_2117_2': ([record_xml('2117/2', ['col_2117_1', 'col_2117_2']), record_xml('2117/5', ['col_2117_2'])], None),
+}
+
+
+def test_owns_record_picks_first_set_with_prefix():
+
+    assert main.owns_record(['com_2117_0', 'col_2117_5', 'col_2117_3'], 'col_2117_3')
+    assert not main.owns_record(['col_2117_5', 'col_2117_3'], 'col_2117_5')
+    assert main.owns_record('col_2117_5', 'col_2117_5')
+
+
+def test_owns_record_with_narrower_prefix():
+
+    # col_2117_05 comes first but is not harvested with the prefix col_2117_1, so col_2117_100 owns the record.
+    assert main.owns_record(['col_2117_05', 'col_2117_100'], 'col_2117_100', 'col_2117_1')
+    assert not main.owns_record(['col_2117_05', 'col_2117_100'], 'col_2117_100')
+
+
+def test_partitioned_harvest_with_narrower_prefix_keeps_records(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    monkeypatch.setenv('METADATA_HARVEST_SET_PREFIX', 'col_2117_1')
+    client = FakeClient({'col_2117_100': ([record_xml('2117/7', ['col_2117_05', 'col_2117_100'])], None)})
+    assert main.get_metadata(client, 'col_2117_100', {'set': 'col_2117_100'})['n_metadata'] == 1
+
+
+def test_partitioned_harvest_stores_each_record_once(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    partitions = {'col_2117_1': {'set': 'col_2117_1'}, 'col_2117_2': {'set': 'col_2117_2'}}
+    stats = main.get_partitioned_metadata(FakeClient(PAGES), partitions, workers=2)
+    assert stats['partitions'] == {'col_2117_1': 3, 'col_2117_2': 1}
+    assert stats['n_metadata'] == 4
+
+    first = json.loads((tmp_path / 'col_2117_1' / 'batch_0_1000' / '0_100.metadata.json').read_text(encoding='utf-8'))
+    second = json.loads((tmp_path / 'col_2117_1' / 'batch_0_1000' / '100_200.metadata.json').read_text(encoding='utf-8'))
+    other = json.loads((tmp_path / 'col_2117_2' / 'batch_0_1000' / '0_100.metadata.json').read_text(encoding='utf-8'))
+    assert [record['id'] for record in first + second] == ['2117/1', '2117/2', '2117/3']
+    assert [record['id'] for record in other] == ['2117/5']
+    assert first[0]['metadata'] == {'dc.title': 'Title', 'dc.language.iso': 'ca'}
+
+
+class IncrementalClient:
+
+    def __init__(self, records: list, response_date: str):
+        self.records = records
+        self.response_date = response_date
+        self.requests = []
+
+    def get_response_date(self):
+        return self.response_date
+
+    def get_records(self, resumptionToken, params=None):
+        self.requests.append(params)
+        return iter(self.records), None
+
+
+UPSERTED = {'inserted': 1, 'updated': 0, 'unchanged': 0, 'failed': 0}
+
+
+def test_incremental_harvest_applies_changes_and_stores_mark(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    monkeypatch.delenv('METADATA_HARVEST_STATE_PATH', raising=False)
+    monkeypatch.delenv('METADATA_HARVEST_PARTITIONS', raising=False)
+    applied = []
+    monkeypatch.setattr(main.MongoDbForwarder, 'upsert', lambda path: applied.append(('upsert', [record['id'] for record in json.loads(path.read_text())])) or UPSERTED)
+    monkeypatch.setattr(main.MongoDbForwarder, 'delete', lambda ids: applied.append(('delete', ids)) or 0)
+    monkeypatch.setattr(main.MongoDbForwarder, 'close', lambda: None)
+
+    first = IncrementalClient([record_xml('2117/1', ['col_2117_1'])], '2023-03-01T10:00:00Z')
+    stats = main.harvest_incremental(first)
+    assert first.requests == [None]
+    assert stats['n_metadata'] == 1 and stats['failures'] == 0
+    assert (tmp_path / 'increments' / '2023-03-01T10-00-00Z' / 'batch_0_1000' / '0_100.metadata.json').exists()
+
+    second = IncrementalClient([record_xml('2117/1', ['col_2117_1']), record_xml('2117/2', [], deleted=True)], '2023-03-02T10:00:00Z')
+    stats = main.harvest_incremental(second)
+    assert second.requests == [{'from': '2023-03-01T10:00:00Z'}]
+    assert stats['n_deleted'] == 1
+    assert applied == [('upsert', ['2117/1']), ('upsert', ['2117/1']), ('delete', ['2117/2'])]
+    assert json.loads((tmp_path / 'harvest_state.json').read_text())['high_water_mark'] == '2023-03-02T10:00:00Z'
+
+
+def test_incremental_harvest_keeps_mark_on_failure(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    monkeypatch.delenv('METADATA_HARVEST_STATE_PATH', raising=False)
+    monkeypatch.delenv('METADATA_HARVEST_PARTITIONS', raising=False)
+    failures = [{**UPSERTED, 'failed': 1}, UPSERTED]
+    monkeypatch.setattr(main.MongoDbForwarder, 'upsert', lambda path: failures.pop(0))
+    monkeypatch.setattr(main.MongoDbForwarder, 'close', lambda: None)
+
+    first = IncrementalClient([record_xml('2117/1', ['col_2117_1'])], '2023-03-01T10:00:00Z')
+    assert main.harvest_incremental(first)['failures'] == 1
+    assert json.loads((tmp_path / 'harvest_state.json').read_text()) == {'in_progress': '2023-03-01T10:00:00Z'}
+
+    # The next run resumes the harvest in progress, which is complete, and only applies it again.
+    second = IncrementalClient([], '2023-03-02T10:00:00Z')
+    stats = main.harvest_incremental(second)
+    assert second.requests == [] and stats['n_metadata'] == 1 and stats['failures'] == 0
+    assert json.loads((tmp_path / 'harvest_state.json').read_text()) == {'high_water_mark': '2023-03-01T10:00:00Z'}
+
+
+class FlakyClient:
+
+    def __init__(self, pages: dict, errors: dict):
+        self.pages = pages
+        self.errors = errors
+        self.requests = []
+        self.refreshed = []
+
+    def get_records(self, resumptionToken, params=None):
+        self.requests.append(resumptionToken)
+        if self.errors.get(resumptionToken):
+            raise self.errors[resumptionToken].pop(0)
+        records, token = self.pages[resumptionToken]
+        return iter(records), token
+
+    def get_resumption_token(self, params, pages):
+        self.refreshed.append(pages)
+        return 'fresh'
+
+
+HARVEST_PAGES = {
+    None: ([record_xml('2117/1', ['col_2117_1'])], 'expired'),
+    'expired': ([record_xml('2117/2', ['col_2117_1'])], None),
+    'fresh': ([record_xml('2117/2', ['col_2117_1'])], None),
+}
+
+
+def test_harvest_retries_with_backoff(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    monkeypatch.setenv('METADATA_HARVEST_BACKOFF', '0.5')
+    delays = []
+    monkeypatch.setattr(main.time, 'sleep', delays.append)
+    errors = {'expired': [main.requests.exceptions.ConnectionError('reset'), main.requests.exceptions.HTTPError('503')]}
+    client = FlakyClient(HARVEST_PAGES, errors)
+    assert main.get_metadata(client)['n_metadata'] == 2
+    assert client.requests == [None, 'expired', 'expired', 'expired']
+    assert delays == [0.5, 1.0]
+
+
+def test_harvest_resumes_from_checkpoint(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    monkeypatch.setenv('METADATA_HARVEST_RETRIES', '0')
+    crashing = FlakyClient(HARVEST_PAGES, {'expired': [main.requests.exceptions.HTTPError('500')]})
+    with pytest.raises(main.requests.exceptions.HTTPError):
+        main.get_metadata(crashing)
+    checkpoint = json.loads((tmp_path / 'checkpoint.json').read_text())
+    assert checkpoint == {'resumption_token': 'expired', 'batch': 1, 'n_metadata': 1, 'n_deleted': 0, 'completed': False}
+
+    client = FlakyClient(HARVEST_PAGES, {})
+    assert main.get_metadata(client, resume=True)['n_metadata'] == 2
+    assert client.requests == ['expired']
+    assert (tmp_path / 'batch_0_1000' / '100_200.metadata.json').exists()
+
+    # A completed harvest is not repeated when resuming.
+    assert main.get_metadata(client, resume=True)['n_metadata'] == 2
+    assert client.requests == ['expired']
+
+
+def test_harvest_refreshes_expired_resumption_token(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main.FileSystemForwarder, 'output_path', tmp_path)
+    client = FlakyClient(HARVEST_PAGES, {'expired': [main.BadResumptionToken('expired')]})
+    assert main.get_metadata(client)['n_metadata'] == 2
+    assert client.refreshed == [1]
+    assert client.requests == [None, 'expired', 'fresh']
+
+
+def test_process_metadata_upserts_files_concurrently(tmp_path, monkeypatch):
+
+    for batch in range(3):
+        folder = tmp_path / 'col_2117_1' / f'batch_{batch * 1000}_{batch * 1000 + 1000}'
+        folder.mkdir(parents=True)
+        (folder / '0_100.metadata.json').write_text(json.dumps([{'id': f'2117/{batch}'}]))
+    (folder / '0_100.deleted.json').write_text(json.dumps(['2117/9']))
+    monkeypatch.setenv('METADATA_INGEST_WORKERS', '3')
+    applied = []
+    results = {'2117/0': UPSERTED, '2117/1': {**UPSERTED, 'failed': 1}, '2117/2': UPSERTED}
+    monkeypatch.setattr(main.MongoDbForwarder, 'upsert', lambda path: applied.append('upsert') or results[json.loads(path.read_text())[0]['id']])
+    monkeypatch.setattr(main.MongoDbForwarder, 'delete', lambda ids: applied.append('delete') or 0)
+    monkeypatch.setattr(main.MongoDbForwarder, 'close', lambda: None)
+
+    assert main.process_metadata(tmp_path, upsert=True)[1] == 1
+    assert applied == ['upsert', 'upsert', 'upsert', 'delete']
@@ -0,0 +1,11 @@
+from metadata.utils.harvest_state import load_state, save_state
+
+
+def test_state_round_trip(tmp_path):
+
+    state_path = tmp_path / 'state' / 'harvest_state.json'
+    assert load_state(state_path) == {}
+    save_state(state_path, high_water_mark='2023-03-01T10:15:32Z', in_progress='2023-03-02T10:15:32Z')
+    save_state(state_path, high_water_mark='2023-03-02T10:15:32Z', in_progress=None)
+    assert load_state(state_path) == {'high_water_mark': '2023-03-02T10:15:32Z'}
+    assert [path.name for path in state_path.parent.iterdir()] == ['harvest_state.json']